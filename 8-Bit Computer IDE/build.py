@@ -25,6 +25,7 @@ icon_path       = os.path.join(externals_folder, "icon.ico")
 dist_path       = os.path.join(destination_path, "dist")
 work_path       = os.path.join(destination_path, "temp")
 spec_path       = os.path.join(destination_path, "spec")
+assembler_path  = os.path.join(application_path, "packages", "assembler")
 
 
 # Run pyinstaller
@@ -37,6 +38,7 @@ PyInstaller.__main__.run([
     f"--distpath={dist_path}",
     f"--workpath={work_path}",
     f"--specpath={spec_path}",
+    f"--paths={assembler_path}",
     f"--add-data={externals_folder};.",
 ])
 
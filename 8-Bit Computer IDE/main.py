@@ -1,9 +1,11 @@
+import time
+startup_start = time.perf_counter()
+
 import os, sys
+import json
+import multiprocessing
 import tkinter as tk
 
-from gui_tools import settings
-from gui_tools import guielements
-
 
 # Assign paths depending on the app info
 if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
@@ -12,16 +14,57 @@ if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
 else:
     application_path = os.path.dirname(os.path.realpath(__file__))
     externals_path   = os.path.join(application_path, "externals")
-    
-    
-# Tkinter initializations
-settings.init(externals_path, default=False)
-root = tk.Tk()
-root.title(settings.get("title"))
-root.iconbitmap(os.path.join(externals_path, settings.get("icon_file")))
-root.geometry("{0}x{1}".format(settings.get("width"), settings.get("height")))
-root.minsize(settings.get("min_width"), settings.get("min_height"))
-
-guielements.init(root, externals_path)
-
-root.mainloop()
\ No newline at end of file
+
+    # Assembler isn't an installed package, make "assembler_tools" importable(build adds it with "--paths")
+    sys.path.append(os.path.join(application_path, "packages", "assembler"))
+
+from gui_tools import settings
+from gui_tools import guielements
+imports_time = time.perf_counter() - startup_start
+
+
+def on_first_frame(report_file:str=None) -> None:
+    """Measures the time to the first frame, then starts the deferred services.
+    - If "report_file" is given(see "startup_benchmark.py"), the times are written to it as json and the app exits.
+    """
+    startup_time = time.perf_counter() - startup_start
+    if report_file != None:
+        with open(report_file, 'w') as f:
+            json.dump({"startup": startup_time, "imports": imports_time}, f)
+        root.destroy()
+        return
+    guielements.start_services(startup_time)
+
+
+# Tkinter initializations(guarded, as the worker processes import this module on some platforms)
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+
+    # "--import-time FILE" -> write the import time to the file and exit before creating the window(no display needed)
+    if "--import-time" in sys.argv:
+        with open(sys.argv[sys.argv.index("--import-time") + 1], 'w') as f:
+            json.dump({"imports": imports_time}, f)
+        sys.exit()
+
+    # "--startup-time FILE" -> write the startup times to the file and exit after the first frame
+    report_file = None
+    if "--startup-time" in sys.argv:
+        report_file = sys.argv[sys.argv.index("--startup-time") + 1]
+
+    settings.init(externals_path, default=False)
+    root = tk.Tk()
+    root.title(settings.get("title"))
+    root.iconbitmap(os.path.join(externals_path, settings.get("icon_file")))
+    root.geometry("{0}x{1}".format(settings.get("width"), settings.get("height")))
+    root.minsize(settings.get("min_width"), settings.get("min_height"))
+
+    guielements.init(root, externals_path)
+
+    # First frame is drawn by the idle tasks after the window is mapped
+    def _on_map(event):
+        if event.widget == root:
+            root.unbind("<Map>")
+            root.after_idle(on_first_frame, report_file)
+    root.bind("<Map>", _on_map)
+
+    root.mainloop()
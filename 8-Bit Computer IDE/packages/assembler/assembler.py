@@ -1,6 +1,7 @@
 import os
 import math
-
+import zlib
+from typing import Callable, Iterable, List, Tuple, Union
 
 from assembler_tools.assemblererror import *
 from assembler_tools import mytokenizer
@@ -8,15 +9,29 @@ from assembler_tools import myparser
 from assembler_tools.myparser import OPERATION_TYPE
 from assembler_tools import mycodegenerator
 from assembler_tools import hexops
+from assembler_tools import sourcemap as smap
+from assembler_tools import objectfile
+from assembler_tools import preprocessor
+from assembler_tools import optimizer
+from assembler_tools import superoptimizer
+from assembler_tools import linker
+from assembler_tools.sparseimage import SparseImage
 
 
-def assemble(*, file: str, destination: str):
+def assemble(*, file: str, destination: str, progress: Callable=None, sourcemap: str=None, optimize: bool=False, rewrites: str=None) -> int:
     """Assembles an asm file into a hex file.
     - Pass the paths as absolute for more information on syntax error.
     - Can raise normal file related errors(customized description)
     - ".hex" file is automatically removed on error.
-    - Automatically adds the halt instruction at the end.
+    - Automatically adds the halt instruction at the end.(after the last address in use)
     - Max. number of instructions is 65535(2^16 - 1 due to the addition of halt at the end)
+    - ".org address" places the following instructions from the address(decimal, 0-65535), only the populated
+      address ranges are written to the hex file.(see "assembler_tools.hexops.write_image()")
+    - Macros, repeats and includes are expanded on the fly(see "assembler_tools.preprocessor"), errors point at the original lines.
+    - If "optimize" is True, redundant instructions are removed before placing them(see "assembler_tools.optimizer"),
+      each ".org" block is optimized on its own.
+    - If "rewrites" is given, the proven rewrites in the database are applied too(see "assembler_tools.superoptimizer"),
+      replacing instructions are mapped to the first line of the sequence they replace.
     
     Raises:
         SyntaxError: Syntax error is raised with custom description on assembly error so that
@@ -26,90 +41,301 @@ def assemble(*, file: str, destination: str):
     Args:
         file (str): Destination for the asm file.(file extension needs to be given[.asm])
         destination (str): Destination for the hex file.(file extension needs to be given[.hex])
+        progress (Callable, optional): Called every 1024 lines(after the expansion) and at the end with (lines processed, records written).
+                                       Exceptions raised by it stop the assembly(used for cancelling). Defaults to None.
+        sourcemap (str, optional): Destination for the source map of the addresses(see "assembler_tools.sourcemap"),
+                                   not written if "None". Defaults to None.
+        optimize (bool, optional): If True, runs the peephole optimizer on the instructions. Defaults to False.
+        rewrites (str, optional): Rewrite database of the superoptimizer, not used if "None". Defaults to None.
+        
+    Returns:
+        int: Instructions saved by the optimizers, 0 if not optimized.
     """
+    map_writer = smap.SourceMapWriter() if sourcemap != None else None
+    source = file
     try:
+        known_rewrites = superoptimizer.load_rewrites(rewrites) if rewrites != None else None
         with open(file, 'r') as rf:
-            with open(destination, 'w') as wf:                
-                # Set the extended linear address to 0 before parsing
-                hexops.write_record(wf, "04", data=[0x00, 0x00])
+            # Pars each line, instructions are placed into the image at the end of each ".org" block
+            image = SparseImage()
+            block = []  # [(opcode-literal pair, source file, mnemonic token)...]
+            block_address = 0
+            saved = 0
+            i_line = -1
+            for i_line, (tokens, source) in enumerate(preprocessor.preprocess(rf, file)):
+                if progress != None and i_line % 1024 == 0:
+                    progress(i_line, (image.size() + len(block)) // 8)
                 
-                # Pars each line
-                instructions = []
-                current_address = 0
-                is_linear_address_one = False
-                for i_line, line in enumerate(rf):
-                    
-                    # Tokenize the line, skip to next line if empty
-                    tokens = mytokenizer.tokenize(line, i_line+1)
-                    if tokens == []: continue
-                    
-                    # Parse the tokens
-                    operation = myparser.pars(tokens)
-                    operation_type, operation_args = operation
-                    
-                    
-                    # Handle the operation
-                    if operation_type == OPERATION_TYPE.MNEMONIC:
-                        instructions.append(mycodegenerator.generate_instruction(operation_args))
-                    else:
-                        raise AssembleError("Invalid operation!", operation_args[0][1], operation_args[0][2], operation_args[0][3], operation_args[0][4])
-                    
-                    
-                    # If the instructions reach 16-bytes(2*8-bytes:opcode/literal), create a record
-                    # If address goes past 2-bytes, increment the extended linear address
-                    if len(instructions) == 8:
-                        data = []
-                        for instruction in instructions:
-                            data.append(instruction[0])
-                            data.append(instruction[1])
-                        hexops.write_record(wf, "00", current_address, data)
-                        instructions = []
-                        current_address += 16
-                        if current_address == 0x10000:
-                            if is_linear_address_one == True:
-                                raise AssembleError("Instruction limit reached!(64kB)", operation_args[0][1], operation_args[0][2], operation_args[0][3], operation_args[0][4])
-                            else:
-                                is_linear_address_one = True
-                                current_address = 0
-                                hexops.write_record(wf, "04", data=[0x00, 0x01])
+                # Labels, symbols and the directives other than ".org" are only resolved by the linker
+                for token in tokens:
+                    if token[0] in (mytokenizer.TOKEN_TYPE.LABEL, mytokenizer.TOKEN_TYPE.SYMBOL) or (token[0] == mytokenizer.TOKEN_TYPE.DIRECTIVE and token[1] != ".org"):
+                        raise AssembleError("Needs linking!(see \"build()\")", token[1], token[2], token[3], token[4])
+                
+                # Parse the tokens
+                operation = myparser.pars(tokens)
+                operation_type, operation_args = operation
                 
-                # Add halt automatically at the end, along with leftover instructions
-                data = []
-                if len(instructions) > 0:
-                    for instruction in instructions:
-                        data.append(instruction[0])
-                        data.append(instruction[1])
-                halt_instruction = mycodegenerator.halt_instruction
-                data.append(halt_instruction[0])
-                data.append(halt_instruction[1])
-                hexops.write_record(wf, "00", current_address, data)                    
-                    
-                # Write EOF before finishing
-                hexops.write_record(wf, "01")
+                
+                # Handle the operation
+                if operation_type == OPERATION_TYPE.MNEMONIC:
+                    if block_address + len(block) >= 0xFFFF:
+                        raise AssembleError("Instruction limit reached!(64kB)", operation_args[0][1], operation_args[0][2], operation_args[0][3], operation_args[0][4])
+                    block.append((mycodegenerator.generate_instruction(operation_args), source, operation_args[0]))
+                elif operation_type == OPERATION_TYPE.DIRECTIVE:
+                    saved = _place_block(image, map_writer, block_address, block, optimize, known_rewrites, saved)
+                    block_address = mycodegenerator.generate_address(operation_args)
+                    block = []
+                else:
+                    raise AssembleError("Invalid operation!", operation_args[0][1], operation_args[0][2], operation_args[0][3], operation_args[0][4])
+            
+            saved = _place_block(image, map_writer, block_address, block, optimize, known_rewrites, saved)
+            
+            # Add halt automatically after the last address in use(always fits, as the instructions stop at 0xFFFE)
+            image.write(image.end(), bytes(mycodegenerator.halt_instruction))
+            
+            # Write only the populated segments
+            with open(destination, 'w') as wf:
+                records = hexops.write_image(wf, image)
+            if map_writer != None:
+                map_writer.write(sourcemap)
+            if progress != None:
+                progress(i_line+1, records)
+            return saved
                 
     except Exception as err:
-        # If a hex file in the destination exists, remove it
+        # If a hex file(or a source map) in the destination exists, remove it
         if os.path.isfile(destination) == True:
             os.remove(destination)
+        if sourcemap != None and os.path.isfile(sourcemap) == True:
+            os.remove(sourcemap)
         
         # Handle the expected exceptions, if not expected, raise it again
         if isinstance(err, FileNotFoundError):   
-            raise FileNotFoundError(f"No such file or directory:\n-> \"{file}\"") from None
+            raise FileNotFoundError(f"No such file or directory:\n-> \"{err.filename if err.filename != None else file}\"") from None
+        elif isinstance(err, OSError): 
+            raise OSError(f"Invalid path:\n-> \"{err.filename}\"") from None
+        elif isinstance(err, AssembleError):
+            raise SyntaxError(f"Error in file \"{err.file if err.file != None else source}\", line: {err.row}, column: {err.column}\n"+
+                              f"{err.description}: \"{err.value}\" -> {err.line}\n"+
+                              " "*(len(err.description) + 7 + len(err.value) + err.column) + "^") from None
+        else:
+            raise err
+       
+       
+       
+def _place_block(image: SparseImage, map_writer: smap.SourceMapWriter, address: int, block: list, is_optimized: bool, rewrites: dict, saved: int) -> int:
+    """Writes the instructions of an ".org" block to the image(and the source map), optimizes them first if needed.
+    
+    Raises:
+        AssembleError: Raised with the instruction that overlaps the other blocks.
+    
+    Returns:
+        int: "saved" plus the instructions saved by the optimizers in the block.
+    """
+    if is_optimized == True:
+        kept, instructions = optimizer.optimize([instruction for instruction, _, _ in block])
+        saved += instructions
+        block = [block[i] for i in kept]
+    if rewrites != None:
+        replaced, instructions = superoptimizer.apply([instruction for instruction, _, _ in block], rewrites)
+        saved += instructions
+        block = [(instruction, block[i][1], block[i][2]) for instruction, i in replaced]
+    
+    for instruction, source, token in block:
+        try:
+            image.write(address, bytes(instruction))
+        except ValueError:
+            err = AssembleError("Overlapping address!(see \".org\")", token[1], token[2], token[3], token[4])
+            err.file = source
+            raise err from None
+        if map_writer != None:
+            map_writer.add(address, source, token[2])
+        address += 1
+    return saved
+       
+       
+def assemble_source(source: Union[str, Iterable[str]], *, max_errors=100, is_cancelled: Callable=None) -> Union[Tuple[List[Tuple[int, int]], List[AssembleError]], None]:
+    """Assembles asm source in memory without touching the disk.(used by the IDE for the live assembly)
+    - Unlike "assemble()", lines with errors are skipped and the errors are collected, so all of them can be shown at once.
+    - Automatically adds the halt instruction at the end.
+    - Max. number of instructions is 65535(same as "assemble()")
+    - Labels, directives and symbols are accepted(see "build()"), symbol literals are left as 0 as they aren't linked.
+    - Macros and repeats are expanded(see "assembler_tools.preprocessor"), includes are relative to the working directory.
+      Preprocessor errors(ex: missing ".endm") stop the assembly as the rest of the lines can't be expanded.
+
+    Args:
+        source (Union[str, Iterable[str]]): Asm source as a string or as lines.
+        max_errors (int, optional): Assembly stops after this many errors. Defaults to 100.
+        is_cancelled (Callable, optional): Checked every 1024 lines, assembly stops and returns "None" if it returns "True". Defaults to None.
+
+    Returns:
+        Union[Tuple[List[Tuple[int, int]], List[AssembleError]], None]: (opcode-literal pairs, errors) or "None" if cancelled.
+    """
+    if isinstance(source, str):
+        source = source.splitlines()
+    
+    builder = objectfile.ObjectBuilder("")
+    errors = []
+    lines = iter(preprocessor.preprocess(source))
+    i_line = 0
+    while len(errors) < max_errors:
+        if is_cancelled != None and i_line % 1024 == 0 and is_cancelled() == True:
+            return None
+        i_line += 1
+        
+        # Expand the next line, stop on preprocessor errors
+        try:
+            tokens, file = next(lines)
+        except StopIteration:
+            break
+        except AssembleError as err:
+            errors.append(err)
+            break
+        
+        # Assemble the line, collect the error and continue on failure
+        try:
+            builder.add_tokens(tokens, file)
+        except AssembleError as err:
+            errors.append(err)
+    
+    # Undefined symbols are reported in the order of the lines
+    _, symbol_errors = builder.finish()
+    errors = sorted(errors + symbol_errors, key=lambda err: (err.row, err.column))[:max_errors]
+    
+    instructions = builder.instructions()
+    instructions.append(mycodegenerator.halt_instruction)
+    return (instructions, errors)
+       
+       
+def build(*, files: List[str], destination: str, object_dir: str=None, sourcemap: str=None) -> Tuple[int, int]:
+    """Assembles the asm files into relocatable objects and links them into a hex file.
+    - Each file is assembled into "<object_dir>/<file name>.<path crc>.obj", objects are reused while their source and included files
+      don't change(size and modification time), so only the changed files are assembled again.
+    - Labels and symbols can be used across the files(see "assembler_tools.objectfile.ObjectBuilder" for the syntax),
+      sections with the same name are placed together in the order of the files.
+    - Can raise normal file related errors(customized description)
+    - ".hex" file(and the source map) is automatically removed on error.
+    - Automatically adds the halt instruction at the end.
+    
+    Raises:
+        SyntaxError: Syntax error is raised with custom description on assembly or link error so that
+                     no custom exception needs to be included.
+
+    Args:
+        files (List[str]): Asm files, in the order of placement.
+        destination (str): Destination for the hex file.(file extension needs to be given[.hex])
+        object_dir (str, optional): Directory for the object files. Defaults to the "obj" directory next to the destination.
+        sourcemap (str, optional): Destination for the source map of the addresses, not written if "None". Defaults to None.
+
+    Returns:
+        Tuple[int, int]: (number of files assembled, number of objects reused)
+    """
+    object_dir = _object_dir(destination, object_dir)
+    file = None
+    try:
+        os.makedirs(object_dir, exist_ok=True)
+        
+        # Assemble the changed files, reuse the objects of the others
+        objects = []
+        assembled = 0
+        for file in files:
+            stat = os.stat(file)
+            stat = (stat.st_mtime_ns, stat.st_size)
+            object_file = _object_file(file, object_dir)
+            try:
+                obj = objectfile.ObjectFile.read(object_file)
+                if obj.source != os.path.abspath(file) or obj.source_stat != stat or _includes_changed(obj) == True:
+                    obj = None
+            except (OSError, ValueError):
+                obj = None
+            if obj == None:
+                with open(file, 'r') as rf:
+                    obj = objectfile.assemble_object(rf, os.path.abspath(file), stat)
+                obj.write(object_file)
+                assembled += 1
+            objects.append(obj)
+        
+        file = None
+        linker.link(objects, destination, sourcemap)
+        return (assembled, len(files) - assembled)
+        
+    except Exception as err:
+        # If a hex file(or a source map) in the destination exists, remove it
+        if os.path.isfile(destination) == True:
+            os.remove(destination)
+        if sourcemap != None and os.path.isfile(sourcemap) == True:
+            os.remove(sourcemap)
+        
+        # Handle the expected exceptions, if not expected, raise it again
+        if isinstance(err, FileNotFoundError):   
+            raise FileNotFoundError(f"No such file or directory:\n-> \"{err.filename}\"") from None
         elif isinstance(err, OSError): 
             raise OSError(f"Invalid path:\n-> \"{err.filename}\"") from None
         elif isinstance(err, AssembleError):
-            raise SyntaxError(f"Error in file \"{file}\", line: {err.row}, column: {err.column}\n"+
+            raise SyntaxError(f"Error in file \"{err.file if err.file != None else file}\", line: {err.row}, column: {err.column}\n"+
                               f"{err.description}: \"{err.value}\" -> {err.line}\n"+
                               " "*(len(err.description) + 7 + len(err.value) + err.column) + "^") from None
+        elif isinstance(err, LinkError):
+            raise SyntaxError(f"Link error in file \"{err.file}\"\n"+
+                              f"{err.description}" + (f": \"{err.symbol}\"" if err.symbol != "" else "")) from None
         else:
             raise err
        
        
-def disassemble(*, file: str, destination: str, show_address=False, padding=35):
+def dependencies(*, files: List[str], destination: str, object_dir: str=None) -> List[str]:
+    """Returns the files a "build()" depends on -> the asm files and the files they include.(used to watch the sources)
+    - Included files are taken from the objects of the last build, files without an object are returned on their own.
+
+    Args:
+        files (List[str]): Asm files, same as "build()".
+        destination (str): Destination for the hex file, same as "build()".
+        object_dir (str, optional): Directory for the object files, same as "build()". Defaults to None.
+
+    Returns:
+        List[str]: Absolute paths of the files.
+    """
+    object_dir = _object_dir(destination, object_dir)
+    paths = []
+    for file in files:
+        paths.append(os.path.abspath(file))
+        try:
+            obj = objectfile.ObjectFile.read(_object_file(file, object_dir))
+        except (OSError, ValueError):
+            continue
+        paths += [path for path, _ in obj.includes if path not in paths]
+    return paths
+       
+       
+def _object_dir(destination: str, object_dir: str) -> str:
+    """Returns the object directory of a build, the "obj" directory next to the destination if not given."""
+    if object_dir == None:
+        return os.path.join(os.path.dirname(os.path.abspath(destination)), "obj")
+    return object_dir
+       
+       
+def _object_file(file: str, object_dir: str) -> str:
+    """Returns the object file path of an asm file.(see "build()")"""
+    return os.path.join(object_dir, "{}.{:08x}.obj".format(os.path.basename(file), zlib.crc32(os.path.abspath(file).encode())))
+       
+       
+def _includes_changed(obj: objectfile.ObjectFile) -> bool:
+    """Returns "True" if any of the object's included files changed(or is gone) since it was assembled."""
+    for path, stat in obj.includes:
+        try:
+            current = os.stat(path)
+        except OSError:
+            return True
+        if (current.st_mtime_ns, current.st_size) != stat:
+            return True
+    return False
+       
+       
+def disassemble(*, file: str, destination: str, show_address=False, padding=35, progress: Callable=None):
     """Disassembles a hex file into an asm file.
     - Can raise normal file related errors(customized description)
     - If record is flawed, may raise random errors
     - ".asm" file is automatically removed on error.
+    - Gaps in the addresses(sparse hex files) are written as ".org" directives, so the output assembles back to the same addresses.
     
     Raises:
         SyntaxError: Syntax error is raised with custom description on disassembly error so that
@@ -121,6 +347,8 @@ def disassemble(*, file: str, destination: str, show_address=False, padding=35):
         show_address (bool, optional): If True, will add address information for each instruction as comments(after the padding). Defaults to False.
         padding (int, optional): How many characters of padding to apply before the address comments(if True). All comments will line up to the
                                  padding; if the asm line spans longer than the padding, it will be clipped. Defaults to 35.
+        progress (Callable, optional): Called every 1024 records and at the end with (records processed, lines written).
+                                       Exceptions raised by it stop the disassembly(used for cancelling). Defaults to None.
     """
     try:
         with open(file, 'r') as rf:
@@ -129,7 +357,11 @@ def disassemble(*, file: str, destination: str, show_address=False, padding=35):
                 # Check each record
                 is_EOF_found = False
                 is_extended_address_one = False
+                lines = 0
+                next_address = 0
                 for i_line, line in enumerate(rf):
+                    if progress != None and i_line % 1024 == 0:
+                        progress(i_line, lines)
                     
                     # Unpack the record
                     unpacked_record = hexops.unpack_record(line)
@@ -158,6 +390,13 @@ def disassemble(*, file: str, destination: str, show_address=False, padding=35):
                     # After here, every record should be data
                     if record_type != 0:
                         raise DisassembleError("Invalid record!", i_line+1, line.replace("\n", ""))
+                    
+                    # Gaps between the records are kept with ".org"(sparse hex files)
+                    record_address = ((is_extended_address_one << 16) + address) // 2
+                    if record_address != next_address:
+                        wf.write(f".org {record_address}\n")
+                        lines += 1
+                    next_address = record_address + len(data)
                         
                     # Disassemble data
                     for i_d, d in enumerate(data):
@@ -174,10 +413,13 @@ def disassemble(*, file: str, destination: str, show_address=False, padding=35):
                                 wf.write( "{0:<{1}}{2}\n".format(asm, padding, comment) )
                             else:
                                 wf.write(f"{asm}\n")
+                            lines += 1
                     
                 # Raise exception if no EOF found
                 if is_EOF_found == False:
                     raise DisassembleError("EOF(end of file) missing!",i_line+1, line.replace("\n", ""))  
+                if progress != None:
+                    progress(i_line+1, lines)
                 
     except Exception as err:
         # If a hex file in the destination exists, remove it
@@ -308,10 +550,53 @@ def view(*, file: str, address_start, address_end=0, format='a'):
                               f"{err.description} -> Address: {err.address}") from None
         else:
             raise err
+
+
+
+def load_image(file: str) -> Tuple[bytearray, bytearray]:
+    """Loads a hex file into a memory image of all the 65536 addresses.(used by the IDE's memory viewer)
+    - Image holds the opcode-literal pairs -> image[2*address] = opcode, image[2*address + 1] = literal
+    - Mask holds 1 for the addresses written by a record, 0 otherwise.
+    - Records are read with "assembler_tools.hexops.read_image()", so a full 128kB image loads in a few ms.
+      (use it directly to keep only the populated segments)
+    - Can raise normal file related errors(customized description)
+
+    Raises:
+        SyntaxError: Syntax error is raised with custom description on an invalid record so that
+                     no custom exception needs to be included.
+
+    Args:
+        file (str): Destination for the hex file.(file extension needs to be given[.hex])
+
+    Returns:
+        Tuple[bytearray, bytearray]: (image, mask) -> 131072 and 65536 bytes long
+    """
+    image = bytearray(0x20000)
+    mask  = bytearray(0x10000)
+    try:
+        with open(file, 'r') as rf:
+            sparse_image = hexops.read_image(rf)
+        for start, data in sparse_image.segments():
+            image[2*start : 2*start + len(data)] = data
+            mask[start : start + len(data)//2] = b"\x01" * (len(data)//2)
+        return (image, mask)
+    
+    except Exception as err:
+        # Handle the expected exceptions, if not expected, raise it again
+        if isinstance(err, FileNotFoundError):   
+            raise FileNotFoundError(f"No such file or directory:\n-> \"{file}\"") from None
+        elif isinstance(err, OSError): 
+            raise OSError(f"Invalid path:\n-> \"{err.filename}\"") from None
+        elif isinstance(err, DisassembleError):
+            raise SyntaxError(f"Error in file \"{file}\", line: {err.row}\n"+
+                              f"{err.description} -> {err.record}") from None
+        else:
+            raise err
             
             
             
-assemble(file="packages//assembler//test.txt", destination="packages//assembler//test.hex")
+if __name__ == "__main__":
+    assemble(file="packages//assembler//test.txt", destination="packages//assembler//test.hex")
 
 # disassemble(file="packages//assembler//test.hex", destination="packages//assembler//disassembly.asm", show_address=True)
 
@@ -7,6 +7,7 @@ class AssembleError(Exception):
      >Column -> Line column of where the error occured\n
      >Line -> The whole line of where the error occured\n
      >*args -> Other arguments for the "Exception" superclass.\n
+    - "file" attribute is set to the source file of the line when it's known(ex: included files), "None" otherwise.
      
     Args:
         Exception(str, str, int, int, str): (description, value, row, column, line, *args)
@@ -18,6 +19,7 @@ class AssembleError(Exception):
         self.row         = row
         self.column      = column
         self.line        = line
+        self.file        = None
         
 
 class DisassembleError(Exception):
@@ -49,4 +51,20 @@ class ViewError(Exception):
     def __init__(self, description:str, address:int, *args):
         super().__init__(*args)
         self.description = description
-        self.address = address
\ No newline at end of file
+        self.address = address
+
+class LinkError(Exception):
+    """Subclass of "Exception". Custom exception for the linker errors.
+    - Arguments explanation:\n
+     >Description -> Description of the error\n
+     >Symbol -> Symbol of where the error occured("" if not related to a symbol)\n
+     >File -> Source file of the object where the error occured\n
+     
+    Args:
+        Exception(str, str, str): (description, symbol, file, *args)
+    """
+    def __init__(self, description:str, symbol:str, file:str, *args):
+        super().__init__(*args)
+        self.description = description
+        self.symbol = symbol
+        self.file   = file
@@ -1,5 +1,8 @@
 from tabnanny import check
 from typing import List
+
+from .assemblererror import DisassembleError
+from .sparseimage import ADDRESS_COUNT, SparseImage
    
 
 def write_record(file, record_type: str, start_address=0, data=[]):
@@ -28,6 +31,89 @@ def write_record(file, record_type: str, start_address=0, data=[]):
         _write(file, 0, start_address, data)
         
         
+def write_image(file, image: SparseImage) -> int:
+    """Writes a sparse image as hex records, only the populated segments are written.
+    - Starts with the extended linear address 0(same as the assembler's output), switches it only when a record
+      is in the other 64kB half.
+    - Up to 8 instructions per data record, records don't cross the 64kB boundary.
+    - Image written from the address 0 without gaps gives the same records as the dense layout(8 instructions per
+      record from the address 0).
+    
+    - Shouldn't raise exceptions but writing can always fail.
+
+    Args:
+        file (file_object): File to write to.
+        image (SparseImage): Image to write.
+        
+    Returns:
+        int: Number of records written.
+    """
+    write_record(file, "04", data=[0x00, 0x00])
+    records = 1
+    upper_address = 0
+    for start, data in image.segments():
+        offset = 0
+        while offset < len(data):
+            address = 2*start + offset
+            if address >> 16 != upper_address:
+                upper_address = address >> 16
+                write_record(file, "04", data=[0x00, upper_address])
+                records += 1
+            length = min(16, len(data) - offset, 0x10000 - (address & 0xFFFF))
+            write_record(file, "00", address & 0xFFFF, data[offset : offset+length])
+            records += 1
+            offset += length
+    write_record(file, "01")
+    return records + 1
+
+
+def read_image(file) -> SparseImage:
+    """Reads the hex records into a sparse image, only the populated addresses are stored.
+    - Records are decoded as whole byte strings instead of field by field.
+    
+    Raises:
+        DisassembleError: Raised for the invalid records, the records out of the memory and the overlapping records.
+
+    Args:
+        file (file_object): File to read from.
+        
+    Returns:
+        SparseImage: Image of the records.
+    """
+    image = SparseImage()
+    upper_address = 0
+    for i_line, line in enumerate(file):
+        line = line.strip()
+        if line == "":
+            continue
+        
+        # Decode and validate the record(checksum makes the sum of all bytes 0)
+        try:
+            record = bytes.fromhex(line[1:])
+        except ValueError:
+            record = b""
+        if line[0] != ':' or len(record) < 5 or len(record) != record[0] + 5 or sum(record) & 0xFF != 0:
+            raise DisassembleError("Invalid record!", i_line+1, line)
+        byte_count, address, record_type = record[0], (record[1] << 8) | record[2], record[3]
+        
+        # Handle the record types(data, EOF, extended linear address)
+        if record_type == 0 and byte_count % 2 == 0 and address % 2 == 0:
+            start = ((upper_address << 16) + address) // 2
+            if start + byte_count//2 > ADDRESS_COUNT:
+                raise DisassembleError("Record out of range!", i_line+1, line)
+            try:
+                image.write(start, record[4 : 4+byte_count])
+            except ValueError:
+                raise DisassembleError("Overlapping records!", i_line+1, line) from None
+        elif record_type == 1:
+            break
+        elif record_type == 4 and byte_count == 2:
+            upper_address = (record[4] << 8) | record[5]
+        else:
+            raise DisassembleError("Invalid record!", i_line+1, line)
+    return image
+        
+        
 def unpack_record(record):
     """Unpacks a line of record into its fields.
     - Validates checksum
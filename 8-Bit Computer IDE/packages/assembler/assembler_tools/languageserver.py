@@ -0,0 +1,510 @@
+import os
+import re
+import sys
+import json
+from functools import lru_cache
+from typing import BinaryIO, Dict, List, Tuple, Union
+from urllib.parse import unquote, urlparse
+
+from .assemblererror import AssembleError
+from .mytokenizer import TOKEN_TYPE, tokenize
+from .objectfile import ObjectBuilder
+from . import mycodegenerator
+
+
+# Language server(LSP) for the asm files, over stdin/stdout with only the standard library
+# - Diagnostics, hover(instruction table, see "mycodegenerator.instructions") and completion of the mnemonics and operands.
+# - Documents are synced incrementally, only the changed lines are analyzed again. Each line is analyzed on its own with an
+#   "ObjectBuilder"(same checks as the assembler), results are cached by the line text, so repeated lines are analyzed once.
+# - Checks across the lines(duplicate and undefined symbols, macro calls) are done on the cached results for each change.
+# - Lines of the macro bodies aren't checked as their parameters are only known when expanded(see "preprocessor").
+#
+# Usage(from "packages/assembler", the editor starts it as the server command):
+#   python -m assembler_tools.languageserver
+
+# Max. number of diagnostics published for a document
+MAX_DIAGNOSTICS = 1000
+
+# Directive descriptions for the hover and the completion
+DIRECTIVES = {
+    ".org"    : "Following instructions are placed at the address.(0-65535)",
+    ".section": "Following instructions go to the section.(default: \"text\")",
+    ".global" : "Makes the labels visible to the other files.",
+    ".extern" : "Declares the symbols defined in the other files.",
+    ".macro"  : "Defines a macro up to \".endm\", \"\\param\" in the body is replaced by the argument.",
+    ".endm"   : "Ends the macro definition.",
+    ".rept"   : "Repeats the lines up to \".endr\" the given times.",
+    ".endr"   : "Ends the repeated lines.",
+    ".include": "Inserts the file.(path is relative to the including file)",
+}
+
+# LSP constants
+SYNC_INCREMENTAL    = 2
+SEVERITY_ERROR      = 1
+KIND_FUNCTION       = 3
+KIND_VARIABLE       = 6
+KIND_KEYWORD        = 14
+KIND_REFERENCE      = 18
+METHOD_NOT_FOUND    = -32601
+INTERNAL_ERROR      = -32603
+
+# Line breaks of the LSP documents
+_line_break = re.compile(r"\r\n|\r|\n")
+
+
+class LineInfo:
+    """Class for the analysis result of a single line.(row independent, shared by the lines with the same text)
+    - error      -> "AssembleError" of the line, "None" if the line is valid
+    - labels     -> label tokens defined on the line
+    - references -> symbol tokens("<name" / ">name") used on the line
+    - globals    -> name tokens of ".global"
+    - externs    -> names of ".extern"
+    - mnemonic   -> mnemonic token(after the labels), "None" if the line isn't an instruction
+    - directive  -> directive of the line(ex: ".macro"), "None" if there is none
+    - macro      -> name of the macro defined by ".macro", include -> file name of ".include"
+    - opcode     -> opcode of the instruction, "None" if it's not a valid instruction
+    - is_plain   -> "True" if the line doesn't take part in the checks across the lines
+    """
+    def __init__(self, text:str) -> None:
+        self.error      = None  # type: Union[AssembleError, None]
+        self.labels     = []
+        self.references = []
+        self.globals    = []
+        self.externs    = []
+        self.mnemonic   = None
+        self.directive  = None
+        self.macro      = None
+        self.include    = None
+        self.opcode     = None
+
+        # Includes are handled on the text, same as the preprocessor
+        stripped = text.split(";")[0].strip()
+        if stripped.startswith(".include") == True and (len(stripped) == 8 or stripped[8].isspace() == True):
+            self.directive = ".include"
+            self.include   = stripped[8:].strip().strip("\"'")
+            if self.include == "":
+                self.error = AssembleError("Missing arguments!", ".include", 0, text.find(".include")+1, text)
+            self.is_plain = False
+            return
+
+        tokens = tokenize(text, 0)
+        i = 0
+        while i < len(tokens) and tokens[i][0] == TOKEN_TYPE.LABEL:
+            i += 1
+        self.labels     = tokens[:i]
+        self.references = [token for token in tokens if token[0] == TOKEN_TYPE.SYMBOL]
+        if i < len(tokens) and tokens[i][0] == TOKEN_TYPE.ID:
+            self.mnemonic = tokens[i]
+        if i < len(tokens) and tokens[i][0] == TOKEN_TYPE.DIRECTIVE:
+            self.directive = tokens[i][1]
+
+        if self.directive in (".macro", ".endm", ".rept", ".endr"):
+            # Preprocessor directives, only the simple checks("preprocessor" checks the rest while expanding)
+            if self.directive == ".macro":
+                if i+1 < len(tokens) and tokens[i+1][0] == TOKEN_TYPE.ID:
+                    self.macro = tokens[i+1][1]
+                else:
+                    self.error = AssembleError("Expected macro name!", tokens[i][1], 0, tokens[i][3], tokens[i][4])
+            elif self.directive == ".rept" and (len(tokens) != i+2 or tokens[i+1][0] != TOKEN_TYPE.LITERAL):
+                token = tokens[i+1] if i+1 < len(tokens) else tokens[i]
+                self.error = AssembleError("Expected repeat count!", token[1], 0, token[3], token[4])
+        elif tokens != []:
+            builder = ObjectBuilder("")
+            try:
+                builder.add_tokens(tokens)
+                if self.mnemonic != None:
+                    self.opcode = builder.instructions()[0][0]
+            except AssembleError as err:
+                self.error = err
+            if self.directive == ".global" and self.error == None:
+                self.globals = tokens[i+1::2]
+            elif self.directive == ".extern" and self.error == None:
+                self.externs = [token[1] for token in tokens[i+1::2]]
+
+        self.is_plain = (self.error == None and self.labels == [] and self.references == [] and self.directive == None)
+
+
+@lru_cache(maxsize=0x10000)
+def analyze(text:str) -> LineInfo:
+    """Returns the analysis of a line.(cached by the text, see "LineInfo")"""
+    return LineInfo(text)
+
+
+class Document:
+    """Class for the open asm documents.
+    - Keeps the lines and their analysis, "change()" only analyzes the changed lines again.
+
+        Methods:
+        - change()
+        - diagnostics()
+        - symbols()
+        - macros()
+
+    Args:
+        uri (str): Document uri.
+        text (str): Document text.
+    """
+    def __init__(self, uri:str, text:str) -> None:
+        self.uri   = uri
+        self.path  = _uri_to_path(uri)
+        self.lines = _line_break.split(text)
+        self.infos = [analyze(line) for line in self.lines]
+        self._includes = {}  # {path: (modification time, labels, macros)}
+
+    def change(self, change:dict) -> None:
+        """Applies a content change of "textDocument/didChange".(whole text if it has no range)"""
+        if "range" not in change:
+            self.lines = _line_break.split(change["text"])
+            self.infos = [analyze(line) for line in self.lines]
+            return
+
+        start, end = change["range"]["start"], change["range"]["end"]
+        first = self.lines[start["line"]] if start["line"] < len(self.lines) else ""
+        last  = self.lines[end["line"]] if end["line"] < len(self.lines) else ""
+        text  = first[:_utf16_to_index(first, start["character"])] + change["text"] + last[_utf16_to_index(last, end["character"]):]
+
+        new_lines = _line_break.split(text)
+        self.lines[start["line"]:end["line"]+1] = new_lines
+        self.infos[start["line"]:end["line"]+1] = [analyze(line) for line in new_lines]
+
+    def diagnostics(self) -> List[dict]:
+        """Returns the LSP diagnostics of the document.(line errors first, then the symbol errors)"""
+        diagnostics = []
+        defined     = {}   # {name: row}
+        references  = []   # [(row, token)...]
+        globals     = []
+        externs     = set()
+        macros      = set()
+        macro_depth = 0
+        for row, info in enumerate(self.infos):
+            if info.is_plain == True and macro_depth == 0:
+                continue
+
+            if info.directive == ".include" and info.include != "":
+                included = self._included(info.include)
+                if included == None:
+                    line = self.lines[row]
+                    diagnostics.append(_diagnostic(line, row, line.find(info.include)+1, info.include, "Can't open the file!"))
+                else:
+                    defined.update({name: None for name in included[0] if name not in defined})
+                    macros.update(included[1])
+            for token in info.labels:
+                name = token[1][:-1]
+                if name in defined:
+                    diagnostics.append(_diagnostic(self.lines[row], row, token[3], token[1], "Duplicate symbol!"))
+                else:
+                    defined[name] = row
+            references += [(row, token) for token in info.references]
+            globals    += [(row, token) for token in info.globals]
+            externs.update(info.externs)
+
+            # Macro bodies aren't checked(the macro name is known from the start)
+            if info.directive == ".macro":
+                macros.add(info.macro)
+                macro_depth += 1
+                continue
+            if info.directive == ".endm" and macro_depth > 0:
+                macro_depth -= 1
+                continue
+            if macro_depth > 0 or info.error == None:
+                continue
+            if info.mnemonic != None and info.mnemonic[1] in macros and info.error.description == "Unknown mnemonic!":
+                continue
+            diagnostics.append(_diagnostic(self.lines[row], row, info.error.column, info.error.value, info.error.description))
+            if len(diagnostics) >= MAX_DIAGNOSTICS:
+                return diagnostics
+
+        for row, token in references:
+            if token[1][1:] not in defined and token[1][1:] not in externs:
+                diagnostics.append(_diagnostic(self.lines[row], row, token[3], token[1], "Undefined symbol!"))
+        for row, token in globals:
+            if token[1] not in defined:
+                diagnostics.append(_diagnostic(self.lines[row], row, token[3], token[1], "Undefined global!"))
+        return diagnostics[:MAX_DIAGNOSTICS]
+
+    def symbols(self) -> Dict[str, int]:
+        """Returns the labels of the document -> {name: row}"""
+        return {token[1][:-1]: row for row, info in enumerate(self.infos) if info.labels != [] for token in info.labels}
+
+    def macros(self) -> List[str]:
+        """Returns the macro names of the document."""
+        return [info.macro for info in self.infos if info.macro != None]
+
+    def _included(self, name:str) -> Union[Tuple[List[str], List[str]], None]:
+        """Returns the (labels, macros) of an included file, read again only if it changed.("None" if it can't be read)"""
+        path = os.path.join(os.path.dirname(self.path), name)
+        try:
+            modified = os.stat(path).st_mtime_ns
+            if path not in self._includes or self._includes[path][0] != modified:
+                with open(path, 'r') as rf:
+                    infos = [analyze(line.rstrip("\r\n")) for line in rf]
+                labels = [token[1][:-1] for info in infos for token in info.labels]
+                macros = [info.macro for info in infos if info.macro != None]
+                self._includes[path] = (modified, labels, macros)
+        except OSError:
+            return None
+        return self._includes[path][1:]
+
+
+class LanguageServer:
+    """Class for the language server, handles the JSON-RPC messages of the client.
+
+        Methods:
+        - run()
+
+    Args:
+        input (BinaryIO): Stream of the client messages.(stdin)
+        output (BinaryIO): Stream of the server messages.(stdout)
+    """
+    def __init__(self, input:BinaryIO, output:BinaryIO) -> None:
+        self._input       = input
+        self._output      = output
+        self._documents   = {}  # type: Dict[str, Document]
+        self._is_shutdown = False
+        self._handlers    = {
+            "initialize"             : self._initialize,
+            "initialized"            : lambda params: None,
+            "shutdown"               : self._shutdown,
+            "textDocument/didOpen"   : self._did_open,
+            "textDocument/didChange" : self._did_change,
+            "textDocument/didClose"  : self._did_close,
+            "textDocument/hover"     : self._hover,
+            "textDocument/completion": self._completion,
+        }
+
+    def run(self) -> int:
+        """Handles the messages until "exit", returns the exit code.(0 if "shutdown" was requested first)"""
+        while True:
+            message = self._read()
+            if message == None or message.get("method") == "exit":
+                return 0 if self._is_shutdown == True else 1
+
+            method, id = message.get("method"), message.get("id")
+            if method == None:
+                continue  # Responses to the server requests aren't used
+            handler = self._handlers.get(method)
+            if handler == None:
+                if id != None:
+                    self._send({"jsonrpc": "2.0", "id": id, "error": {"code": METHOD_NOT_FOUND, "message": f"Unknown method: {method}"}})
+                continue
+            try:
+                result = handler(message.get("params"))
+            except Exception as err:
+                if id == None:
+                    print(f"Failed to handle \"{method}\"! ({err!r})", file=sys.stderr)
+                    continue
+                self._send({"jsonrpc": "2.0", "id": id, "error": {"code": INTERNAL_ERROR, "message": repr(err)}})
+                continue
+            if id != None:
+                self._send({"jsonrpc": "2.0", "id": id, "result": result})
+
+    def _read(self) -> Union[dict, None]:
+        """Reads a message, "None" at the end of the input."""
+        length = None
+        while True:
+            header = self._input.readline()
+            if header == b"":
+                return None
+            header = header.strip()
+            if header == b"":
+                break
+            name, _, value = header.partition(b":")
+            if name.strip().lower() == b"content-length":
+                length = int(value)
+        if length == None:
+            return None
+        return json.loads(self._input.read(length).decode("utf-8"))
+
+    def _send(self, message:dict) -> None:
+        """Writes a message."""
+        body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+        self._output.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+        self._output.flush()
+
+    def _publish(self, document:Document) -> None:
+        """Sends the diagnostics of the document."""
+        self._send({"jsonrpc": "2.0", "method": "textDocument/publishDiagnostics",
+                    "params": {"uri": document.uri, "diagnostics": document.diagnostics()}})
+
+    def _initialize(self, params:dict) -> dict:
+        return {
+            "capabilities": {
+                "textDocumentSync"  : {"openClose": True, "change": SYNC_INCREMENTAL},
+                "hoverProvider"     : True,
+                "completionProvider": {"triggerCharacters": [".", ",", " ", "<", ">"]},
+            },
+            "serverInfo": {"name": "8-bit-asm"},
+        }
+
+    def _shutdown(self, params:dict) -> None:
+        self._is_shutdown = True
+        return None
+
+    def _did_open(self, params:dict) -> None:
+        document = Document(params["textDocument"]["uri"], params["textDocument"]["text"])
+        self._documents[document.uri] = document
+        self._publish(document)
+
+    def _did_change(self, params:dict) -> None:
+        document = self._documents[params["textDocument"]["uri"]]
+        for change in params["contentChanges"]:
+            document.change(change)
+        self._publish(document)
+
+    def _did_close(self, params:dict) -> None:
+        uri = params["textDocument"]["uri"]
+        self._documents.pop(uri, None)
+        self._send({"jsonrpc": "2.0", "method": "textDocument/publishDiagnostics", "params": {"uri": uri, "diagnostics": []}})
+
+    def _hover(self, params:dict) -> Union[dict, None]:
+        """Returns the hover of the token at the position.(instructions, directives and symbols)"""
+        document = self._documents.get(params["textDocument"]["uri"])
+        row      = params["position"]["line"]
+        if document == None or row >= len(document.lines):
+            return None
+        line   = document.lines[row]
+        column = _utf16_to_index(line, params["position"]["character"]) + 1
+        token  = next((token for token in tokenize(line, row+1) if token[3] <= column <= token[3] + len(token[1])), None)
+        if token == None:
+            return None
+
+        info = document.infos[row]
+        if token[0] == TOKEN_TYPE.ID and info.mnemonic != None and token[3] == info.mnemonic[3]:
+            matches = [instruction for instruction in mycodegenerator.instructions if instruction.mnemonic == token[1]]
+            if info.opcode != None:
+                matches = [instruction for instruction in matches if instruction.opcode == info.opcode][:1]
+            if matches == []:
+                return None
+            text = "\n\n---\n\n".join(_instruction_markdown(instruction) for instruction in matches)
+        elif token[0] == TOKEN_TYPE.DIRECTIVE and token[1] in DIRECTIVES:
+            text = f"`{token[1]}`\n\n{DIRECTIVES[token[1]]}"
+        elif token[0] in (TOKEN_TYPE.SYMBOL, TOKEN_TYPE.LABEL) or (token[0] == TOKEN_TYPE.ID and info.directive in (".global", ".extern")):
+            name    = token[1].strip("<>:")
+            symbols = document.symbols()
+            part    = {"<": "Low byte of ", ">": "High byte of "}.get(token[1][0], "")
+            if name not in symbols:
+                return None
+            text = f"{part}`{name}` (label, line {symbols[name]+1})"
+        else:
+            return None
+        return {"contents": {"kind": "markdown", "value": text}, "range": _range(line, row, token[3], token[1])}
+
+    def _completion(self, params:dict) -> List[dict]:
+        """Returns the completions at the position.(mnemonics, macros and directives first, operands after a mnemonic)"""
+        document = self._documents.get(params["textDocument"]["uri"])
+        row      = params["position"]["line"]
+        if document == None or row >= len(document.lines):
+            return []
+        prefix = document.lines[row][:_utf16_to_index(document.lines[row], params["position"]["character"])]
+        if ";" in prefix:
+            return []
+        tokens = tokenize(prefix, row+1)
+        while tokens != [] and tokens[0][0] == TOKEN_TYPE.LABEL:
+            tokens = tokens[1:]
+
+        # First word of the line
+        if tokens == [] or (len(tokens) == 1 and prefix[-1:].isspace() == False):
+            items  = [{"label": directive, "kind": KIND_KEYWORD, "detail": description} for directive, description in DIRECTIVES.items()]
+            if tokens != [] and tokens[0][0] == TOKEN_TYPE.DIRECTIVE:
+                return items
+            seen = []
+            for instruction in mycodegenerator.instructions:
+                if instruction.mnemonic not in seen:
+                    seen.append(instruction.mnemonic)
+                    items.append({"label": instruction.mnemonic, "kind": KIND_KEYWORD, "detail": instruction.description})
+            items += [{"label": name, "kind": KIND_FUNCTION, "detail": "macro"} for name in document.macros()]
+            return items
+
+        # Operands -> symbols for the directives, matching operands for the instructions
+        if tokens[0][0] == TOKEN_TYPE.DIRECTIVE:
+            if tokens[0][1] in (".global", ".extern"):
+                return [{"label": name, "kind": KIND_REFERENCE} for name in document.symbols()]
+            return []
+        if tokens[0][0] != TOKEN_TYPE.ID:
+            return []
+        args   = [token for token in tokens[1:] if token[0] != TOKEN_TYPE.SEPERATOR]
+        i_operand = sum(1 for token in tokens if token[0] == TOKEN_TYPE.SEPERATOR)
+        items  = []
+        labels = []
+        for instruction in mycodegenerator.instructions:
+            if instruction.mnemonic != tokens[0][1] or len(instruction.operands) <= i_operand:
+                continue
+            # Operands left after the given ones(in any order if interchangeable)
+            operands = list(instruction.operands)
+            for i_arg, arg in enumerate(args[:i_operand]):
+                operand = "*" if arg[0] in (TOKEN_TYPE.LITERAL, TOKEN_TYPE.SYMBOL) else arg[1]
+                if instruction.interchangeable == True and operand in operands:
+                    operands.remove(operand)
+                elif instruction.interchangeable == False and instruction.operands[i_arg] == operand:
+                    pass
+                else:
+                    operands = []
+                    break
+            if instruction.interchangeable == False and operands != []:
+                operands = [instruction.operands[i_operand]]
+
+            for operand in operands:
+                if operand == "*":
+                    labels = [byte + name for name in document.symbols() for byte in ("<", ">")]
+                elif all(item["label"] != operand for item in items):
+                    detail = instruction.description if i_operand == len(instruction.operands)-1 else "operand"
+                    items.append({"label": operand, "kind": KIND_VARIABLE, "detail": detail})
+        return items + [{"label": label, "kind": KIND_REFERENCE, "detail": "symbol literal"} for label in labels]
+
+
+def _instruction_markdown(instruction:mycodegenerator.Instruction) -> str:
+    """Returns the hover text of an instruction."""
+    operands = ", ".join(instruction.operands)
+    return (f"`{instruction.mnemonic}{' ' + operands if operands != '' else ''}`\n\n{instruction.description}\n\n" +
+            "opcode: `0x{:02X}` pip1: `0x{:02X}` pip2: `0x{:02X}`".format(instruction.opcode, instruction.pip1, instruction.pip2))
+
+
+def _diagnostic(line:str, row:int, column:int, value:str, description:str) -> dict:
+    """Returns an LSP diagnostic for the value at the column.(1 based)"""
+    return {"range": _range(line, row, column, value), "severity": SEVERITY_ERROR, "source": "asm", "message": f"{description} \"{value}\""}
+
+
+def _range(line:str, row:int, column:int, value:str) -> dict:
+    """Returns the LSP range of the value at the column.(1 based)"""
+    start = _index_to_utf16(line, column-1)
+    end   = _index_to_utf16(line, min(column-1 + len(value), len(line)))
+    return {"start": {"line": row, "character": start}, "end": {"line": row, "character": max(start, end)}}
+
+
+def _utf16_to_index(line:str, character:int) -> int:
+    """Returns the string index of an LSP character offset.(UTF-16 code units)"""
+    if line.isascii() == True:
+        return min(character, len(line))
+    count = 0
+    for i, char in enumerate(line):
+        if count >= character:
+            return i
+        count += 2 if ord(char) > 0xFFFF else 1
+    return len(line)
+
+
+def _index_to_utf16(line:str, index:int) -> int:
+    """Returns the LSP character offset of a string index.(UTF-16 code units)"""
+    if line.isascii() == True:
+        return index
+    return sum(2 if ord(char) > 0xFFFF else 1 for char in line[:index])
+
+
+def _uri_to_path(uri:str) -> str:
+    """Returns the file path of a "file://" uri, "" for the other uris.(includes are relative to the working directory then)"""
+    parsed = urlparse(uri)
+    if parsed.scheme != "file":
+        return ""
+    path = unquote(parsed.path)
+    if os.name == "nt" and re.match(r"^/[a-zA-Z]:", path) != None:
+        path = path[1:]
+    return path
+
+
+def main() -> int:
+    """Command line entry, serves over stdin/stdout."""
+    return LanguageServer(sys.stdin.buffer, sys.stdout.buffer).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+from typing import Dict, List, Tuple
+
+from .assemblererror import LinkError
+from .objectfile import ABSOLUTE_PREFIX, ObjectFile
+from .sourcemap import SourceMapWriter
+from .sparseimage import SparseImage
+from . import mycodegenerator
+from . import hexops
+
+
+# Max. number of instructions in a program(halt included)
+MAX_INSTRUCTIONS = 0x10000
+
+
+def layout(objects:List[ObjectFile]) -> Tuple[Dict[Tuple[int, int], int], int]:
+    """Places the sections of the objects.
+    - Sections with the same name are placed together from the address 0, in the order of their first appearance.
+    - Within a section name, objects are placed in the given order.
+    - Absolute sections(".org") are placed at their own address, they aren't counted in the instruction count.
+
+    Args:
+        objects (List[ObjectFile]): Objects to place.
+
+    Returns:
+        (Tuple[Dict[Tuple[int, int], int], int]): (base addresses -> {(object index, section index): address},
+                                                   instruction count of the relocatable sections)
+    """
+    bases = {}
+    names = []
+    for i_obj, obj in enumerate(objects):
+        for i_section, section in enumerate(obj.sections):
+            if section[0].startswith(ABSOLUTE_PREFIX) == True:
+                bases[(i_obj, i_section)] = int(section[0][len(ABSOLUTE_PREFIX):])
+            elif section[0] not in names:
+                names.append(section[0])
+
+    address = 0
+    for name in names:
+        for i_obj, obj in enumerate(objects):
+            for i_section, section in enumerate(obj.sections):
+                if section[0] == name:
+                    bases[(i_obj, i_section)] = address
+                    address += len(section[1])//2
+    return (bases, address)
+
+
+def link(objects:List[ObjectFile], destination:str, sourcemap:str=None) -> Tuple[int, int]:
+    """Links the objects into a hex file.
+    - Global symbols need to be unique, the other symbols are only visible in their own object.
+    - Halt instruction is added automatically after the last address in use.(same as "assembler.assemble()")
+    - Only the populated address ranges are written(see "hexops.write_image()"), overlapping sections raise "LinkError".
+
+    Raises:
+        LinkError: Subclass of "Exception" with custom attributes -> (description, symbol, file)
+
+    Args:
+        objects (List[ObjectFile]): Objects to link.
+        destination (str): Destination for the hex file.
+        sourcemap (str, optional): Destination for the source map(see "sourcemap"), not written if "None". Defaults to None.
+
+    Returns:
+        (Tuple[int, int]): (instruction count(halt included), number of relocations)
+    """
+    bases, count = layout(objects)
+    if count + 1 > MAX_INSTRUCTIONS:
+        raise LinkError("Instruction limit reached!(64kB)", "", objects[-1].source)
+
+    # Symbol addresses, globals are shared between the objects
+    global_symbols = {}  # type: Dict[str, Tuple[int, str]]
+    local_symbols  = []  # type: List[Dict[str, int]]
+    for i_obj, obj in enumerate(objects):
+        symbols = {}
+        for name, (i_section, offset, is_global) in obj.symbols.items():
+            symbols[name] = bases[(i_obj, i_section)] + offset
+            if is_global == True:
+                if name in global_symbols:
+                    raise LinkError(f"Duplicate symbol!(also defined in \"{global_symbols[name][1]}\")", name, obj.source)
+                global_symbols[name] = (symbols[name], obj.source)
+        local_symbols.append(symbols)
+
+    # Fill the relocated literals and place the code
+    image = SparseImage()
+    for i_obj, obj in enumerate(objects):
+        codes = [bytearray(section[1]) for section in obj.sections]
+        for i_section, offset, symbol, kind in obj.relocations:
+            if symbol in local_symbols[i_obj]:
+                address = local_symbols[i_obj][symbol]
+            elif symbol in global_symbols:
+                address = global_symbols[symbol][0]
+            else:
+                raise LinkError("Undefined symbol!", symbol, obj.source)
+            codes[i_section][2*offset + 1] = (address >> 8) & 0xFF if kind == "hi" else address & 0xFF
+
+        for i_section, code in enumerate(codes):
+            base = bases[(i_obj, i_section)]
+            if base + len(code)//2 + 1 > MAX_INSTRUCTIONS:
+                raise LinkError("Instruction limit reached!(64kB)", obj.sections[i_section][0], obj.source)
+            try:
+                image.write(base, code)
+            except ValueError:
+                raise LinkError("Overlapping sections!", obj.sections[i_section][0], obj.source) from None
+
+    image.write(image.end(), bytes(mycodegenerator.halt_instruction))
+    with open(destination, 'w') as wf:
+        hexops.write_image(wf, image)
+
+    if sourcemap != None:
+        writer = SourceMapWriter()
+        order  = sorted(bases.items(), key=lambda item: item[1])
+        for (i_obj, i_section), base in order:
+            _, _, lines, files = objects[i_obj].sections[i_section]
+            for offset, line in enumerate(lines):
+                writer.add(base + offset, objects[i_obj].files[files[offset]], line)
+        writer.write(sourcemap)
+
+    return (image.size(), sum(len(obj.relocations) for obj in objects))
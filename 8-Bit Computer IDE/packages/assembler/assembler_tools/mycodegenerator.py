@@ -6,7 +6,7 @@ from .mytokenizer import TOKEN_TYPE
 
 
 # Check page: https://docs.python.org/3/library/copy.html
-# for information about the "copy.deepcopy()" usage
+# for information about the "copy.copy()" usage
 
 
 class Instruction:
@@ -19,8 +19,12 @@ class Instruction:
      >operands        -> list of operands for the mnemonic(case sensitive)(empty list if no operands)('*' denotes literal)\n
      >interchangeable -> "True" if the order of the operands don't matter, "False" otherwise \n
      >description     -> Description of the instruction\n
+     >effect          -> Register changes of the instruction as "destination=expression" seperated by ';'(used by the optimizer)\n
+                         Expression is an operand('*' for the literal) or "operand+operand", "" for no change,
+                         "None" if the instruction can't be moved or removed(ex: halt)\n
     """
-    def __init__(self, *, opcode: int, pip1: int, pip2: int, mnemonic: str, operands: Union[List[str], None], interchangeable: bool, description: str):
+    def __init__(self, *, opcode: int, pip1: int, pip2: int, mnemonic: str, operands: Union[List[str], None], interchangeable: bool, description: str,
+                 effect: Union[str, None]=None):
         self.opcode          = opcode
         self.pip1            = pip1
         self.pip2            = pip2
@@ -28,6 +32,7 @@ class Instruction:
         self.operands        = operands
         self.interchangeable = interchangeable
         self.description     = description
+        self.effect          = effect
 
 
 # Instruction list containing all defined instructions
@@ -49,22 +54,49 @@ class Instruction:
 # 
 # - If you make a mistake and more than 1 instruction matches the asm file input, the first match in the list will
 #   be returned, so the script won't break.
+# 
+# - "effect" is used by the optimizer(see "optimizer"). Leave it as "None" if unsure,
+#   such instructions are never removed or moved over.
 instructions = (
-    ( Instruction(opcode=0x00, pip1=0x00, pip2=0x00, mnemonic="nop" , operands=[]             , interchangeable=False, description="No operation.")                       ),
-    ( Instruction(opcode=0x01, pip1=0x00, pip2=0x00, mnemonic="halt", operands=[]             , interchangeable=False, description="Halts the computer.")                 ),
-    ( Instruction(opcode=0x02, pip1=0x00, pip2=0x00, mnemonic="mov" , operands=["*", "a"]     , interchangeable=False, description="Move literal to A-register.")         ),
-    ( Instruction(opcode=0x03, pip1=0x00, pip2=0x00, mnemonic="mov" , operands=["*", "b"]     , interchangeable=False, description="Move literal to B-register.")         ),
-    ( Instruction(opcode=0x04, pip1=0x00, pip2=0x00, mnemonic="mov" , operands=["a", "b"]     , interchangeable=False, description="Move A-register to B-register.")      ),
-    ( Instruction(opcode=0x05, pip1=0x00, pip2=0x00, mnemonic="mov" , operands=["b", "a"]     , interchangeable=False, description="Move B-register to A-register.")      ),
-    ( Instruction(opcode=0x06, pip1=0x00, pip2=0x00, mnemonic="mov" , operands=["result", "a"], interchangeable=False, description="Move result-register to A-register.") ),
-    ( Instruction(opcode=0x07, pip1=0x00, pip2=0x00, mnemonic="mov" , operands=["result", "b"], interchangeable=False, description="Move result-register to B-register.") ),
-    ( Instruction(opcode=0x08, pip1=0x00, pip2=0x00, mnemonic="add" , operands=["a", "b"]     , interchangeable=True , description="Add A-register and B-register.")      ),
+    ( Instruction(opcode=0x00, pip1=0x00, pip2=0x00, mnemonic="nop" , operands=[]             , interchangeable=False, description="No operation."                      , effect=""          ) ),
+    ( Instruction(opcode=0x01, pip1=0x00, pip2=0x00, mnemonic="halt", operands=[]             , interchangeable=False, description="Halts the computer."                , effect=None        ) ),
+    ( Instruction(opcode=0x02, pip1=0x00, pip2=0x00, mnemonic="mov" , operands=["*", "a"]     , interchangeable=False, description="Move literal to A-register."        , effect="a=*"       ) ),
+    ( Instruction(opcode=0x03, pip1=0x00, pip2=0x00, mnemonic="mov" , operands=["*", "b"]     , interchangeable=False, description="Move literal to B-register."        , effect="b=*"       ) ),
+    ( Instruction(opcode=0x04, pip1=0x00, pip2=0x00, mnemonic="mov" , operands=["a", "b"]     , interchangeable=False, description="Move A-register to B-register."     , effect="b=a"       ) ),
+    ( Instruction(opcode=0x05, pip1=0x00, pip2=0x00, mnemonic="mov" , operands=["b", "a"]     , interchangeable=False, description="Move B-register to A-register."     , effect="a=b"       ) ),
+    ( Instruction(opcode=0x06, pip1=0x00, pip2=0x00, mnemonic="mov" , operands=["result", "a"], interchangeable=False, description="Move result-register to A-register.", effect="a=result"  ) ),
+    ( Instruction(opcode=0x07, pip1=0x00, pip2=0x00, mnemonic="mov" , operands=["result", "b"], interchangeable=False, description="Move result-register to B-register.", effect="b=result"  ) ),
+    ( Instruction(opcode=0x08, pip1=0x00, pip2=0x00, mnemonic="add" , operands=["a", "b"]     , interchangeable=True , description="Add A-register and B-register."     , effect="result=a+b") ),
 )
 
 # Opcode-literal for the halt instruction
 halt_instruction = (0x01, 0)
 
 
+def generate_address(operation_args) -> int:
+    """Returns the instruction address of an ".org" directive for the given parser arguments.
+
+    Args:
+        operation_args (List[tokens]): Parser output arguments.(directive token, address literal)
+
+    Raises:
+        AssembleError: Subclass of "Exception" with custom attributes -> (description, value, row, column, line)
+
+    Returns:
+        int: Address.(0-65535)
+    """
+    directive, args = operation_args[0], operation_args[1:]
+    if len(args) == 0:
+        raise AssembleError("Missing arguments!", directive[1], directive[2], directive[3], directive[4])
+    if len(args) > 1:
+        raise AssembleError("Too many arguments!", directive[1], directive[2], directive[3], directive[4])
+    if args[0][0] != TOKEN_TYPE.LITERAL:
+        raise AssembleError("Invalid argument!", args[0][1], args[0][2], args[0][3], args[0][4])
+    if int(args[0][1]) > 0xFFFF:
+        raise AssembleError("Address can't be more than 65535!", args[0][1], args[0][2], args[0][3], args[0][4])
+    return int(args[0][1])
+
+
 def generate_instruction(operation_args):
     """Generates the matching instruction-literal pair for the given parser arguments.
 
@@ -94,7 +126,10 @@ def generate_instruction(operation_args):
     
     # Group all instructions who's mnemonics match
     # Raise error if there are no matches
-    possible_instructions = [copy.deepcopy(i) for i in instructions if i.mnemonic == mnemonic_value]
+    # (matching removes the operands of the interchangeable instructions, so each copy gets its own operand list)
+    possible_instructions = [copy.copy(i) for i in instructions if i.mnemonic == mnemonic_value]
+    for instruction in possible_instructions:
+        instruction.operands = list(instruction.operands)
     if len(possible_instructions) == 0:
         raise AssembleError("Unknown mnemonic!", mnemonic_value, mnemonic_row, mnemonic_column, mnemonic_line)
     
@@ -122,11 +157,12 @@ def generate_instruction(operation_args):
     # Raise error if there are more than one (with the last literal argument)
     literal_count = 0
     literal = 0
+    # (symbol literals are left as 0, they are filled by the linker)
     for arg in other_args:
-        if arg[0] == TOKEN_TYPE.LITERAL:
+        if arg[0] == TOKEN_TYPE.LITERAL or arg[0] == TOKEN_TYPE.SYMBOL:
             literal_count += 1
             _, literal_value, literal_row, literal_column, literal_line = arg
-            literal = int(literal_value)
+            literal = int(literal_value) if arg[0] == TOKEN_TYPE.LITERAL else 0
     if literal_count > 1:
         raise AssembleError("Too many literals!", literal_value, literal_row, literal_column, literal_line)
     elif literal > 255:
@@ -157,14 +193,14 @@ def generate_instruction(operation_args):
                 operand = instruction.operands[i_arg]
                 if arg_type == TOKEN_TYPE.ID and arg_value == operand:
                     pass
-                elif arg_type == TOKEN_TYPE.LITERAL and "*" == operand:
+                elif (arg_type == TOKEN_TYPE.LITERAL or arg_type == TOKEN_TYPE.SYMBOL) and "*" == operand:
                     pass
                 else:
                     possible_instructions[i_inst] = None
             else:
                 if arg_type == TOKEN_TYPE.ID and arg_value in instruction.operands:
                     instruction.operands.remove(arg_value)
-                elif arg_type == TOKEN_TYPE.LITERAL and "*" in instruction.operands:
+                elif (arg_type == TOKEN_TYPE.LITERAL or arg_type == TOKEN_TYPE.SYMBOL) and "*" in instruction.operands:
                     instruction.operands.remove("*")
                 else:
                     possible_instructions[i_inst] = None
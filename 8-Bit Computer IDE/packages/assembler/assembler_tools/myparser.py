@@ -11,7 +11,9 @@ from .mytokenizer import TOKEN_TYPE
 # 
 # - New operation grammers also need to be handled below
 class OPERATION_TYPE:
-    MNEMONIC = 0
+    MNEMONIC  = 0
+    LABEL     = 1
+    DIRECTIVE = 2
 
 
 def pars(tokens: List):
@@ -56,16 +58,26 @@ def pars(tokens: List):
             if type == TOKEN_TYPE.ID:
                 operation_type = OPERATION_TYPE.MNEMONIC
                 operation_args.append(token)
+            elif type == TOKEN_TYPE.LABEL:
+                operation_type = OPERATION_TYPE.LABEL
+                operation_args.append(token)
+            elif type == TOKEN_TYPE.DIRECTIVE:
+                operation_type = OPERATION_TYPE.DIRECTIVE
+                operation_args.append(token)
             else:
                 raise AssembleError("Invalid operation!", value, row, column, line)
             continue
 
         # -----------------------------AFTER OPERATION(AFTER FIRST TOKEN)-----------------------------
 
-        # If the opearation is a mnemonic
-        if operation_type == OPERATION_TYPE.MNEMONIC:
+        # Labels stand alone(instructions after them are parsed seperately, see "objectfile")
+        if operation_type == OPERATION_TYPE.LABEL:
+            raise AssembleError("Expected end of line!", value, row, column, line)
+
+        # If the opearation is a mnemonic or a directive(same argument grammar)
+        if operation_type == OPERATION_TYPE.MNEMONIC or operation_type == OPERATION_TYPE.DIRECTIVE:
             
-            if type == TOKEN_TYPE.ID or type == TOKEN_TYPE.LITERAL:
+            if type == TOKEN_TYPE.ID or type == TOKEN_TYPE.LITERAL or type == TOKEN_TYPE.SYMBOL:
                 if next_type == None or next_type == TOKEN_TYPE.SEPERATOR:
                     operation_args.append(token)
                 else:
@@ -74,7 +86,7 @@ def pars(tokens: List):
             elif type == TOKEN_TYPE.SEPERATOR:
                 if next_type == None:
                     raise AssembleError("Expected argument!", value, row, column, line)
-                elif next_type == TOKEN_TYPE.ID or next_type == TOKEN_TYPE.LITERAL:
+                elif next_type == TOKEN_TYPE.ID or next_type == TOKEN_TYPE.LITERAL or next_type == TOKEN_TYPE.SYMBOL:
                     pass
                 else:
                     raise AssembleError("Invalid argument!", next_value, next_row, next_column, next_line)
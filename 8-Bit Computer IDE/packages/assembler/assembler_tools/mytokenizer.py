@@ -14,6 +14,9 @@ import re
 #     so, if a new type's pattern will conflict with another, put the priority one above
 class TOKEN_TYPE:
     # Token types
+    LABEL     = "LABEL"
+    DIRECTIVE = "DIRECTIVE"
+    SYMBOL    = "SYMBOL"
     ID        = "ID"
     LITERAL   = "LITERAL"
     SEPERATOR = "SEPERATOR"
@@ -21,7 +24,13 @@ class TOKEN_TYPE:
     INVALID   = "INVALID"
     
     # "type"-"pattern" list for each type
+    # - LABEL     -> "name:", defines a symbol at the address of the next instruction
+    # - DIRECTIVE -> ".name", assembler directive(ex: ".global")
+    # - SYMBOL    -> "<name"(low byte) or ">name"(high byte) of a symbol's address, used as a literal
     SPECIFICATIONS = (
+        (LABEL    , r"[a-zA-Z_]+:"),
+        (DIRECTIVE, r"\.[a-zA-Z_]+"),
+        (SYMBOL   , r"[<>][a-zA-Z_]+"),
         (ID       , r"[a-zA-Z_]+"),
         (LITERAL  , r"\d+"    ),
         (SEPERATOR, r','      ),
@@ -0,0 +1,344 @@
+import os
+import sys
+import json
+import struct
+from array import array
+from typing import Dict, List, Set, Tuple, Union
+
+from .assemblererror import AssembleError
+from .mytokenizer import TOKEN_TYPE, tokenize
+from .myparser import OPERATION_TYPE, pars
+from .preprocessor import preprocess
+from . import mycodegenerator
+
+
+# File layout(little endian):
+# - Header   -> magic(6 bytes), json length(uint32), json(utf-8)
+# - Json     -> {"source", "source_stat", "includes": [[path, stat]...], "files": [path...], "sections": [[name, count]...],
+#                "symbols": {name: [section, offset, is_global]}, "externs": [name...], "relocations": [[section, offset, symbol, kind]...]}
+# - Sections -> for each section: opcode-literal pairs(2 bytes per instruction), line numbers(uint32 per instruction),
+#               file indexes(uint16 per instruction, index in "files")
+MAGIC  = b"ASOBJ\x02"
+HEADER = struct.Struct("<6sI")
+
+# Relocation kinds -> {symbol prefix: kind}
+RELOCATIONS = {"<": "lo", ">": "hi"}
+
+# Section used until a ".section" directive
+DEFAULT_SECTION = "text"
+
+# Prefix of the absolute sections(".org"), followed by the address -> "@4096"
+ABSOLUTE_PREFIX = "@"
+
+
+class ObjectFile:
+    """Class for the relocatable objects, the output of an assembled source file before linking.
+    - Sections   -> [(name, opcode-literal pairs as bytes, line numbers, file indexes)...]
+    - Files      -> [path...], source files of the instructions(first one is the source, the others are the included files)
+    - Symbols    -> {name: (section index, offset, is_global)}, labels defined in the source
+    - Externs    -> {name...}, symbols the source uses from the other objects
+    - Relocation -> [(section index, offset, symbol, kind)...], literals to fill with the symbol's address
+                    ("lo" -> low byte, "hi" -> high byte)
+    - "source_stat" is the source's (modification time, size) when it was assembled, used for caching.
+      "includes" holds the same for the included files -> [(path, (modification time, size))...]
+
+        Methods:
+        - write()
+        - read()(static)
+        - instruction_count()
+    """
+    def __init__(self, source:str, source_stat:Tuple[int, int]=None) -> None:
+        self.source      = source
+        self.source_stat = source_stat
+        self.includes    = []  # type: List[Tuple[str, Tuple[int, int]]]
+        self.files       = [source]
+        self.sections    = []  # type: List[Tuple[str, bytearray, array, array]]
+        self.symbols     = {}  # type: Dict[str, Tuple[int, int, bool]]
+        self.externs     = set()  # type: Set[str]
+        self.relocations = []  # type: List[Tuple[int, int, str, str]]
+
+    def instruction_count(self) -> int:
+        """Returns the number of instructions in all sections."""
+        return sum(len(section[1])//2 for section in self.sections)
+
+    def write(self, destination:str) -> None:
+        """Writes the object file.
+
+        Args:
+            destination (str): Destination for the object file.
+        """
+        header = json.dumps({
+            "source"     : self.source,
+            "source_stat": self.source_stat,
+            "includes"   : self.includes,
+            "files"      : self.files,
+            "sections"   : [[name, len(code)//2] for name, code, _, _ in self.sections],
+            "symbols"    : self.symbols,
+            "externs"    : sorted(self.externs),
+            "relocations": self.relocations,
+        }).encode()
+        with open(destination, 'wb') as wf:
+            wf.write(HEADER.pack(MAGIC, len(header)))
+            wf.write(header)
+            for _, code, lines, files in self.sections:
+                wf.write(code)
+                for values in (lines, files):
+                    if sys.byteorder != "little":
+                        values = array(values.typecode, values)
+                        values.byteswap()
+                    wf.write(values.tobytes())
+
+    @staticmethod
+    def read(file:str) -> "ObjectFile":
+        """Reads an object file.
+
+        Raises:
+            ValueError: Raised if the file isn't a valid object file.
+
+        Args:
+            file (str): Path of the object file.
+
+        Returns:
+            (ObjectFile): Object.
+        """
+        with open(file, 'rb') as rf:
+            data = rf.read()
+        try:
+            magic, length = HEADER.unpack_from(data, 0)
+            if magic != MAGIC:
+                raise ValueError()
+            header = json.loads(data[HEADER.size : HEADER.size+length])
+
+            obj = ObjectFile(header["source"], tuple(header["source_stat"]) if header["source_stat"] != None else None)
+            obj.includes = [(path, tuple(stat)) for path, stat in header["includes"]]
+            obj.files    = list(header["files"])
+            offset = HEADER.size + length
+            for name, count in header["sections"]:
+                code  = bytearray(data[offset : offset + 2*count])
+                lines = array('I', data[offset + 2*count : offset + 6*count])
+                files = array('H', data[offset + 6*count : offset + 8*count])
+                if len(code) != 2*count or len(lines) != count or len(files) != count:
+                    raise ValueError()
+                if sys.byteorder != "little":
+                    lines.byteswap()
+                    files.byteswap()
+                obj.sections.append((name, code, lines, files))
+                offset += 8*count
+            obj.symbols     = {name: tuple(symbol) for name, symbol in header["symbols"].items()}
+            obj.externs     = set(header["externs"])
+            obj.relocations = [tuple(relocation) for relocation in header["relocations"]]
+        except (ValueError, KeyError, TypeError, struct.error):
+            raise ValueError(f"Invalid object file! -> \"{file}\"") from None
+        return obj
+
+
+class ObjectBuilder:
+    """Class used to assemble the source lines into an "ObjectFile".
+    - Lines are added one by one with "add_line()"(or "add_tokens()" for the preprocessed lines), which raises
+      "AssembleError" for the line's error.(line can be skipped to continue with the next one)
+    - Syntax on top of the instructions:\n
+     >"name:"               -> label at the next instruction(can be followed by an instruction on the same line)\n
+     >"<name" / ">name"     -> low/high byte of the symbol's address as a literal\n
+     >".global name, ..."   -> makes the labels visible to the other objects\n
+     >".extern name, ..."   -> declares the symbols defined in the other objects\n
+     >".section name"       -> following instructions go to the section(default: "text")\n
+     >".org address"        -> following instructions go to an absolute section at the address(placed as is by the linker)\n
+
+        Methods:
+        - add_line()
+        - add_tokens()
+        - finish()
+        - instructions()
+
+    Args:
+        source (str): Source file of the lines.
+        source_stat (Tuple[int, int], optional): Source's (modification time, size), stored for caching. Defaults to None.
+    """
+    def __init__(self, source:str, source_stat:Tuple[int, int]=None) -> None:
+        self._object     = ObjectFile(source, source_stat)
+        self._section    = None
+        self._references = []  # (symbol token, file) for the errors of "finish()"
+        self._globals    = {}  # {name: (token, file)}
+        self._file_id    = 0
+
+    def add_line(self, line:str, row:int) -> None:
+        """Assembles a line.
+
+        Raises:
+            AssembleError: Subclass of "Exception" with custom attributes -> (description, value, row, column, line)
+
+        Args:
+            line (str): Source line.
+            row (int): Line number.(1 based)
+        """
+        self.add_tokens(tokenize(line, row))
+
+    def add_tokens(self, tokens:list, file:str=None) -> None:
+        """Assembles the tokens of a line.(see "add_line()")
+
+        Raises:
+            AssembleError: Subclass of "Exception" with custom attributes -> (description, value, row, column, line)
+
+        Args:
+            tokens (list): Tokens of the line.(see "mytokenizer.tokenize()")
+            file (str, optional): Source file of the line, "None" for the source itself. Defaults to None.
+        """
+        if file == None or file == self._object.source:
+            self._file_id = 0
+        else:
+            if file not in self._object.files:
+                self._object.files.append(file)
+            self._file_id = self._object.files.index(file)
+
+        # Leading labels are defined at the next instruction
+        while tokens != [] and tokens[0][0] == TOKEN_TYPE.LABEL:
+            self._define(tokens[0])
+            tokens = tokens[1:]
+        if tokens == []:
+            return
+
+        operation_type, operation_args = pars(tokens)
+        if operation_type == OPERATION_TYPE.MNEMONIC:
+            self._add_instruction(operation_args)
+        elif operation_type == OPERATION_TYPE.DIRECTIVE:
+            self._directive(operation_args)
+        else:
+            raise AssembleError("Invalid operation!", operation_args[0][1], operation_args[0][2], operation_args[0][3], operation_args[0][4])
+
+    def finish(self) -> Tuple[ObjectFile, List[AssembleError]]:
+        """Checks the symbols and returns the object.
+
+        Returns:
+            (Tuple[ObjectFile, List[AssembleError]]): (object, errors -> undefined symbols and globals)
+        """
+        errors  = []
+        symbols = self._object.symbols
+        for token, file in self._references:
+            name = token[1][1:]
+            if name not in symbols and name not in self._object.externs:
+                errors.append(AssembleError("Undefined symbol!", token[1], token[2], token[3], token[4]))
+                errors[-1].file = file
+        for name, (token, file) in self._globals.items():
+            if name not in symbols:
+                errors.append(AssembleError("Undefined global!", token[1], token[2], token[3], token[4]))
+                errors[-1].file = file
+            else:
+                symbols[name] = (symbols[name][0], symbols[name][1], True)
+        return (self._object, errors)
+
+    def instructions(self) -> List[Tuple[int, int]]:
+        """Returns the opcode-literal pairs of all sections.(symbol literals are 0 until linked)"""
+        pairs = []
+        for _, code, _, _ in self._object.sections:
+            pairs += list(zip(code[0::2], code[1::2]))
+        return pairs
+
+    def _current(self) -> Tuple[int, bytearray, array, array]:
+        """Returns the current section -> (index, code, lines, files), creates the default section if needed."""
+        if self._section == None:
+            self._select_section(DEFAULT_SECTION)
+        _, code, lines, files = self._object.sections[self._section]
+        return (self._section, code, lines, files)
+
+    def _select_section(self, name:str) -> None:
+        """Switches to the section, creates it if needed."""
+        for i, section in enumerate(self._object.sections):
+            if section[0] == name:
+                self._section = i
+                return
+        self._object.sections.append((name, bytearray(), array('I'), array('H')))
+        self._section = len(self._object.sections) - 1
+
+    def _define(self, token:tuple) -> None:
+        """Defines a label at the next instruction of the current section."""
+        name = token[1][:-1]
+        if name in self._object.symbols or name in self._object.externs:
+            raise AssembleError("Duplicate symbol!", token[1], token[2], token[3], token[4])
+        index, code, _, _ = self._current()
+        self._object.symbols[name] = (index, len(code)//2, False)
+
+    def _add_instruction(self, operation_args:list) -> None:
+        """Generates the instruction, records the relocation of its symbol literal."""
+        index, code, lines, files = self._current()
+        if self._object.instruction_count() >= 0xFFFF:
+            raise AssembleError("Instruction limit reached!(64kB)", operation_args[0][1], operation_args[0][2], operation_args[0][3], operation_args[0][4])
+
+        opcode, literal = mycodegenerator.generate_instruction(operation_args)
+        for token in operation_args[1:]:
+            if token[0] == TOKEN_TYPE.SYMBOL:
+                self._object.relocations.append((index, len(code)//2, token[1][1:], RELOCATIONS[token[1][0]]))
+                self._references.append((token, self._object.files[self._file_id]))
+        code.append(opcode)
+        code.append(literal)
+        lines.append(operation_args[0][2])
+        files.append(self._file_id)
+
+    def _directive(self, operation_args:list) -> None:
+        """Handles the directives."""
+        directive, args = operation_args[0], operation_args[1:]
+        if directive[1] == ".org":
+            name = ABSOLUTE_PREFIX + str(mycodegenerator.generate_address(operation_args))
+            if any(section[0] == name for section in self._object.sections):
+                raise AssembleError("Overlapping address!(see \".org\")", args[0][1], args[0][2], args[0][3], args[0][4])
+            self._select_section(name)
+            return
+        if directive[1] not in (".global", ".extern", ".section"):
+            raise AssembleError("Unknown directive!", directive[1], directive[2], directive[3], directive[4])
+        if args == []:
+            raise AssembleError("Missing arguments!", directive[1], directive[2], directive[3], directive[4])
+        for token in args:
+            if token[0] != TOKEN_TYPE.ID:
+                raise AssembleError("Invalid argument!", token[1], token[2], token[3], token[4])
+
+        if directive[1] == ".section":
+            if len(args) > 1:
+                raise AssembleError("Too many arguments!", directive[1], directive[2], directive[3], directive[4])
+            self._select_section(args[0][1])
+        elif directive[1] == ".global":
+            for token in args:
+                self._globals[token[1]] = (token, self._object.files[self._file_id])
+        else:
+            for token in args:
+                if token[1] in self._object.symbols:
+                    raise AssembleError("Duplicate symbol!", token[1], token[2], token[3], token[4])
+                self._object.externs.add(token[1])
+
+
+def assemble_object(lines, source:str, source_stat:Tuple[int, int]=None) -> ObjectFile:
+    """Assembles the source lines into an object, stops at the first error.
+    - Lines are preprocessed first(macros, repeats and includes, see "preprocessor").
+
+    Raises:
+        AssembleError: Subclass of "Exception" with custom attributes -> (description, value, row, column, line),
+                       "file" attribute is set to the file of the error.
+
+    Args:
+        lines (Iterable[str]): Source lines.
+        source (str): Source file of the lines.
+        source_stat (Tuple[int, int], optional): Source's (modification time, size), stored for caching. Defaults to None.
+
+    Returns:
+        (ObjectFile): Object.
+    """
+    builder = ObjectBuilder(source, source_stat)
+    lines   = preprocess(lines, source)
+    file    = source
+    try:
+        for tokens, file in lines:
+            builder.add_tokens(tokens, file)
+    except AssembleError as err:
+        if err.file == None:
+            err.file = file
+        raise err
+    obj, errors = builder.finish()
+    if errors != []:
+        if errors[0].file == None:
+            errors[0].file = source
+        raise errors[0]
+
+    # Included files are checked along with the source for caching
+    for path in lines.files[1:]:
+        if all(path != include[0] for include in obj.includes):
+            stat = os.stat(path)
+            obj.includes.append((path, (stat.st_mtime_ns, stat.st_size)))
+    return obj
@@ -0,0 +1,173 @@
+from itertools import product
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+from . import mycodegenerator
+
+
+# Peephole optimizer for the generated instructions
+# - Instruction effects come from the "effect" column of "mycodegenerator.instructions", the patterns below are derived
+#   from them on import, so the new instructions are covered without changing this module.
+# - There are no jumps in the instruction set, the program always runs straight through, so only the register state
+#   after a sequence matters. A pattern is accepted only if the rewritten sequence leaves the same symbolic register
+#   state(registers and literals as symbols, additions as sorted terms) as the original one, for any starting state.
+# - Rewrites only remove instructions, the kept instructions keep their order(and their source lines).
+
+# Registers of the computer
+REGISTERS = ("a", "b", "result")
+
+# Instructions by opcode -> {opcode: Instruction}(first match, same as the disassembler)
+OPCODES = {}
+for _instruction in reversed(mycodegenerator.instructions):
+    OPCODES[_instruction.opcode] = _instruction
+
+
+def _parse_effect(effect:Union[str, None]) -> Union[List[Tuple[str, Tuple[str, ...]]], None]:
+    """Returns the effect as [(destination, (operands to add...))...], "None" if the instruction has no known effect."""
+    if effect == None:
+        return None
+    changes = []
+    for change in effect.split(";"):
+        if change.strip() == "":
+            continue
+        destination, expression = change.split("=")
+        changes.append((destination.strip(), tuple(operand.strip() for operand in expression.split("+"))))
+    return changes
+
+# Effects by opcode -> {opcode: [(destination, (operands...))...] or "None"}
+EFFECTS = {opcode: _parse_effect(instruction.effect) for opcode, instruction in OPCODES.items()}
+
+
+def evaluate(window:Sequence[Tuple[int, object]], state:Dict[str, object], add:Callable) -> Dict[str, object]:
+    """Runs the instructions(known effects only) on the state with the given addition, returns the new state.
+    - Values can be anything the addition accepts(ex: symbols, packed integers, see "superoptimizer")
+
+    Args:
+        window (Sequence[Tuple[int, object]]): (opcode, literal value) pairs.
+        state (Dict[str, object]): Register values -> {register: value}
+        add (Callable): Called with 2 values, returns their sum.
+
+    Returns:
+        (Dict[str, object]): New register values.
+    """
+    for opcode, literal in window:
+        new_state = dict(state)
+        for destination, operands in EFFECTS[opcode]:
+            values = [literal if operand == "*" else state[operand] for operand in operands]
+            value  = values[0]
+            for other in values[1:]:
+                value = add(value, other)
+            new_state[destination] = value
+        state = new_state
+    return state
+
+
+def _symbolic_add(x, y) -> tuple:
+    """Returns the symbolic sum of the values.(sorted terms, so the order of the additions doesn't matter)"""
+    terms = (x[1] if isinstance(x, tuple) else (x,)) + (y[1] if isinstance(y, tuple) else (y,))
+    return ("+", tuple(sorted(terms)))
+
+
+def _symbolic_state(window:Sequence[Tuple[int, object]]) -> Dict[str, object]:
+    """Returns the symbolic register state after the instructions.(literals need to be strings)"""
+    return evaluate(window, {register: register + "0" for register in REGISTERS}, _symbolic_add)
+
+
+def _derive_patterns() -> Tuple[set, Dict[Tuple[int, int, Union[bool, None]], Tuple[int, ...]]]:
+    """Derives the rewrite patterns from the instruction effects.
+
+    Returns:
+        (Tuple[set, Dict[Tuple[int, int, Union[bool, None]], Tuple[int, ...]]]): (opcodes without effect,
+        {(first opcode, second opcode, same literal -> "None" unless both have literals): indexes of the kept instructions})
+    """
+    known = [opcode for opcode, effect in EFFECTS.items() if effect != None]
+    start = _symbolic_state([])
+
+    singles = {opcode for opcode in known if _symbolic_state([(opcode, "x")]) == start}
+    pairs = {}
+    for first, second in product(known, known):
+        has_literals = "*" in OPCODES[first].operands and "*" in OPCODES[second].operands
+        for is_same in ((True, False) if has_literals == True else (None,)):
+            window = [(first, "x"), (second, "x" if is_same != False else "y")]
+            target = _symbolic_state(window)
+            for kept in ((), (0,), (1,)):
+                if _symbolic_state([window[i] for i in kept]) == target:
+                    pairs[(first, second, is_same)] = kept
+                    break
+    return (singles, pairs)
+
+# Derived patterns(see "_derive_patterns()")
+SINGLE_PATTERNS, PAIR_PATTERNS = _derive_patterns()
+
+
+def optimize(instructions:Sequence[Tuple[int, int]], verify:bool=True) -> Tuple[List[int], int]:
+    """Removes the redundant instructions with the derived peephole patterns.
+    - Examples: "mov b, a" right after "mov a, b", a move overwritten by the next move into the same register, "nop"s
+    - Patterns are applied until none matches, so the chains are removed too(ex: "mov 1, a" x3 -> single "mov 1, a")
+    - Instructions without a known effect(ex: halt) are never removed or moved over.
+
+    Raises:
+        RuntimeError: Raised if "verify" is "True" and a rewrite changes the register state.(pattern table is wrong)
+
+    Args:
+        instructions (Sequence[Tuple[int, int]]): Opcode-literal pairs, in the order of execution.
+        verify (bool, optional): If True, checks the symbolic register state before and after each rewrite. Defaults to True.
+
+    Returns:
+        (Tuple[List[int], int]): (indexes of the kept instructions, instructions saved)
+    """
+    kept = []
+    for i in range(len(instructions)):
+        kept.append(i)
+        while kept != []:
+            # Single instructions without effect
+            window = [kept[-1]]
+            result = () if instructions[kept[-1]][0] in SINGLE_PATTERNS else None
+
+            # Instruction pairs
+            if result == None and len(kept) >= 2:
+                (first, first_literal), (second, second_literal) = instructions[kept[-2]], instructions[kept[-1]]
+                has_literals = first in OPCODES and second in OPCODES and "*" in OPCODES[first].operands and "*" in OPCODES[second].operands
+                window = kept[-2:]
+                result = PAIR_PATTERNS.get((first, second, (first_literal == second_literal) if has_literals == True else None))
+            if result == None:
+                break
+
+            rewritten = [window[i_kept] for i_kept in result]
+            if verify == True:
+                _verify(instructions, window, rewritten)
+            del kept[-len(window):]
+            kept += rewritten
+
+    return (kept, len(instructions) - len(kept))
+
+
+def _verify(instructions:Sequence[Tuple[int, int]], window:List[int], rewritten:List[int]) -> None:
+    """Checks that the rewrite leaves the same register state, raises "RuntimeError" otherwise."""
+    before = _symbolic_state([(instructions[i][0], f"#{instructions[i][1]}") for i in window])
+    after  = _symbolic_state([(instructions[i][0], f"#{instructions[i][1]}") for i in rewritten])
+    if before != after:
+        raise RuntimeError(f"Optimizer rewrite changed the register state! (instructions: {window} -> {rewritten})")
+
+
+def simulate(instructions:Sequence[Tuple[int, int]], state:Dict[str, int]=None) -> Dict[str, int]:
+    """Runs the instructions up to the first halt, returns the register state.(used to check the optimized programs)
+
+    Raises:
+        ValueError: Raised for the opcodes without a known effect.(other than halt)
+
+    Args:
+        instructions (Sequence[Tuple[int, int]]): Opcode-literal pairs.
+        state (Dict[str, int], optional): Starting register state. Defaults to all registers 0.
+
+    Returns:
+        (Dict[str, int]): Register state -> {register: value}
+    """
+    if state == None:
+        state = {register: 0 for register in REGISTERS}
+    for opcode, literal in instructions:
+        if opcode == mycodegenerator.halt_instruction[0]:
+            break
+        if EFFECTS.get(opcode) == None:
+            raise ValueError("Unknown instruction effect! (opcode: 0x{:02X})".format(opcode))
+        state = evaluate([(opcode, literal)], state, lambda x, y: (x + y) & 0xFF)
+    return state
@@ -0,0 +1,221 @@
+import os
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .assemblererror import AssembleError
+from .mytokenizer import TOKEN_TYPE, tokenize
+
+
+# Preprocessor directives(handled here, never reach the parser)
+# - ".macro name [param, ...]" ... ".endm" -> defines a macro, "\param" in the body is replaced by the argument
+# - ".rept count" ... ".endr"              -> repeats the body "count" times
+# - ".include path"                        -> inserts the file(path is relative to the including file, quotes are optional)
+#
+# Macro and repeat bodies are kept as tokens, so each body line is tokenized once no matter how many times it's expanded.
+# Expanded tokens keep the row/column/line of their original source line, so the errors point at the source.
+
+# Token type for the "\param" placeholders in the macro bodies
+PARAM = "PARAM"
+
+# Max. depth of the nested macro calls
+MAX_DEPTH = 64
+
+
+class Macro:
+    """Class for the macros defined by ".macro".
+    - body -> [(tokens, file)...], lines of the body with the "\\param" tokens replaced by "PARAM" tokens
+    """
+    def __init__(self, name:str, params:List[str], body:List[Tuple[list, str]]) -> None:
+        self.name   = name
+        self.params = params
+        self.body   = body
+
+
+class Preprocessor:
+    """Class used to expand the macros, repeats and includes of a source lazily.
+    - Iterating yields (tokens, file) for each non-empty line after the expansion, expanded text is never built.
+    - "files" holds the paths of the source and the included files once the iteration is done.(used for caching)
+
+        Methods:
+        - __iter__()
+
+    Raises:
+        AssembleError: Raised(during the iteration) for the preprocessor errors, "file" attribute is set to the
+                       file of the error.(so are the errors of the later stages, see "assembler")
+
+    Args:
+        lines (Iterable[str]): Source lines.
+        file (str): Source file of the lines, includes are relative to it.("" -> relative to the working directory)
+    """
+    def __init__(self, lines:Iterable[str], file:str) -> None:
+        self._lines  = lines
+        self._file   = file
+        self._macros = {}  # type: Dict[str, Macro]
+        self._stack  = []
+        self.files   = []
+
+    def __iter__(self) -> Iterator[Tuple[list, str]]:
+        return self._process(self._read(self._lines, self._file), 0)
+
+    def _read(self, lines:Iterable[str], file:str) -> Iterator[Tuple[list, str]]:
+        """Tokenizes the lines of a file, inserts the included files."""
+        path = os.path.abspath(file) if file != "" else ""
+        self._stack.append(path)
+        if file != "" and path not in self.files:
+            self.files.append(path)
+
+        for i_line, line in enumerate(lines):
+            stripped = line.split(";")[0].strip()
+            if stripped.startswith(".include") == True and (len(stripped) == 8 or stripped[8].isspace() == True):
+                name = stripped[8:].strip().strip("\"'")
+                if name == "":
+                    raise self._error("Missing arguments!", ".include", i_line+1, line, file)
+                include = os.path.join(os.path.dirname(file), name)
+                if os.path.abspath(include) in self._stack:
+                    raise self._error("Recursive include!", name, i_line+1, line, file)
+                try:
+                    rf = open(include, 'r')
+                except OSError:
+                    raise self._error("Can't open the file!", name, i_line+1, line, file) from None
+                with rf:
+                    yield from self._read(rf, include)
+                continue
+
+            tokens = tokenize(line, i_line+1)
+            if tokens != []:
+                yield (tokens, file)
+        self._stack.pop()
+
+    def _process(self, items:Iterator[Tuple[list, str]], depth:int) -> Iterator[Tuple[list, str]]:
+        """Handles the directives and expands the macro calls."""
+        for tokens, file in items:
+            first = tokens[0]
+            if first[0] == TOKEN_TYPE.DIRECTIVE and first[1] in (".macro", ".rept"):
+                body = self._collect(items, first, file)
+                if first[1] == ".macro":
+                    self._define(tokens, body, file)
+                else:
+                    count = self._rept_count(tokens, file)
+                    for _ in range(count):
+                        yield from self._process(iter(body), depth)
+                continue
+            if first[0] == TOKEN_TYPE.DIRECTIVE and first[1] in (".endm", ".endr"):
+                raise self._error("Unexpected directive!", first[1], first[2], first, file)
+
+            # Macro call(labels before it stay on their own line)
+            i = 0
+            while i < len(tokens) and tokens[i][0] == TOKEN_TYPE.LABEL:
+                i += 1
+            if i < len(tokens) and tokens[i][0] == TOKEN_TYPE.ID and tokens[i][1] in self._macros:
+                if i > 0:
+                    yield (tokens[:i], file)
+                if depth >= MAX_DEPTH:
+                    raise self._error("Macro nesting too deep!", tokens[i][1], tokens[i][2], tokens[i], file)
+                yield from self._process(self._expand(tokens[i:], file), depth+1)
+                continue
+
+            yield (tokens, file)
+
+    def _collect(self, items:Iterator[Tuple[list, str]], start:tuple, file:str) -> List[Tuple[list, str]]:
+        """Collects the body of a ".macro" or a ".rept" up to its end directive.(nested ones are kept in the body)"""
+        end   = ".endm" if start[1] == ".macro" else ".endr"
+        level = 0
+        body  = []
+        for tokens, body_file in items:
+            if tokens[0][0] == TOKEN_TYPE.DIRECTIVE:
+                if tokens[0][1] == start[1]:
+                    level += 1
+                elif tokens[0][1] == end:
+                    if level == 0:
+                        if len(tokens) > 1:
+                            raise self._error("Expected end of line!", tokens[1][1], tokens[1][2], tokens[1], body_file)
+                        return body
+                    level -= 1
+            body.append((tokens, body_file))
+        raise self._error(f"Missing \"{end}\"!", start[1], start[2], start, file)
+
+    def _define(self, tokens:list, body:List[Tuple[list, str]], file:str) -> None:
+        """Defines a macro, replaces the "\\param" tokens of the body."""
+        if len(tokens) < 2 or tokens[1][0] != TOKEN_TYPE.ID:
+            raise self._error("Expected macro name!", tokens[0][1], tokens[0][2], tokens[0], file)
+        params = self._arguments(tokens[2:], file)
+        for param in params:
+            if param[0] != TOKEN_TYPE.ID:
+                raise self._error("Invalid argument!", param[1], param[2], param, file)
+        name, params = tokens[1][1], [param[1] for param in params]
+        if name in self._macros:
+            raise self._error("Duplicate macro!", name, tokens[1][2], tokens[1], file)
+
+        # "\param" is tokenized as an invalid '\' right before an id
+        macro_body = []
+        for body_tokens, body_file in body:
+            replaced = []
+            i = 0
+            while i < len(body_tokens):
+                token = body_tokens[i]
+                if token[0] == TOKEN_TYPE.INVALID and token[1] == "\\" and i+1 < len(body_tokens):
+                    param = body_tokens[i+1]
+                    if param[0] == TOKEN_TYPE.ID and param[3] == token[3]+1:
+                        if param[1] not in params:
+                            raise self._error("Unknown parameter!", "\\" + param[1], token[2], token, body_file)
+                        replaced.append((PARAM, param[1], token[2], token[3], token[4]))
+                        i += 2
+                        continue
+                replaced.append(token)
+                i += 1
+            macro_body.append((replaced, body_file))
+        self._macros[name] = Macro(name, params, macro_body)
+
+    def _expand(self, tokens:list, file:str) -> Iterator[Tuple[list, str]]:
+        """Yields the body lines of a macro call with the arguments in place of the parameters."""
+        macro = self._macros[tokens[0][1]]
+        args  = self._arguments(tokens[1:], file)
+        if len(args) != len(macro.params):
+            raise self._error(f"Expected {len(macro.params)} argument(s)!", tokens[0][1], tokens[0][2], tokens[0], file)
+        values = {param: (arg[0], arg[1]) for param, arg in zip(macro.params, args)}
+
+        for body_tokens, body_file in macro.body:
+            yield ([(values[token[1]] + token[2:]) if token[0] == PARAM else token for token in body_tokens], body_file)
+
+    def _arguments(self, tokens:list, file:str) -> list:
+        """Returns the comma seperated argument tokens.(single token each)"""
+        args = []
+        for i, token in enumerate(tokens):
+            if i % 2 == 0 and token[0] == TOKEN_TYPE.SEPERATOR:
+                raise self._error("Invalid argument!", token[1], token[2], token, file)
+            if i % 2 == 1 and token[0] != TOKEN_TYPE.SEPERATOR:
+                raise self._error("Expected seperator!", token[1], token[2], token, file)
+            if i % 2 == 0:
+                args.append(token)
+        if tokens != [] and tokens[-1][0] == TOKEN_TYPE.SEPERATOR:
+            raise self._error("Expected argument!", tokens[-1][1], tokens[-1][2], tokens[-1], file)
+        return args
+
+    def _rept_count(self, tokens:list, file:str) -> int:
+        """Returns the count of a ".rept"."""
+        if len(tokens) != 2 or tokens[1][0] != TOKEN_TYPE.LITERAL:
+            token = tokens[1] if len(tokens) > 1 else tokens[0]
+            raise self._error("Expected repeat count!", token[1], token[2], token, file)
+        return int(tokens[1][1])
+
+    def _error(self, description:str, value:str, row:int, token_or_line, file:str) -> AssembleError:
+        """Returns an "AssembleError" for the token(or the line), with the file set."""
+        if isinstance(token_or_line, tuple):
+            column, line = token_or_line[3], token_or_line[4]
+        else:
+            column, line = 1, str(token_or_line).replace("\n", "")
+        err = AssembleError(description, value, row, column, line)
+        err.file = file
+        return err
+
+
+def preprocess(lines:Iterable[str], file:str="") -> Preprocessor:
+    """Returns a lazy "Preprocessor" of the lines.(see the class doc)
+
+    Args:
+        lines (Iterable[str]): Source lines.
+        file (str, optional): Source file of the lines, includes are relative to it. Defaults to "".
+
+    Returns:
+        (Preprocessor): Iterable of (tokens, file) for each non-empty line.
+    """
+    return Preprocessor(lines, file)
@@ -0,0 +1,206 @@
+import os
+import sys
+import mmap
+import struct
+from array import array
+from bisect import bisect_right, bisect_left
+from typing import List, Tuple, Union
+
+
+# File layout(little endian):
+# - Header      -> magic(6 bytes), file count(uint32), entry count(uint32), address count(uint32)
+# - File table  -> for each file: path length(uint16) + utf-8 path, padded to 4 bytes at the end
+# - Entries     -> start addresses(uint32[entry count], ascending), lines(uint32[entry count]), files(uint32[entry count])
+# - Line index  -> entry indexes sorted by (file, line)(uint32[entry count])
+#
+# Each entry is a run of consecutive addresses generated by the same source line, the run ends at the next
+# entry's start address(or at the address count for the last entry). Unused address ranges between the runs
+# are entries with the file "NO_FILE".
+MAGIC  = b"ASMAP\x01"
+HEADER = struct.Struct("<6sIII")
+
+# File index of the unused address ranges
+NO_FILE = 0xFFFFFFFF
+
+
+class SourceMapWriter:
+    """Class used to collect the address-line pairs during the assembly and write them as a source map.
+    - Consecutive addresses of the same line are merged into a single entry, so a map is ~12 bytes per line.
+    - Addresses can be added in any order(ex: ".org"), but each address only once.
+
+        Methods:
+        - add()
+        - write()
+    """
+    def __init__(self) -> None:
+        self._files     = []
+        self._file_ids  = {}
+        self._starts    = array('I')
+        self._lines     = array('I')
+        self._file_list = array('I')
+        self._ends      = array('I')
+        self._last      = None
+
+    def add(self, address:int, file:str, line:int) -> None:
+        """Adds an address generated by the line of the file.
+
+        Args:
+            address (int): Instruction address.
+            file (str): Source file of the line.
+            line (int): Line number.(1 based)
+        """
+        file_id = self._file_ids.get(file)
+        if file_id == None:
+            file_id = self._file_ids[file] = len(self._files)
+            self._files.append(file)
+
+        if self._last != (file_id, line) or address != self._ends[-1]:
+            self._starts.append(address)
+            self._lines.append(line)
+            self._file_list.append(file_id)
+            self._ends.append(address)
+            self._last = (file_id, line)
+        self._ends[-1] = address + 1
+
+    def write(self, destination:str) -> None:
+        """Writes the source map.
+
+        Args:
+            destination (str): Destination for the map file.
+        """
+        # Sort the runs by address, fill the gaps between them
+        starts, lines, file_list = array('I'), array('I'), array('I')
+        end = 0
+        for i in sorted(range(len(self._starts)), key=lambda i: self._starts[i]):
+            if self._starts[i] > end:
+                starts.append(end)
+                lines.append(0)
+                file_list.append(NO_FILE)
+            starts.append(self._starts[i])
+            lines.append(self._lines[i])
+            file_list.append(self._file_list[i])
+            end = self._ends[i]
+
+        count = len(starts)
+        index = array('I', sorted(range(count), key=lambda i: (file_list[i], lines[i], starts[i])))
+
+        file_table = b""
+        for file in self._files:
+            path = file.encode()
+            file_table += struct.pack("<H", len(path)) + path
+        file_table += b"\x00" * (-(HEADER.size + len(file_table)) % 4)
+
+        with open(destination, 'wb') as wf:
+            wf.write(HEADER.pack(MAGIC, len(self._files), count, end))
+            wf.write(file_table)
+            for values in (starts, lines, file_list, index):
+                if sys.byteorder != "little":
+                    values = array('I', values)
+                    values.byteswap()
+                wf.write(values.tobytes())
+
+
+class SourceMap:
+    """Class used to look up the source lines of the addresses and the addresses of the source lines.
+    - Map file is memory mapped and the arrays are used in place, so loading doesn't depend on the map's size.
+      (or read into memory if "in_memory" is "True", so the file can be rewritten while the map is in use)
+    - Both lookups are binary searches, O(log n).
+    - Can be used as a context manager to close the file.
+
+        Methods:
+        - lookup()
+        - addresses()
+        - files()
+        - close()
+
+    Raises:
+        ValueError: Raised if the file isn't a valid source map.
+
+    Args:
+        file (str): Path of the map file.
+        in_memory (bool, optional): If True, the file is read into memory and closed. Defaults to False.
+    """
+    def __init__(self, file:str, in_memory:bool=False) -> None:
+        self._mmap = None
+        with open(file, 'rb') as rf:
+            if os.fstat(rf.fileno()).st_size < HEADER.size:
+                raise ValueError("Invalid source map!")
+            if in_memory == True:
+                data = rf.read()
+            else:
+                data = self._mmap = mmap.mmap(rf.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(data) < HEADER.size:
+            self.close()
+            raise ValueError("Invalid source map!")
+
+        magic, file_count, count, self._address_count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("Invalid source map!")
+
+        # File table
+        self._files = []
+        offset = HEADER.size
+        for _ in range(file_count):
+            (length,) = struct.unpack_from("<H", data, offset)
+            self._files.append(bytes(data[offset+2 : offset+2+length]).decode())
+            offset += 2 + length
+        offset += -offset % 4
+        if offset + 16*count > len(data):
+            self.close()
+            raise ValueError("Invalid source map!")
+
+        # Arrays are used in place(copied only on big endian machines)
+        arrays = []
+        for i in range(4):
+            start = offset + 4*count*i
+            if sys.byteorder == "little":
+                arrays.append(memoryview(data)[start : start + 4*count].cast('I'))
+            else:
+                values = array('I', data[start : start + 4*count])
+                values.byteswap()
+                arrays.append(values)
+        self._starts, self._lines, self._file_list, self._index = arrays
+
+    def lookup(self, address:int) -> Union[Tuple[str, int], None]:
+        """Returns the source line of the address -> (file, line), "None" if the address isn't mapped."""
+        if address < 0 or address >= self._address_count:
+            return None
+        i = bisect_right(self._starts, address) - 1
+        if i < 0 or self._file_list[i] == NO_FILE:
+            return None
+        return (self._files[self._file_list[i]], self._lines[i])
+
+    def addresses(self, file:str, line:int) -> List[Tuple[int, int]]:
+        """Returns the address ranges generated by the line -> [(start, end)...](end exclusive), empty if there is none."""
+        try:
+            file_id = self._files.index(file)
+        except ValueError:
+            return []
+
+        key    = lambda i: (self._file_list[i], self._lines[i])
+        first  = bisect_left(self._index, (file_id, line), key=key)
+        ranges = []
+        for i in self._index[first:]:
+            if key(i) != (file_id, line):
+                break
+            end = self._starts[i+1] if i+1 < len(self._starts) else self._address_count
+            ranges.append((self._starts[i], end))
+        return ranges
+
+    def files(self) -> List[str]:
+        """Returns the source files in the map."""
+        return list(self._files)
+
+    def close(self) -> None:
+        """Releases the arrays and closes the memory map."""
+        self._starts = self._lines = self._file_list = self._index = None
+        if self._mmap != None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
@@ -0,0 +1,86 @@
+from bisect import bisect_right
+from typing import Iterator, List, Tuple, Union
+
+
+# Number of instruction addresses
+ADDRESS_COUNT = 0x10000
+
+
+class SparseImage:
+    """Class for the program images that only hold the populated address ranges.
+    - Each segment is a run of consecutive addresses -> (start address, opcode-literal pairs as bytes)
+    - Segments are kept sorted, writes right after a segment extend it(and merge it with the next one if they touch),
+      so a program written in order stays a single segment.
+    - Writing over a populated address raises "ValueError", same as writing past the last address.
+
+        Methods:
+        - write()
+        - read()
+        - segments()
+        - size()
+        - end()
+    """
+    def __init__(self) -> None:
+        self._starts = []  # type: List[int]
+        self._data   = []  # type: List[bytearray]
+        self._last   = -1  # Index of the last written segment, most writes continue it
+
+    def write(self, address:int, data:Union[bytes, bytearray]) -> None:
+        """Writes the opcode-literal pairs starting from the address.
+
+        Raises:
+            ValueError: Raised if the range is out of the memory or overlaps the populated addresses.
+
+        Args:
+            address (int): Instruction address of the first pair.
+            data (Union[bytes, bytearray]): Opcode-literal pairs -> data[2*i] = opcode, data[2*i + 1] = literal
+        """
+        count = len(data)//2
+        if address < 0 or address + count > ADDRESS_COUNT:
+            raise ValueError("Address out of range!")
+        if count == 0:
+            return
+
+        # Find the segment that ends at the address(or the one before it)
+        i = self._last
+        if i < 0 or self._starts[i] + len(self._data[i])//2 != address:
+            i = bisect_right(self._starts, address) - 1
+        if i >= 0 and self._starts[i] + len(self._data[i])//2 > address:
+            raise ValueError("Overlapping addresses!")
+        if i+1 < len(self._starts) and self._starts[i+1] < address + count:
+            raise ValueError("Overlapping addresses!")
+
+        if i >= 0 and self._starts[i] + len(self._data[i])//2 == address:
+            self._data[i] += data
+        else:
+            i += 1
+            self._starts.insert(i, address)
+            self._data.insert(i, bytearray(data))
+
+        # Merge with the next segment if they touch now
+        if i+1 < len(self._starts) and self._starts[i+1] == address + count:
+            self._data[i] += self._data.pop(i+1)
+            self._starts.pop(i+1)
+        self._last = i
+
+    def read(self, address:int) -> Union[Tuple[int, int], None]:
+        """Returns the opcode-literal pair of the address, "None" if it isn't populated."""
+        i = bisect_right(self._starts, address) - 1
+        if i < 0 or address >= self._starts[i] + len(self._data[i])//2:
+            return None
+        offset = 2*(address - self._starts[i])
+        return (self._data[i][offset], self._data[i][offset + 1])
+
+    def segments(self) -> Iterator[Tuple[int, bytearray]]:
+        """Yields the segments in the order of their addresses -> (start address, opcode-literal pairs)"""
+        yield from zip(self._starts, self._data)
+
+    def size(self) -> int:
+        """Returns the number of populated addresses."""
+        return sum(len(data)//2 for data in self._data)
+
+    def end(self) -> int:
+        """Returns the address after the last populated one, 0 if the image is empty."""
+        if self._starts == []:
+            return 0
+        return self._starts[-1] + len(self._data[-1])//2
@@ -0,0 +1,271 @@
+import os
+import errno
+import sys
+import random
+import sqlite3
+import argparse
+import multiprocessing
+from collections import Counter
+from itertools import product
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+from .assemblererror import AssembleError
+from .objectfile import ObjectBuilder
+from .preprocessor import preprocess
+from . import optimizer
+
+
+# Exhaustive superoptimizer for the short straight-line sequences
+# - Candidates are every sequence shorter than the original, built from the instructions with known effects
+#   (see "optimizer"), with the original's literals and the constant results of the original as literals.
+# - Candidates are screened on a few register states first, survivors are proven on all the 2^24 register
+#   states(a, b, result): all the 65536 (a, b) pairs are packed into a single integer as 16-bit lanes, so each
+#   instruction is a few big integer operations, and the packed state is run for each of the 256 "result" values.
+# - Proven rewrites(and the sequences without a shorter equivalent) are kept in an sqlite database keyed by the
+#   canonical sequence, so later runs and the assembler(see "assembler.assemble()") only need a lookup.
+#
+# Usage(from "packages/assembler"):
+#   python -m assembler_tools.superoptimizer file.asm [file.asm ...] --db rewrites.db [--max-length 4] [--top 20] [--jobs N]
+
+# Longest sequence searched by default(the search grows exponentially with the length)
+MAX_LENGTH = 4
+
+# Packed lanes -> lane i holds (a, b) = (i >> 8, i & 0xFF), 16 bits each
+LANES = 0x10000
+ONES  = int.from_bytes(b"\x01\x00" * LANES, "little")
+MASK  = 0xFF * ONES
+PACKED_A = int.from_bytes(b"".join(bytes((a, 0)) * 256 for a in range(256)), "little")
+PACKED_B = int.from_bytes(b"".join(bytes((b, 0)) for b in range(256)) * 256, "little")
+
+# Register states for the screening(corners and a fixed random set, so the runs are repeatable)
+_random = random.Random(0x8B17)
+SAMPLES = [{"a": a, "b": b, "result": r} for a, b, r in ((0, 0, 0), (255, 255, 255), (1, 2, 3), (128, 127, 255))] + \
+          [{register: _random.randrange(256) for register in optimizer.REGISTERS} for _ in range(28)]
+
+
+def canonical(sequence:Sequence[Tuple[int, int]]) -> str:
+    """Returns the database key of the sequence -> hex opcode-literal pairs seperated by spaces.
+    (literals of the instructions without a literal operand are 0, as they don't change anything)
+    """
+    pairs = []
+    for opcode, literal in sequence:
+        if opcode in optimizer.OPCODES and "*" not in optimizer.OPCODES[opcode].operands:
+            literal = 0
+        pairs.append("{:02X}{:02X}".format(opcode, literal))
+    return " ".join(pairs)
+
+
+def parse(key:str) -> List[Tuple[int, int]]:
+    """Returns the sequence of a database key.(see "canonical()")"""
+    return [(int(pair[:2], 16), int(pair[2:], 16)) for pair in key.split()]
+
+
+def is_equivalent(first:Sequence[Tuple[int, int]], second:Sequence[Tuple[int, int]]) -> bool:
+    """Returns "True" if the sequences leave the same register state for all the 2^24 starting states."""
+    add    = lambda x, y: (x + y) & MASK
+    first  = [(opcode, literal * ONES) for opcode, literal in first]
+    second = [(opcode, literal * ONES) for opcode, literal in second]
+    for result in range(256):
+        state = {"a": PACKED_A, "b": PACKED_B, "result": result * ONES}
+        if optimizer.evaluate(first, state, add) != optimizer.evaluate(second, state, add):
+            return False
+    return True
+
+
+def _screen(sequence:Sequence[Tuple[int, int]], targets:List[Dict[str, int]]) -> bool:
+    """Returns "True" if the sequence gives the target states for the samples."""
+    for sample, target in zip(SAMPLES, targets):
+        if optimizer.simulate(sequence, dict(sample)) != target:
+            return False
+    return True
+
+
+def search(sequence:Sequence[Tuple[int, int]]) -> Union[List[Tuple[int, int]], None]:
+    """Searches the shortest equivalent of the sequence.
+
+    Raises:
+        ValueError: Raised if the sequence has an instruction without a known effect.(ex: halt)
+
+    Args:
+        sequence (Sequence[Tuple[int, int]]): Opcode-literal pairs.
+
+    Returns:
+        (Union[List[Tuple[int, int]], None]): Shortest equivalent, "None" if there is none.
+    """
+    if any(optimizer.EFFECTS.get(opcode) == None for opcode, _ in sequence):
+        raise ValueError("Sequence has instructions without a known effect!")
+    targets = [optimizer.simulate(sequence, dict(sample)) for sample in SAMPLES]
+
+    # Literals -> the original's literals and the registers that end up constant
+    literals = {literal for opcode, literal in sequence if "*" in optimizer.OPCODES[opcode].operands}
+    for register in optimizer.REGISTERS:
+        if len({target[register] for target in targets}) == 1:
+            literals.add(targets[0][register])
+
+    alphabet = []
+    for opcode, effect in optimizer.EFFECTS.items():
+        if effect == None or effect == []:
+            continue
+        if "*" in optimizer.OPCODES[opcode].operands:
+            alphabet += [(opcode, literal) for literal in sorted(literals)]
+        else:
+            alphabet.append((opcode, 0))
+
+    for length in range(len(sequence)):
+        for candidate in product(alphabet, repeat=length):
+            if _screen(candidate, targets) == True and is_equivalent(sequence, candidate) == True:
+                return list(candidate)
+    return None
+
+
+class RewriteDatabase:
+    """Class for the on-disk database of the proven rewrites.(sqlite)
+    - Each searched sequence is stored with its rewrite, or with "None" if it has no shorter equivalent, so it's
+      never searched again.
+    - Can be used as a context manager to close the database.
+
+        Methods:
+        - get()
+        - put()
+        - rewrites()
+        - close()
+
+    Args:
+        file (str): Path of the database file, created if it doesn't exist.
+    """
+    def __init__(self, file:str) -> None:
+        self._connection = sqlite3.connect(file)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS rewrites (sequence TEXT PRIMARY KEY, rewrite TEXT, saved_instructions INTEGER)")
+        self._connection.commit()
+
+    def get(self, sequence:Sequence[Tuple[int, int]]) -> Union[Tuple[Union[List[Tuple[int, int]], None]], None]:
+        """Returns the stored result of the sequence -> (rewrite or "None",), "None" if it wasn't searched."""
+        row = self._connection.execute("SELECT rewrite FROM rewrites WHERE sequence = ?", (canonical(sequence),)).fetchone()
+        if row == None:
+            return None
+        return (parse(row[0]) if row[0] != None else None,)
+
+    def put(self, sequence:Sequence[Tuple[int, int]], rewrite:Union[Sequence[Tuple[int, int]], None]) -> None:
+        """Stores the search result of the sequence."""
+        saved = len(sequence) - len(rewrite) if rewrite != None else 0
+        self._connection.execute("INSERT OR REPLACE INTO rewrites VALUES (?, ?, ?)",
+                                 (canonical(sequence), canonical(rewrite) if rewrite != None else None, saved))
+        self._connection.commit()
+
+    def rewrites(self) -> Dict[str, List[Tuple[int, int]]]:
+        """Returns all the rewrites -> {canonical sequence: rewrite}(sequences without a rewrite are left out)"""
+        rows = self._connection.execute("SELECT sequence, rewrite FROM rewrites WHERE rewrite IS NOT NULL")
+        return {sequence: parse(rewrite) for sequence, rewrite in rows}
+
+    def close(self) -> None:
+        """Closes the database."""
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def load_rewrites(file:str) -> Dict[str, List[Tuple[int, int]]]:
+    """Returns the rewrites of a database file.(see "RewriteDatabase.rewrites()")
+
+    Raises:
+        FileNotFoundError: Raised if the database file doesn't exist.(it isn't created, unlike "RewriteDatabase")
+    """
+    if os.path.isfile(file) == False:
+        raise FileNotFoundError(errno.ENOENT, "No such file or directory", file)
+    with RewriteDatabase(file) as database:
+        return database.rewrites()
+
+
+def apply(instructions:Sequence[Tuple[int, int]], rewrites:Dict[str, List[Tuple[int, int]]]) -> Tuple[List[Tuple[Tuple[int, int], int]], int]:
+    """Applies the known rewrites to the instructions, longest match first from left to right.
+
+    Args:
+        instructions (Sequence[Tuple[int, int]]): Opcode-literal pairs, in the order of execution.
+        rewrites (Dict[str, List[Tuple[int, int]]]): Rewrites by the canonical sequence.(see "load_rewrites()")
+
+    Returns:
+        (Tuple[List[Tuple[Tuple[int, int], int]], int]): ([(opcode-literal pair, index of the original instruction it replaces)...],
+                                                          instructions saved)
+    """
+    lengths = sorted({len(key.split()) for key in rewrites}, reverse=True)
+    output  = []
+    saved   = 0
+    i = 0
+    while i < len(instructions):
+        for length in lengths:
+            rewrite = rewrites.get(canonical(instructions[i:i+length])) if i + length <= len(instructions) else None
+            if rewrite != None:
+                output += [(instruction, i) for instruction in rewrite]
+                saved += length - len(rewrite)
+                i += length
+                break
+        else:
+            output.append((tuple(instructions[i]), i))
+            i += 1
+    return (output, saved)
+
+
+def hot_sequences(programs:Iterable[Sequence[Tuple[int, int]]], max_length:int=MAX_LENGTH) -> Counter:
+    """Counts the straight-line sequences(2 to "max_length" instructions with known effects) in the programs."""
+    counts = Counter()
+    for program in programs:
+        for start in range(len(program)):
+            for length in range(2, max_length+1):
+                sequence = program[start:start+length]
+                if len(sequence) != length or optimizer.EFFECTS.get(sequence[-1][0]) == None:
+                    break
+                if optimizer.EFFECTS.get(sequence[0][0]) != None:
+                    counts[canonical(sequence)] += 1
+    return counts
+
+
+def _search_job(key:str) -> Tuple[str, Union[List[Tuple[int, int]], None]]:
+    """Worker process job, searches a sequence by its key."""
+    return (key, search(parse(key)))
+
+
+def _read_program(file:str) -> List[Tuple[int, int]]:
+    """Returns the instructions of an asm file(not linked, symbol literals are 0)."""
+    builder = ObjectBuilder(os.path.abspath(file))
+    with open(file, 'r') as rf:
+        for tokens, source in preprocess(rf, file):
+            builder.add_tokens(tokens, source)
+    return builder.instructions()
+
+
+def main(argv:List[str]=None) -> int:
+    """Command line entry, searches the hot sequences of the asm files and stores the results."""
+    parser = argparse.ArgumentParser(description="Searches shorter equivalents of the most used instruction sequences.")
+    parser.add_argument("files", nargs="+", help="asm files to scan")
+    parser.add_argument("--db", required=True, help="rewrite database(created if it doesn't exist)")
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH, help=f"longest sequence to search(default: {MAX_LENGTH})")
+    parser.add_argument("--top", type=int, default=20, help="number of sequences to search(default: 20)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="worker processes(default: cpu count)")
+    args = parser.parse_args(argv)
+
+    try:
+        programs = [_read_program(file) for file in args.files]
+    except (OSError, AssembleError) as err:
+        print(f"Failed to read the programs! ({err.description if isinstance(err, AssembleError) else err})")
+        return 1
+
+    with RewriteDatabase(args.db) as database:
+        counts = hot_sequences(programs, args.max_length)
+        keys   = [key for key, _ in sorted(counts.items(), key=lambda item: -item[1] * len(item[0].split()))
+                  if database.get(parse(key)) == None][:args.top]
+        print(f"{len(counts)} sequences found, searching {len(keys)}...")
+
+        with multiprocessing.Pool(max(1, args.jobs)) as pool:
+            for key, rewrite in pool.imap_unordered(_search_job, keys):
+                database.put(parse(key), rewrite)
+                if rewrite != None:
+                    print(f" > [{key}] x{counts[key]} -> [{canonical(rewrite)}]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+"""
+Round trip fuzzer for "assemble()", "disassemble()" and "view()".
+- Random programs are generated from the instruction table(see "assembler_tools.mycodegenerator.instructions") with
+  whitespace, comment, ".org" and ".rept" variants. Expected memory is computed from the table, not by the assembler.
+- Each valid program is checked for:
+  > assembled memory matches the expected memory(halt included)
+  > disassembly assembles back to the same hex file(after dropping the halt the assembler added)
+  > "view()" agrees with the disassembly("a" format) and the expected memory("h" format)
+- Each invalid program(a valid one with a single bad line) must fail with the documented error and line, without leaving
+  a hex file behind. Corrupted hex files must fail "disassemble()" and "view()" with their documented errors too.
+- Programs are checked on every core, each program has its own seed, so a failure can be replayed on its own.
+- Exits with 1 on failure, so it can be used before merging the assembler changes.
+
+Usage(from "packages/assembler"):
+    python fuzz.py                          -> 2000 programs on every core
+    python fuzz.py --programs 20000 --seed 7 --max-size 200
+    python fuzz.py --seed 7 --replay 1234   -> checks a single program, keeps its files and prints their paths
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+from typing import List, Tuple, Union
+
+import assembler
+from assembler_tools import hexops
+from assembler_tools import mycodegenerator
+from assembler_tools.sparseimage import SparseImage
+
+
+# Mnemonics of the instruction table
+MNEMONICS = sorted({instruction.mnemonic for instruction in mycodegenerator.instructions})
+
+# Ids that are never mnemonics or operands
+BOGUS_IDS = ("zz", "foo", "movv", "ad", "nopx", "register")
+
+# Comment texts(anything goes after ';')
+COMMENTS = ("", " comment", ";;", " mov 1, a", " ,:<>.org", "\tx")
+
+
+class Program:
+    """Class for the generated programs.
+    - lines    -> asm lines(without newlines)
+    - expected -> expected memory, "None" for the invalid programs
+    - error    -> (description, line number) of the expected error, "None" for the valid programs
+    """
+    def __init__(self, lines:List[str], expected:Union[SparseImage, None], error:Union[Tuple[str, int], None]=None) -> None:
+        self.lines    = lines
+        self.expected = expected
+        self.error    = error
+
+
+def generate(rng:random.Random, max_size:int) -> Program:
+    """Generates a valid program with its expected memory.(see the module doc)"""
+    items = []  # [lines of each item...]
+    image = SparseImage()
+    block = []
+    block_address = 0
+    address_limit = 0xFFFE - max_size*12  # Leaves room for the blocks after an ".org"(12 -> longest ".rept")
+
+    for _ in range(rng.randint(0, max_size)):
+        kind = rng.random()
+        if kind < 0.05:
+            # ".org" after the current block, sometimes past the 64k byte boundary of the hex records
+            image.write(block_address, bytes(sum(block, ())))
+            start = max(block_address + len(block), image.end())
+            if rng.random() < 0.2:
+                start = max(start, rng.randint(0x8000, max(0x8000, address_limit)))
+            block_address = start + rng.choice((0, 1, rng.randint(2, 300)))
+            if block_address > address_limit:
+                block_address = start
+            block = []
+            items.append([_whitespace(rng) + f".org{rng.choice((' ', chr(9), '   '))}{block_address}" + _comment(rng)])
+        elif kind < 0.08:
+            # ".rept" of a few instructions
+            count = rng.randint(0, 4)
+            body  = [_instruction(rng) for _ in range(rng.randint(1, 3))]
+            items.append([_whitespace(rng) + f".rept {count}"] + [line for line, _ in body] + [_whitespace(rng) + ".endr" + _comment(rng)])
+            block += [pair for _, pair in body] * count
+        elif kind < 0.12:
+            # Empty and comment lines
+            items.append([rng.choice(("", " ", "\t", ";" + rng.choice(COMMENTS), "   ;" + rng.choice(COMMENTS)))])
+        else:
+            line, pair = _instruction(rng)
+            items.append([line])
+            block.append(pair)
+    image.write(block_address, bytes(sum(block, ())))
+    image.write(image.end(), bytes(mycodegenerator.halt_instruction))
+
+    program = Program([line for item in items for line in item], image)
+    program.items = items
+    return program
+
+
+def generate_invalid(rng:random.Random, max_size:int) -> Program:
+    """Generates a valid program with a single bad line between its lines, with the expected error."""
+    valid = generate(rng, max_size)
+    line, description = _invalid_line(rng)
+    i_item = rng.randint(0, len(valid.items))
+    row    = sum(len(item) for item in valid.items[:i_item]) + 1
+    lines  = [line for item in valid.items[:i_item] for line in item] + [line] + [line for item in valid.items[i_item:] for line in item]
+    return Program(lines, None, (description, row))
+
+
+def _instruction(rng:random.Random) -> Tuple[str, Tuple[int, int]]:
+    """Returns a random instruction line and its opcode-literal pair."""
+    instruction = rng.choice(mycodegenerator.instructions)
+    literal     = rng.choice((0, 255, rng.randint(0, 255)))
+    operands    = list(instruction.operands)
+    if instruction.interchangeable == True:
+        rng.shuffle(operands)
+    operands = [(str(literal) if rng.random() < 0.9 else "00" + str(literal)) if operand == "*" else operand for operand in operands]
+    has_literal = "*" in instruction.operands
+
+    line = _whitespace(rng) + instruction.mnemonic
+    for i, operand in enumerate(operands):
+        line += rng.choice((" ", "\t", "  ")) if i == 0 else rng.choice((",", ", ", " ,", " , ", ",\t"))
+        line += operand
+    return (line + _comment(rng), (instruction.opcode, literal if has_literal == True else 0))
+
+
+def _invalid_line(rng:random.Random) -> Tuple[str, str]:
+    """Returns a random invalid line and the description of its documented error."""
+    with_literal  = [i for i in mycodegenerator.instructions if "*" in i.operands]
+    with_operands = [i for i in mycodegenerator.instructions if len(i.operands) >= 2]
+    kind = rng.randrange(10)
+    if kind == 0:
+        return (rng.choice(BOGUS_IDS) + " a, b", "Unknown mnemonic!")
+    if kind == 1:
+        instruction = rng.choice(with_literal)
+        return (_render(instruction, str(rng.randint(256, 99999))), "Literal can't be more than 255!")
+    if kind == 2:
+        instruction = rng.choice(mycodegenerator.instructions)
+        count = max(len(i.operands) for i in mycodegenerator.instructions if i.mnemonic == instruction.mnemonic) + 1
+        return (instruction.mnemonic + " " + ", ".join(["a"] * count), "Too many arguments!")
+    if kind == 3:
+        instruction = rng.choice(with_operands)
+        return (instruction.mnemonic + " " + instruction.operands[-1].replace("*", "1"), "Missing arguments!")
+    if kind == 4:
+        instruction = rng.choice(with_operands)
+        return (instruction.mnemonic + " " + ", ".join(["7"] * len(instruction.operands)), "Too many literals!")
+    if kind == 5:
+        instruction = rng.choice(with_operands)
+        return (instruction.mnemonic + " " + " ".join(o.replace("*", "1") for o in instruction.operands), "Expected seperator!")
+    if kind == 6:
+        instruction = rng.choice(with_operands)
+        return (instruction.mnemonic + " " + rng.choice(BOGUS_IDS) + ", " + rng.choice(BOGUS_IDS), "Invalid argument!")
+    if kind == 7:
+        return (_render(rng.choice(mycodegenerator.instructions), "1") + " " + rng.choice("$#@!?"), "Invalid syntax!")
+    if kind == 8:
+        return (rng.choice(("label:", ".global x", ".section data", "mov <x, a")), "Needs linking!(see \"build()\")")
+    return (f".org {rng.randint(0x10000, 99999)}", "Address can't be more than 65535!")
+
+
+def _render(instruction:mycodegenerator.Instruction, literal:str) -> str:
+    """Returns the plain line of an instruction."""
+    operands = ", ".join(literal if operand == "*" else operand for operand in instruction.operands)
+    return instruction.mnemonic + (" " + operands if operands != "" else "")
+
+
+def _whitespace(rng:random.Random) -> str:
+    """Returns random leading whitespace."""
+    return rng.choice(("", "", "", " ", "\t", "    "))
+
+
+def _comment(rng:random.Random) -> str:
+    """Returns a random trailing comment(or whitespace)."""
+    value = rng.random()
+    if value < 0.7:
+        return ""
+    if value < 0.8:
+        return rng.choice((" ", "\t", "  "))
+    return rng.choice(("", " ", "\t")) + ";" + rng.choice(COMMENTS)
+
+
+def _read(file:str) -> SparseImage:
+    """Returns the memory of a hex file."""
+    with open(file, 'r') as rf:
+        return hexops.read_image(rf)
+
+
+def _expect_error(function, description:str, *required:str) -> Union[str, None]:
+    """Calls the function, returns a failure message unless it raises "SyntaxError" with the texts in its message."""
+    try:
+        function()
+    except SyntaxError as err:
+        message = str(err)
+        if description in message and all(text in message for text in required):
+            return None
+        return f"expected \"{description}\" {required}, got: {message!r}"
+    except Exception as err:
+        return f"expected \"{description}\", got: {type(err).__name__}: {err}"
+    return f"expected \"{description}\", no error raised"
+
+
+def check(index:int, seed:int, max_size:int, directory:str) -> List[str]:
+    """Generates and checks the program of the index, returns the failure messages.(see the module doc)"""
+    rng = random.Random(seed * 1000003 + index)
+    asm, hex, dis, hex2 = (os.path.join(directory, name) for name in ("p.asm", "p.hex", "d.asm", "d.hex"))
+    is_invalid = rng.random() < 0.25
+    program    = generate_invalid(rng, max_size) if is_invalid == True else generate(rng, max_size)
+    with open(asm, 'w') as wf:
+        wf.write("\n".join(program.lines) + rng.choice(("", "\n")))
+
+    # Invalid programs -> documented error at the bad line, no hex file left
+    if is_invalid == True:
+        description, row = program.error
+        failure = _expect_error(lambda: assembler.assemble(file=asm, destination=hex), description, f"line: {row},")
+        if failure == None and os.path.isfile(hex) == True:
+            failure = "hex file is left after the error"
+        if os.path.isfile(hex) == True:
+            os.remove(hex)
+        return [f"invalid program: {failure}"] if failure != None else []
+
+    failures = []
+    try:
+        assembler.assemble(file=asm, destination=hex)
+    except Exception as err:
+        return [f"assemble failed: {type(err).__name__}: {err}"]
+    image = _read(hex)
+    if list(image.segments()) != list(program.expected.segments()):
+        failures.append("assembled memory doesn't match the instruction table")
+
+    # Disassembly -> same hex after dropping the halt added by the assembler
+    assembler.disassemble(file=hex, destination=dis, show_address=rng.random() < 0.3)
+    with open(dis, 'r') as rf:
+        dis_lines = rf.read().splitlines()
+    with open(dis, 'w') as wf:
+        wf.write("\n".join(dis_lines[:-1]) + "\n")
+    try:
+        assembler.assemble(file=dis, destination=hex2)
+        with open(hex, 'r') as first, open(hex2, 'r') as second:
+            if first.read() != second.read():
+                failures.append("disassembly doesn't assemble back to the same hex file")
+    except Exception as err:
+        failures.append(f"disassembly doesn't assemble: {type(err).__name__}: {err}")
+
+    # View -> disassembly lines of the addresses, and the expected pairs
+    addresses = {}
+    address   = 0
+    for line in dis_lines:
+        if line.startswith(".org ") == True:
+            address = int(line[5:])
+            continue
+        addresses[address] = line.split(";")[0].strip()
+        address += 1
+    for start, data in list(image.segments())[:3]:
+        first = start + rng.randrange(len(data)//2)
+        end   = min(start + len(data)//2, first + rng.randint(1, 40))
+        try:
+            viewed  = assembler.view(file=hex, address_start=first, address_end=end, format='a')
+            pairs   = assembler.view(file=hex, address_start=first, address_end=end, format='h')
+        except Exception as err:
+            failures.append(f"view({first}, {end}) failed: {type(err).__name__}: {err}")
+            continue
+        if viewed != [addresses.get(a) for a in range(first, end)]:
+            failures.append(f"view({first}, {end}) doesn't match the disassembly")
+        expected = ["Opcode: 0x{0:02X}, Literal: 0x{1:02X}".format(*image.read(a)) for a in range(first, end)]
+        if pairs != expected:
+            failures.append(f"view({first}, {end}, 'h') doesn't match the memory")
+
+    # Corrupted hex files -> documented errors
+    failure = _expect_error(lambda: assembler.view(file=hex, address_start=image.end()), "Missing records for the range!")
+    if failure != None:
+        failures.append(f"view past the end: {failure}")
+    with open(hex, 'r') as rf:
+        records = rf.read().splitlines()
+    if rng.random() < 0.5:
+        i_record = rng.randrange(1, len(records) - 1)
+        record   = records[i_record]
+        records[i_record] = record[:-1] + ("0" if record[-1] != "0" else "1")
+        expected_error = ("Invalid record!", f"line: {i_record+1}")
+    else:
+        records = records[:-1]
+        expected_error = ("EOF(end of file) missing!",)
+    with open(hex2, 'w') as wf:
+        wf.write("\n".join(records) + "\n")
+    failure = _expect_error(lambda: assembler.disassemble(file=hex2, destination=dis), *expected_error)
+    if failure == None and os.path.isfile(dis) == True:
+        failure = "asm file is left after the error"
+    if failure != None:
+        failures.append(f"corrupted hex: {failure}")
+    return failures
+
+
+# Worker process state -> (directory, seed, max size)
+_worker = None
+
+def _init_worker(base:str, seed:int, max_size:int) -> None:
+    """Worker process initializer, creates the working directory of the process."""
+    global _worker
+    directory = os.path.join(base, str(os.getpid()))
+    os.makedirs(directory, exist_ok=True)
+    _worker = (directory, seed, max_size)
+
+
+def _job(indexes:range) -> Tuple[int, List[Tuple[int, str]]]:
+    """Worker process job, checks the programs of the indexes -> (number of programs, [(index, failure)...])"""
+    directory, seed, max_size = _worker
+    failures = []
+    for index in indexes:
+        try:
+            failures += [(index, failure) for failure in check(index, seed, max_size, directory)]
+        except Exception as err:
+            failures.append((index, f"harness error: {type(err).__name__}: {err}"))
+    return (len(indexes), failures)
+
+
+def main(argv:List[str]=None) -> int:
+    parser = argparse.ArgumentParser(description="Round trip fuzzer for the assembler.")
+    parser.add_argument("--programs", type=int, default=2000, help="number of programs(default: 2000)")
+    parser.add_argument("--seed"    , type=int, default=None, help="seed of the run(default: random, printed)")
+    parser.add_argument("--max-size", type=int, default=64, help="max. number of items in a program(default: 64)")
+    parser.add_argument("--jobs"    , type=int, default=os.cpu_count(), help="worker processes(default: cpu count)")
+    parser.add_argument("--batch"   , type=int, default=50, help="programs per job(default: 50)")
+    parser.add_argument("--replay"  , type=int, default=None, help="checks only the program of the index and keeps its files")
+    args = parser.parse_args(argv)
+    seed = args.seed if args.seed != None else random.randrange(1 << 31)
+
+    if args.replay != None:
+        directory = tempfile.mkdtemp(prefix="asm_fuzz_")
+        failures  = check(args.replay, seed, args.max_size, directory)
+        print(f"Program {args.replay} (seed {seed}) files: {directory}")
+        for failure in failures:
+            print(f" > {failure}")
+        print("Passed!" if failures == [] else "Failed!")
+        return 1 if failures != [] else 0
+
+    print(f"Checking {args.programs} programs on {args.jobs} processes (seed {seed})...")
+    base     = tempfile.mkdtemp(prefix="asm_fuzz_")
+    batches  = [range(i, min(i + args.batch, args.programs)) for i in range(0, args.programs, args.batch)]
+    failures = []
+    checked  = 0
+    start    = time.perf_counter()
+    try:
+        with multiprocessing.Pool(max(1, args.jobs), initializer=_init_worker, initargs=(base, seed, args.max_size)) as pool:
+            for count, batch_failures in pool.imap_unordered(_job, batches):
+                checked  += count
+                failures += batch_failures
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+    elapsed = time.perf_counter() - start
+
+    print("{} programs in {:.2f}s ({:.0f} programs/s)".format(checked, elapsed, checked / elapsed))
+    for index, failure in sorted(failures)[:20]:
+        print(f" > program {index}: {failure}")
+    if failures != []:
+        print(f"Failed! ({len({index for index, _ in failures})} programs, replay with \"--seed {seed} --replay *program*\")")
+        return 1
+    print("Passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""
+Module used to assemble/disassemble the files in a worker process for the GUI.
+- Requires "assembler"(packages/assembler) to be importable, "is_available()" returns "False" otherwise.
+- Tk thread only polls the progress messages, so even the largest files never block the GUI.
+
+---
+
+    Available classes/functions:
+    - BuildJob
+    - BuildPipeline
+    - BuildCancelled
+    - is_available()
+"""
+import os
+import time
+import queue
+import multiprocessing
+from typing import Callable, Dict, Tuple, Union
+
+try:
+    import assembler
+except ImportError:
+    assembler = None
+
+
+# Supported operations -> {operation: (progress text, done text)}
+OPERATIONS = {
+    "assemble"   : ("{lines} lines, {records} records", "{lines} lines -> {records} records"),
+    "disassemble": ("{lines} records, {records} lines", "{lines} records -> {records} lines"),
+}
+
+
+class BuildCancelled(Exception):
+    """Subclass of "Exception". Raised in the worker process to stop the ongoing operation."""
+
+
+def is_available() -> bool:
+    """Returns "True" if the assembler could be imported."""
+    return assembler != None
+
+
+def _build_worker(operation:str, file:str, destination:str, messages:object, e_cancel:object) -> None:
+    """Worker process function. Runs the operation and puts the messages:
+     >("progress", processed, written)\n
+     >("done", processed, written, seconds)\n
+     >("error", description)\n
+     >("cancelled",)\n
+    """
+    counts = [0, 0]
+    def _progress(processed:int, written:int) -> None:
+        if e_cancel.is_set() == True:
+            raise BuildCancelled()
+        counts[0], counts[1] = processed, written
+        messages.put(("progress", processed, written))
+
+    start = time.perf_counter()
+    try:
+        if operation == "assemble":
+            assembler.assemble(file=file, destination=destination, progress=_progress, sourcemap=os.path.splitext(destination)[0] + ".map")
+        else:
+            assembler.disassemble(file=file, destination=destination, progress=_progress)
+        messages.put(("done", counts[0], counts[1], time.perf_counter() - start))
+    except BuildCancelled:
+        messages.put(("cancelled",))
+    except Exception as err:
+        messages.put(("error", str(err)))
+
+
+class BuildJob:
+    def __init__(self, operation:str, file:str, destination:str) -> None:
+        """Class used to run a single assemble/disassemble operation in a worker process.
+        - Progress is streamed back over a queue, use "poll()" to take the messages without blocking.
+        - "cancel()" stops the operation at its next progress report(every 1024 lines), the destination is removed
+          by the assembler.
+
+            Methods:
+            - start()
+            - cancel()
+            - poll()
+            - is_finished()
+            - get_result()
+
+        Args:
+            operation (str): "assemble" or "disassemble".
+            file (str): Source file.
+            destination (str): Destination file.
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"Invalid operation! -> \"{operation}\"")
+        self.operation   = operation
+        self.file        = file
+        self.destination = destination
+
+        self._messages = multiprocessing.Queue()
+        self._e_cancel = multiprocessing.Event()
+        self._process  = multiprocessing.Process(target=_build_worker, args=(operation, file, destination, self._messages, self._e_cancel), daemon=True)
+        self._result   = None
+
+    def start(self) -> None:
+        """Starts the worker process."""
+        self._process.start()
+
+    def cancel(self) -> None:
+        """Requests the operation to stop."""
+        self._e_cancel.set()
+
+    def poll(self) -> list:
+        """Returns the messages received since the last call.(see "_build_worker()")"""
+        messages = []
+        while self._result == None:
+            try:
+                message = self._messages.get_nowait()
+            except queue.Empty:
+                # Process died without reporting(ex: killed)
+                if self._process.is_alive() == False and self._process.exitcode != None and self._messages.empty() == True:
+                    self._result = ("error", f"Worker process exited! (exit code: {self._process.exitcode})")
+                    messages.append(self._result)
+                break
+            messages.append(message)
+            if message[0] != "progress":
+                self._result = message
+        if self._result != None and self._process.is_alive() == True:
+            self._process.join(timeout=1.0)
+        return messages
+
+    def is_finished(self) -> bool:
+        """Returns "True" once the final message("done", "error" or "cancelled") is received."""
+        return self._result != None
+
+    def get_result(self) -> Union[tuple, None]:
+        """Returns the final message, "None" if the job isn't finished."""
+        return self._result
+
+
+class BuildPipeline:
+    def __init__(self, widget:object, status:Callable=None, poll:int=50) -> None:
+        """Class used to run the GUI's build jobs one at a time and report their progress.
+        - Progress is checked every ~"poll" ms with the widget's "after", the Tk thread never waits for a job.
+        - Results are cached by the source and destination files' size and modification time, so building
+          an unchanged file again finishes right away.
+        - Starting a new build cancels the ongoing one.
+
+            Methods:
+            - build()
+            - cancel()
+            - is_busy()
+            - clear_cache()
+
+        Args:
+            widget (object): Any Tk widget, used for "after".
+            status (Callable, optional): Called with the progress and the result texts. Defaults to None.
+            poll (int, optional): Time between the progress checks in ms. Defaults to 50.
+        """
+        self._widget = widget
+        self._status = status
+        self._poll   = poll
+        self._job    = None
+        self._done   = None
+        self._cache  = {}  # type: Dict[Tuple[str, str, str], Tuple[tuple, tuple, str, tuple]]
+
+    def build(self, operation:str, file:str, destination:str, done:Callable=None) -> bool:
+        """Starts a build, or finishes it right away if the result is cached.
+
+        Args:
+            operation (str): "assemble" or "disassemble".
+            file (str): Source file.
+            destination (str): Destination file.
+            done (Callable, optional): Called with the final message when the build succeeds.(see "_build_worker()") Defaults to None.
+
+        Returns:
+            (bool): "True" if the cached result is used.
+        """
+        self.cancel()
+        key    = (operation, os.path.abspath(file), os.path.abspath(destination))
+        cached = self._cache.get(key)
+        if cached != None and cached[0] == self._get_stat(file) and cached[1] == self._get_stat(destination):
+            self._report(f"{cached[2]} (up to date)")
+            if done != None:
+                done(cached[3])
+            return True
+
+        self._job  = BuildJob(operation, file, destination)
+        self._done = done
+        self._job.start()
+        self._report(f"{operation.capitalize()} [{os.path.basename(file)}]...")
+        self._widget.after(self._poll, self._check, self._job)
+        return False
+
+    def cancel(self) -> bool:
+        """Cancels the ongoing build, returns "False" if there isn't one."""
+        if self._job == None:
+            return False
+        self._job.cancel()
+        self._job = None
+        self._report("Build cancelled!")
+        return True
+
+    def is_busy(self) -> bool:
+        """Returns "True" while a build is running."""
+        return self._job != None
+
+    def clear_cache(self) -> None:
+        """Drops the cached results."""
+        self._cache.clear()
+
+    def _get_stat(self, file:str) -> Union[Tuple[int, int], None]:
+        """Returns the modification time and the size of the file, "None" if it doesn't exist."""
+        try:
+            stat = os.stat(file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _check(self, job:BuildJob) -> None:
+        """Reports the job's progress, caches the result when it's done."""
+        messages = job.poll()
+        if job != self._job:
+            # Cancelled job, keep polling until its process exits
+            if job.is_finished() == False:
+                self._widget.after(self._poll, self._check, job)
+            return
+
+        progress_text, done_text = OPERATIONS[job.operation]
+        name = os.path.basename(job.file)
+        if job.is_finished() == False:
+            progress = [message for message in messages if message[0] == "progress"]
+            if progress != []:
+                _, processed, written = progress[-1]
+                self._report(f"{job.operation.capitalize()} [{name}]... " + progress_text.format(lines=processed, records=written))
+            self._widget.after(self._poll, self._check, job)
+            return
+
+        self._job = None
+        result    = job.get_result()
+        if result[0] == "done":
+            _, processed, written, seconds = result
+            text = f"{job.operation.capitalize()} [{name}] -> " + done_text.format(lines=processed, records=written) + " ({:.2f}s)".format(seconds)
+            self._cache[(job.operation, os.path.abspath(job.file), os.path.abspath(job.destination))] = (self._get_stat(job.file), self._get_stat(job.destination), text, result)
+            self._report(text)
+            if self._done != None:
+                self._done(result)
+        elif result[0] == "error":
+            self._report(f"{job.operation.capitalize()} failed! " + result[1].replace("\n", " "))
+        else:
+            self._report("Build cancelled!")
+
+    def _report(self, text:str) -> None:
+        """Passes the text to the status callback."""
+        if self._status != None:
+            self._status(text)
@@ -1,11 +1,28 @@
 import tkinter as tk
 from tkinter import ttk
+import tkinter.font as tkfont
 import threading
+import time
+
+from . import highlighter
+from . import fileloader
 
 
 class TextEditor(tk.Frame):
-    def __init__(self, *args, **kwargs):
-        """Subclass of "tk.Frame". Creates a text editor window with x and y scrolls."""
+    def __init__(self, *args, highlight:bool=True, **kwargs):
+        """Subclass of "tk.Frame". Creates a text editor window with x and y scrolls.
+        - Assembly syntax is highlighted if "highlight" is "True" and the assembler's tokenizer is available.(see "highlighter")
+        - Text widget's Tcl command is wrapped(same method as "idlelib.redirector"), so the edits can be reported
+          to the listeners with the edited lines.(see "add_edit_listener()")
+        - Files are loaded in chunks from an "after" loop(see "load()"), so the GUI stays responsive.
+        
+            Available methods:
+            - add_edit_listener()
+            - remove_edit_listener()
+            - load()
+            - cancel_load()
+            - is_loading()
+        """
         super().__init__(*args, **kwargs)
     
         # Initialize editor elements
@@ -23,19 +40,340 @@ class TextEditor(tk.Frame):
         editor_xscroll.grid(row=1, column=0, sticky="ews")
         editor_yscroll.grid(row=0, column=1, sticky="ens")
         
+        self.textbox         = editor_textbox
+        self.highlighter     = None
+        self._edit_listeners = []
+        self._loader         = None
+        
+        # Wrap the widget's command to catch the edits
+        self._original = editor_textbox._w + "_original"
+        editor_textbox.tk.call("rename", editor_textbox._w, self._original)
+        editor_textbox.tk.createcommand(editor_textbox._w, self._dispatch)
+        
+        # Undo/redo don't pass through the widget's command, they are reported as an edit of the visible lines
+        editor_textbox.bind("<<Undo>>", self._on_undo_redo, add="+")
+        editor_textbox.bind("<<Redo>>", self._on_undo_redo, add="+")
+        
+        if highlight == True and highlighter.is_available() == True:
+            self.highlighter = highlighter.Highlighter(editor_textbox)
+            self.add_edit_listener(self.highlighter.mark_dirty)
+            def _yscroll(*args):
+                editor_yscroll.set(*args)
+                self.highlighter.view_changed()
+            editor_textbox.config(yscrollcommand=_yscroll)
+            
+    def load(self, file, progress=None, done=None):
+        """Replaces the contents with a file, which is read in the background and inserted in chunks.
+        - First chunk is shown right away, each "after" call inserts the ready chunks for ~10ms, so the GUI stays responsive.
+        - Editor is read-only while loading, undo history starts after the load.
+        - Ongoing load is cancelled first.
+
+        Args:
+            file (str): Path of the file.
+            progress (Callable, optional): Called with the loaded ratio(0.0 - 1.0) after each step. Defaults to None.
+            done (Callable, optional): Called with "None", or the exception if the reading failed. Defaults to None.
+        """
+        self.cancel_load()
+        self.textbox.config(undo=False)
+        self.textbox.delete("1.0", "end")
+        self.textbox["state"] = "disabled"
+        
+        self._loader = fileloader.ChunkReader(file=file, daemon=True)
+        self._loader.start()
+        self._load_step(self._loader, progress, done)
+        
+    def cancel_load(self):
+        """Stops the ongoing load, the part that is already loaded is kept."""
+        if self._loader != None:
+            self._loader.stop()
+            self._loader = None
+            self._load_finish()
+            
+    def is_loading(self) -> bool:
+        """Returns "True" while a file is being loaded."""
+        return self._loader != None
+        
+    def _load_step(self, loader, progress, done):
+        """Inserts the ready chunks for ~10ms, then schedules the next step."""
+        if loader != self._loader:
+            return
+        
+        start    = time.perf_counter()
+        inserted = False
+        self.textbox["state"] = "normal"
+        while time.perf_counter() - start < 0.01:
+            chunk = loader.get_chunk()
+            if chunk == None:
+                break
+            self.textbox.insert("end-1c", chunk)
+            inserted = True
+        self.textbox["state"] = "disabled"
+        
+        if progress != None:
+            progress(loader.get_progress())
+        if loader.is_finished() == True:
+            self._loader = None
+            self._load_finish()
+            if done != None:
+                done(loader.get_error())
+        else:
+            # Reader is waited less often when it falls behind
+            self.after(1 if inserted == True else 10, self._load_step, loader, progress, done)
+            
+    def _load_finish(self):
+        """Makes the editor editable again and starts the undo history."""
+        self.textbox["state"] = "normal"
+        self.textbox.config(undo=True)
+        self.textbox.edit_reset()
+        self.textbox.edit_modified(False)
+        self.textbox.mark_set("insert", "1.0")
+        
+    def add_edit_listener(self, callback):
+        """Adds a callback to be called with (first line, last line, line count change) after each edit."""
+        self._edit_listeners.append(callback)
+        
+    def remove_edit_listener(self, callback):
+        """Removes a callback added with "add_edit_listener()"."""
+        self._edit_listeners.remove(callback)
+            
+    def _dispatch(self, operation, *args):
+        """Replacement for the widget's Tcl command, reports the edits to the listeners."""
+        call = self.textbox.tk.call
+        if operation not in ("insert", "delete", "replace") or len(args) == 0:
+            return call((self._original, operation) + args)
+        
+        try:
+            first = self._line(args[0])
+            lines = self._line("end")
+        except tk.TclError:
+            return call((self._original, operation) + args)
+        result = call((self._original, operation) + args)
+        
+        # Lines after the edit shift by the change in the line count
+        delta = self._line("end") - lines
+        for callback in self._edit_listeners:
+            callback(first, first + max(delta, 0), delta)
+        return result
+    
+    def _line(self, index):
+        """Returns the line number of an index using the original command."""
+        return int(str(self.textbox.tk.call(self._original, "index", index)).split('.')[0])
+        
+    def _on_undo_redo(self, _):
+        """Handler for the undo/redo events, reports the visible lines as edited after the event is handled."""
+        def _report():
+            first = self._line("@0,0")
+            last  = self._line("@0,{}".format(self.textbox.winfo_height()))
+            for callback in self._edit_listeners:
+                callback(first, last, 0)
+        self.after_idle(_report)
+        
+        
+class FileView(tk.Frame):
+    def __init__(self, *args, **kwargs):
+        """Subclass of "tk.Frame". Creates a read-only view of a text file with x and y scrolls.
+        - Made for the large generated files(ex: disassembly), only the line offsets are kept in memory
+          and the visible lines are read from the file when rendering.(see "fileloader.LineIndexer")
+        - Lines are indexed in the background, the first screen is shown right away.
+        - Assembly syntax is highlighted if the assembler's tokenizer is available.
+        
+            Available methods:
+            - open()
+            - close()
+            - goto()
+            - line_count()
+        """
+        super().__init__(*args, **kwargs)
+        
+        # Initialize view elements
+        self.config(bd=5, relief="sunken")
+        self.rowconfigure   (0, weight=1)
+        self.columnconfigure(0, weight=1)
+        
+        self.textbox = tk.Text(self, wrap="none", font=("Courier", 12), bg="#F4F4F4")
+        self.xscroll = ttk.Scrollbar(self, command=self.textbox.xview, orient="horizontal")
+        self.yscroll = ttk.Scrollbar(self, command=self._on_yscroll)
+        self.textbox.config(xscrollcommand=self.xscroll.set)
+        
+        self.textbox.grid(row=0, column=0, sticky="nwes")
+        self.xscroll.grid(row=1, column=0, sticky="ews")
+        self.yscroll.grid(row=0, column=1, sticky="ens")
+        
+        if highlighter.is_available() == True:
+            for tag, options in highlighter.TAGS.items():
+                self.textbox.tag_configure(tag, **options)
+        
+        # Set binds
+        self.textbox.bind("<Configure>"     , self._on_configure)
+        self.textbox.bind("<MouseWheel>"    , self._on_mousewheel)
+        self.textbox.bind("<Button-4>"      , self._on_mousewheel)
+        self.textbox.bind("<Button-5>"      , self._on_mousewheel)
+        self.textbox.bind("<Prior>"         , lambda _: self._scroll(-self._visible_lines))
+        self.textbox.bind("<Next>"          , lambda _: self._scroll(self._visible_lines))
+        self.textbox.bind("<Control-Home>"  , lambda _: self._scroll(-self.line_count()))
+        self.textbox.bind("<Control-End>"   , lambda _: self._scroll(self.line_count()))
+        
+        # View state
+        self._indexer       = None
+        self._top           = 0
+        self._visible_lines = 1
+        self._line_height   = tkfont.Font(font=("Courier", 12)).metrics("linespace")
+        self.textbox["state"] = "disabled"
+        
+    def open(self, file, progress=None, done=None):
+        """Opens a file, lines are indexed in the background while the view is refreshed.
+
+        Args:
+            file (str): Path of the file.
+            progress (Callable, optional): Called with the number of lines indexed so far while indexing. Defaults to None.
+            done (Callable, optional): Called with "None", or the exception if the indexing failed. Defaults to None.
+        """
+        self.close()
+        self._indexer = fileloader.LineIndexer(file=file, daemon=True)
+        self._indexer.start()
+        self._index_step(self._indexer, progress, done)
+        
+    def close(self):
+        """Closes the file and clears the view."""
+        if self._indexer != None:
+            self._indexer.stop()
+            self._indexer = None
+        self._top = 0
+        self._render()
+        
+    def goto(self, line:int):
+        """Scrolls the view to show the line(0 based) at the top."""
+        self._scroll(line - self._top)
+        
+    def line_count(self) -> int:
+        """Returns the number of lines indexed so far."""
+        return self._indexer.line_count() if self._indexer != None else 0
+        
+    def _index_step(self, indexer, progress, done):
+        """Refreshes the view while the indexer is running."""
+        if indexer != self._indexer:
+            return
+        self._render()
+        if progress != None:
+            progress(indexer.line_count())
+        if indexer.is_finished() == True:
+            if done != None:
+                done(indexer.get_error())
+        else:
+            self.after(50, self._index_step, indexer, progress, done)
+        
+    def _scroll(self, lines:int):
+        """Scrolls the view by the given number of lines."""
+        self._top = max(0, min(self._top + lines, self.line_count() - self._visible_lines))
+        self._render()
+        return "break"
+        
+    def _render(self):
+        """Reads and renders only the visible lines, updates the scrollbar."""
+        lines = self._indexer.get_lines(self._top, self._visible_lines) if self._indexer != None else []
+        
+        self.textbox["state"] = "normal"
+        self.textbox.delete("1.0", "end")
+        self.textbox.insert("end", "\n".join(lines))
+        if highlighter.is_available() == True:
+            for row, line in enumerate(lines):
+                for tag, first, last in highlighter.line_spans(line):
+                    self.textbox.tag_add(tag, f"{row+1}.{first}", f"{row+1}.{last}")
+        self.textbox["state"] = "disabled"
+        
+        total = max(1, self.line_count())
+        self.yscroll.set(self._top / total, min(1.0, (self._top + self._visible_lines) / total))
+        
+    def _on_configure(self, event):
+        """Handler for the resize event, updates the number of visible lines."""
+        self._visible_lines = max(1, event.height // self._line_height)
+        self._render()
+        
+    def _on_yscroll(self, *args):
+        """Handler for the vertical scrollbar."""
+        if args[0] == "moveto":
+            self._scroll(int(float(args[1]) * self.line_count()) - self._top)
+        elif args[0] == "scroll":
+            self._scroll(int(args[1]) * (self._visible_lines if args[2] == "pages" else 1))
+        
+    def _on_mousewheel(self, event):
+        """Handler for the mouse wheel.(3 lines per notch)"""
+        if event.num == 4 or event.delta > 0:
+            return self._scroll(-3)
+        return self._scroll(3)
+        
         
+class LineBuffer:
+    def __init__(self, maxlines:int) -> None:
+        """Ring buffer of lines, each line being a list of (text, tag) segments.
+        - Lines are numbered from the first line ever added, so the numbers stay valid while old lines are dropped.
+        - Lines can be accessed in constant time with "get()".
+
+            Methods:
+            - append()
+            - extend_last()
+            - get()
+            - first()
+            - end()
+            - clear()
+
+        Args:
+            maxlines (int): Maximum number of lines, oldest lines are dropped after that.
+        """
+        self._maxlines = maxlines
+        self._lines    = []
+        self._start    = 0
+        self._end      = 0
+
+    def append(self, line:list) -> None:
+        """Adds a new line, dropping the oldest one if the buffer is full."""
+        if len(self._lines) < self._maxlines:
+            self._lines.append(line)
+        else:
+            self._lines[self._start] = line
+            self._start = (self._start + 1) % self._maxlines
+        self._end += 1
+
+    def extend_last(self, segments:list) -> None:
+        """Adds segments to the end of the last line."""
+        self.get(self._end - 1).extend(segments)
+
+    def get(self, number:int) -> list:
+        """Returns the line with the given number.(must be between "first()" and "end()")"""
+        return self._lines[(self._start + number - self.first()) % len(self._lines)]
+
+    def first(self) -> int:
+        """Returns the number of the oldest line in the buffer."""
+        return self._end - len(self._lines)
+
+    def end(self) -> int:
+        """Returns the number after the newest line in the buffer."""
+        return self._end
+
+    def clear(self) -> None:
+        """Removes all the lines.(numbering continues)"""
+        self._lines = []
+        self._start = 0
+
+
 class Terminal(tk.Frame):
     # References
     # Example: Logging Window: https://tkdocs.com/tutorial/text.html
     # tag_config() : https://anzeljg.github.io/rin2/book2/2405/docs/tkinter/text-methods.html
-    def __init__(self, *args, func, **kwargs):  
+    def __init__(self, *args, func, maxlog:int=20000, **kwargs):  
         """Subclass of "tk.Frame". Creates a text editor window with x and y scrolls and a command entry.
         - Requires the extra argument "func", which is the function to be called when the user gives an input
+          (called from the GUI thread, so it should return quickly and do the work in the background. ex: "Interface.submit")
         - Log screen will be disabled and can't be written to, use the entry below for user inputs
+        - Logs are kept in a ring buffer of "maxlog" lines, and only the visible lines are rendered
+        - Writes are collected and rendered once per frame(~16ms)
+        - Scrollback can be searched with "ctrl+f"(enter -> older match, shift+enter -> newer match, escape -> close)
+        - Selection is kept across the renders, the view stops following the logs while there is a selection
         
             Available methods:
             - write()
             - cls()
+            - search()
         
             Available tags:
             - "normal"    
@@ -43,6 +381,7 @@ class Terminal(tk.Frame):
             - "input"     
             - "error"     
             - "exception" 
+            - "search"
         """      
         super().__init__(*args, **kwargs)
     
@@ -54,11 +393,12 @@ class Terminal(tk.Frame):
         self.scroll_log_yscroll = tk.Scrollbar(self, width=14)
         self.scroll_log_xscroll = tk.Scrollbar(self, width=14)
         self.text_input         = tk.Text(self, bg="#FAFAFA", selectbackground="#8B8B8B", height=1, pady=3, bd=2, relief="sunken")
+        self.entry_search       = tk.Entry(self, bg="#FAFAFA", font=("Courier", 11))
 
         self                   .config(bd=5, relief="sunken")
-        self.text_log          .config(xscrollcommand=self.scroll_log_xscroll.set, yscrollcommand=self.scroll_log_yscroll.set, undo=True, wrap="none")
+        self.text_log          .config(xscrollcommand=self.scroll_log_xscroll.set, undo=False, wrap="none")
         self.scroll_log_xscroll.config(command=self.text_log.xview, orient="horizontal")
-        self.scroll_log_yscroll.config(command=self.text_log.yview)
+        self.scroll_log_yscroll.config(command=self._on_log_yscroll)
         self.text_input        .config(undo=True, wrap="none", font=("Courier", 12))
 
         self.text_log          .grid(row=0, column=0, sticky="nwes")
@@ -72,52 +412,253 @@ class Terminal(tk.Frame):
         self.text_log.tag_configure("input"     , font=("Courier New"     , 12, "bold"))
         self.text_log.tag_configure("error"     , font=("Courier New"     , 11, "bold"), foreground="#BF0000")
         self.text_log.tag_configure("exception" , font=("Cooper Std Black", 11, "bold"), foreground="#BF0000", lmargin1=15)
+        self.text_log.tag_configure("search"    , background="#FFE066")
         
         # Set binds
         self.text_input.bind("<Return>" , self._on_input_enter)
         self.text_input.bind("<<Paste>>", self._on_input_paste)
         self.text_input.bind("<Up>"     , self._on_input_up_arrow)
         self.text_input.bind("<Down>"   , self._on_input_down_arrow)
+        self.text_log  .bind("<Configure>" , self._on_log_configure)
+        self.text_log  .bind("<MouseWheel>", self._on_log_mousewheel)
+        self.text_log  .bind("<Button-4>"  , self._on_log_mousewheel)
+        self.text_log  .bind("<Button-5>"  , self._on_log_mousewheel)
+        self.text_log  .bind("<Prior>"     , lambda _: self._scroll(-self._visible_lines))
+        self.text_log  .bind("<Next>"      , lambda _: self._scroll(self._visible_lines))
+        self.entry_search.bind("<Return>"      , lambda _: self.search(self.entry_search.get(), backwards=True))
+        self.entry_search.bind("<Shift-Return>", lambda _: self.search(self.entry_search.get(), backwards=False))
+        self.entry_search.bind("<Escape>"      , self._on_search_close)
+        for widget in (self.text_log, self.text_input):
+            widget.bind("<Control-f>", self._on_search_open)
         
         # Other configurations
         self._lock_write = threading.Lock()
         self.func = func
-        self.maxlog = 51        #real value is this-1
         self.maxbuffer = 11     #real value is this-1
         self.input_buffer = []
         self.input_buffer_cursor = 0
         self.text_log["state"] = "disabled"
         
+        # Log buffer and view state(top line is "None" while following the end of the logs)
+        self._lines          = LineBuffer(maxlog)
+        self._is_line_open   = False
+        self._pending        = []
+        self._is_scheduled   = False
+        self._frame_ms       = 16
+        self._top            = None
+        self._rendered_top   = None
+        self._is_pinned      = False
+        self._marks          = ({}, {})  # (marks as absolute positions, their indexes on the last render)
+        self._visible_lines  = 1
+        self._match          = None
+        self._line_height    = tkfont.Font(font=("Courier New", 12, "bold")).metrics("linespace")
+        
     def write(self, msg, tag="normal"):
         """Writes the massage onto the terminal with the given tag's font.
         - Tag defaults to normal
-        - Terminal will be scrolled to the end automatically
-        - Thread safe
+        - Terminal will be scrolled to the end automatically(unless scrolled up)
+        - Thread safe, messages are rendered with the next frame
         """
-        def _write():
-            self.text_log["state"] = "normal"
-            
-            # Log the message and scroll down
-            self.text_log.insert("end", msg, tag)
-            if tag == "exception":
-                self.text_log.insert("end", "\n\n", tag)
-            self.text_log.see("end")
-            
-            # Delete old entries to keep within maxlog
-            numlines = int(self.text_log.index("end - 1 line").split('.')[0])        
-            if numlines > self.maxlog:
-                self.text_log.delete(1.0, 1.0+(numlines-self.maxlog))
-            
-            self.text_log["state"] = "disabled"
         with self._lock_write:
-            self.after(0, _write)
+            self._pending.append((msg, tag))
+            if self._is_scheduled == False:
+                self._is_scheduled = True
+                self.after(self._frame_ms, self._flush)
     
     def cls(self):
         """Clears the logs."""
+        with self._lock_write:
+            self._pending = []
+        self._lines.clear()
+        self._is_line_open = False
+        self._top   = None
+        self._match = None
+        self._render()
+        
+    def search(self, pattern:str, backwards:bool=True) -> bool:
+        """Searches the logs for the pattern(case insensitive) starting from the last match or the view,
+        scrolls to the match and highlights it.
+
+        Args:
+            pattern (str): Text to search.
+            backwards (bool, optional): "True" to search towards the older lines. Defaults to True.
+
+        Returns:
+            (bool): "True" if a match is found.
+        """
+        pattern = pattern.lower()
+        if pattern == "":
+            return False
+        
+        # Start from the line after/before the last match, otherwise from the view's edge
+        first, end = self._lines.first(), self._lines.end()
+        if self._match != None and first <= self._match[0] < end:
+            start = self._match[0] + (-1 if backwards == True else 1)
+        else:
+            top   = self._get_top()
+            start = (top + self._visible_lines - 1) if backwards == True else top
+        
+        numbers = range(min(start, end-1), first-1, -1) if backwards == True else range(max(start, first), end)
+        for number in numbers:
+            column = "".join(text for text, _ in self._lines.get(number)).lower().find(pattern)
+            if column != -1:
+                self._match = (number, column, len(pattern))
+                self._top   = max(first, number - self._visible_lines // 2)
+                if self._top >= end - self._visible_lines:
+                    self._top = None
+                self._render()
+                return True
+        self.bell()
+        return False
+        
+    def _flush(self):
+        """Moves the pending writes into the log buffer and renders the view.(called once per frame)"""
+        with self._lock_write:
+            pending, self._pending = self._pending, []
+            self._is_scheduled = False
+        
+        for msg, tag in pending:
+            if tag == "exception":
+                msg += "\n\n"
+            parts = msg.split('\n')
+            for i, part in enumerate(parts):
+                # Every part but the last ends with a newline, empty last part means the message ended with one
+                if i == len(parts) - 1 and part == "":
+                    break
+                segments = [(part, tag)] if part != "" else []
+                if self._is_line_open == True:
+                    self._lines.extend_last(segments)
+                else:
+                    self._lines.append(segments)
+                self._is_line_open = (i == len(parts) - 1)
+        self._render()
+        
+    def _get_top(self) -> int:
+        """Returns the number of the top visible line."""
+        first, end = self._lines.first(), self._lines.end()
+        if self._top == None:
+            return max(first, end - self._visible_lines)
+        return min(max(self._top, first), max(first, end - self._visible_lines))
+        
+    def _scroll(self, lines:int):
+        """Scrolls the view by the given number of lines.(follows the end again when scrolled to the bottom)"""
+        top = self._get_top() + lines
+        self._top = top if top < self._lines.end() - self._visible_lines else None
+        self._render()
+        return "break"
+        
+    def _render(self):
+        """Renders only the visible lines of the buffer and updates the scrollbar."""
+        # Keep the selected lines in the view while following the logs, follow again once the selection is gone
+        marks = self._save_marks()
+        if self._top == None and "sel.first" in marks:
+            self._top       = self._rendered_top
+            self._is_pinned = True
+        elif self._is_pinned == True and "sel.first" not in marks:
+            self._top       = None
+            self._is_pinned = False
+        
+        first, end = self._lines.first(), self._lines.end()
+        top    = self._get_top()
+        bottom = min(end, top + self._visible_lines)
+        
         self.text_log["state"] = "normal"
-        self.text_log.delete("1.0", "end")        
+        self.text_log.delete("1.0", "end")
+        for number in range(top, bottom):
+            if number != top:
+                self.text_log.insert("end", "\n")
+            for text, tag in self._lines.get(number):
+                self.text_log.insert("end", text, tag)
+        if self._match != None and top <= self._match[0] < bottom:
+            row = self._match[0] - top + 1
+            self.text_log.tag_add("search", f"{row}.{self._match[1]}", f"{row}.{self._match[1] + self._match[2]}")
+        self._rendered_top = top
+        self._restore_marks(marks, top, bottom)
         self.text_log["state"] = "disabled"
         
+        total = max(1, end - first)
+        self.scroll_log_yscroll.set((top - first) / total, (bottom - first) / total if end > first else 1.0)
+        
+    def _save_marks(self) -> dict:
+        """Returns the selection and the selection anchors(used while dragging) as {name: (line number, column)}.
+        - Marks restored by the last render are returned as they were, so the parts out of the view aren't lost.
+        """
+        if self._rendered_top == None:
+            return {}
+        indexes = {}
+        ranges  = self.text_log.tag_ranges("sel")
+        if len(ranges) >= 2:
+            indexes["sel.first"], indexes["sel.last"] = str(ranges[0]), str(ranges[-1])
+        for name in self.text_log.mark_names():
+            if str(name).startswith("tk::anchor") == True:
+                indexes[str(name)] = self.text_log.index(name)
+        if indexes == self._marks[1]:
+            return self._marks[0]
+        
+        marks = {}
+        for name, index in indexes.items():
+            row, column = index.split(".")
+            marks[name] = (self._rendered_top + int(row) - 1, int(column))
+        return marks
+        
+    def _restore_marks(self, marks:dict, top:int, bottom:int):
+        """Restores the marks of "_save_marks()" on the rendered lines, positions out of the view are moved to its edges."""
+        def to_index(position):
+            number, column = position
+            if number < top:
+                return "1.0"
+            if number >= bottom:
+                return "end-1c"
+            return f"{number - top + 1}.{column}"
+        
+        indexes = {}
+        for name, position in marks.items():
+            if name.startswith("tk::anchor") == True:
+                self.text_log.mark_set(name, to_index(position))
+                indexes[name] = self.text_log.index(name)
+        if "sel.first" in marks:
+            start, stop = to_index(marks["sel.first"]), to_index(marks["sel.last"])
+            if self.text_log.compare(start, "<", stop) == True:
+                self.text_log.tag_add("sel", start, stop)
+                ranges = self.text_log.tag_ranges("sel")
+                indexes["sel.first"], indexes["sel.last"] = str(ranges[0]), str(ranges[-1])
+        self._marks = (marks, indexes)
+        
+    def _on_log_configure(self, event):
+        """Handler for the resize event of the log screen, updates the number of visible lines."""
+        self._visible_lines = max(1, event.height // self._line_height)
+        self._render()
+        
+    def _on_log_yscroll(self, *args):
+        """Handler for the log's vertical scrollbar."""
+        if args[0] == "moveto":
+            first, end = self._lines.first(), self._lines.end()
+            top = first + int(float(args[1]) * (end - first))
+            self._scroll(top - self._get_top())
+        elif args[0] == "scroll":
+            self._scroll(int(args[1]) * (self._visible_lines if args[2] == "pages" else 1))
+        
+    def _on_log_mousewheel(self, event):
+        """Handler for the mouse wheel on the log screen.(3 lines per notch)"""
+        if event.num == 4 or event.delta > 0:
+            return self._scroll(-3)
+        return self._scroll(3)
+        
+    def _on_search_open(self, _):
+        """Handler for "ctrl+f", shows the search entry below the terminal input."""
+        self.entry_search.grid(row=3, column=0, sticky="wes", pady=(5,0))
+        self.entry_search.focus_set()
+        self.entry_search.select_range(0, "end")
+        return "break"
+        
+    def _on_search_close(self, _):
+        """Handler for "escape" on the search entry, hides it and clears the highlight."""
+        self.entry_search.grid_remove()
+        self._match = None
+        self._render()
+        self.text_input.focus_set()
+        return "break"
+        
     def _on_input_enter(self, _):
         """Handler for "enter(return)" event on terminal input."""
         # Log user input with appropriate tags
@@ -133,12 +674,10 @@ class Terminal(tk.Frame):
             import sys
             sys.exit(0)
         else:
-            def _thread_func():
-                try:
-                    self.func(input)
-                except Exception as err:
-                    self.write(str(err), "exception")
-            threading.Thread(target=_thread_func).start()
+            try:
+                self.func(input)
+            except Exception as err:
+                self.write(str(err), "exception")
         
         # Add the input to the buffer if not empty, set cursor to None(indicates not initialized)
         self.input_buffer_cursor = None
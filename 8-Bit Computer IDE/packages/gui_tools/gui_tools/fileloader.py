@@ -0,0 +1,219 @@
+"""
+Module used to read the files for the gui widgets in the background.
+- "ChunkReader" reads a file as chunks of lines into a bounded queue, so only a few chunks are in memory at once.
+- "LineIndexer" finds the offsets of the lines in a file, so any line can be read later without keeping the file in memory.
+
+---
+
+    Available classes:
+    - ChunkReader
+    - LineIndexer
+"""
+import threading
+import queue
+from array import array
+from typing import List, Union
+
+
+class ChunkReader(threading.Thread):
+    def __init__(self, *args, file:str, chunk_lines:int=1000, max_chunks:int=8, **kwargs) -> None:
+        """Subclass of "threading.Thread" made for the gui_tools package. Reads a text file as chunks of lines.
+        - Chunks are put into a queue of "max_chunks", the thread waits while the queue is full.
+        - Use "get_chunk()" to take the chunks without blocking.
+        - Undecodable bytes are replaced, so any file can be opened.
+        - Optional arguments can be given to pass onto the "threading.Thread" superclass.
+
+            Custom methods:
+            - stop()
+            - get_chunk()
+            - is_finished()
+            - get_error()
+            - get_progress()
+
+        Args:
+            file (str): Path of the file.
+            chunk_lines (int, optional): Number of lines in a chunk. Defaults to 1000.
+            max_chunks (int, optional): Maximum number of chunks waiting in the queue. Defaults to 8.
+            *args, **kwargs: Other arguments for the "threading.Thread" superclass.
+        """
+        super().__init__(*args, target=self._reader_function, **kwargs)
+
+        self._file        = file
+        self._chunk_lines = chunk_lines
+        self._queue       = queue.Queue(maxsize=max_chunks)
+        self._error       = None
+        self._size        = 0
+        self._position    = 0
+
+        self._e_stop     = threading.Event()
+        self._e_finished = threading.Event()
+
+    def stop(self, timeout:int=3) -> None:
+        """Sets the stop flag and waits for the thread to exit.
+
+        Args:
+            timeout (int, optional): Wait timeout in seconds. Defaults to 3.
+
+        Raises:
+            RuntimeError: Raised on timeout.
+        """
+        self._e_stop.set()
+        if self.is_alive() == True:
+            self.join(timeout=float(timeout))
+            if self.is_alive() == True:
+                raise RuntimeError("Failed to stop chunk reader! -> " + str(threading.current_thread()))
+
+    def get_chunk(self) -> Union[str, None]:
+        """Returns the next chunk, "None" if there isn't one ready."""
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def is_finished(self) -> bool:
+        """Returns "True" if the whole file is read(or failed) and all the chunks are taken."""
+        return self._e_finished.is_set() == True and self._queue.empty() == True
+
+    def get_error(self) -> Union[Exception, None]:
+        """Returns the exception if the reading failed."""
+        return self._error
+
+    def get_progress(self) -> float:
+        """Returns the ratio of the file read so far.(0.0 - 1.0)"""
+        return self._position / self._size if self._size > 0 else 1.0
+
+    def _put(self, chunk:str) -> bool:
+        """Waits for room in the queue, returns "False" if stopped."""
+        while(self._e_stop.is_set() == False):
+            try:
+                self._queue.put(chunk, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decode(self, lines:List[bytes]) -> str:
+        """Joins and decodes the lines of a chunk.(undecodable bytes are replaced, line endings are converted to '\\n')"""
+        return b"".join(lines).decode(errors="replace").replace("\r\n", "\n")
+
+    def _reader_function(self) -> None:
+        """Thread function."""
+        try:
+            with open(self._file, 'rb') as f:
+                f.seek(0, 2)
+                self._size = f.tell()
+                f.seek(0)
+
+                lines = []
+                for line in f:
+                    lines.append(line)
+                    self._position += len(line)
+                    if len(lines) == self._chunk_lines:
+                        if self._put(self._decode(lines)) == False:
+                            return
+                        lines = []
+                if lines != []:
+                    self._put(self._decode(lines))
+        except OSError as err:
+            self._error = err
+        finally:
+            self._e_finished.set()
+
+
+class LineIndexer(threading.Thread):
+    def __init__(self, *args, file:str, **kwargs) -> None:
+        """Subclass of "threading.Thread" made for the gui_tools package. Indexes the line offsets of a file.
+        - Only the offsets are kept(8 bytes per line), lines are read from the file with "get_lines()".
+        - Lines can be read while indexing, "line_count()" returns the lines indexed so far.
+        - Optional arguments can be given to pass onto the "threading.Thread" superclass.
+
+            Custom methods:
+            - stop()
+            - line_count()
+            - get_lines()
+            - is_finished()
+            - get_error()
+
+        Args:
+            file (str): Path of the file.
+            *args, **kwargs: Other arguments for the "threading.Thread" superclass.
+        """
+        super().__init__(*args, target=self._indexer_function, **kwargs)
+
+        self._file    = file
+        self._offsets = array('Q', [0])
+        self._count   = 0
+        self._error   = None
+        self._lock    = threading.Lock()
+        self._reader  = None
+
+        self._e_stop     = threading.Event()
+        self._e_finished = threading.Event()
+
+    def stop(self, timeout:int=3) -> None:
+        """Sets the stop flag, waits for the thread to exit and closes the file.
+
+        Args:
+            timeout (int, optional): Wait timeout in seconds. Defaults to 3.
+
+        Raises:
+            RuntimeError: Raised on timeout.
+        """
+        self._e_stop.set()
+        if self.is_alive() == True:
+            self.join(timeout=float(timeout))
+            if self.is_alive() == True:
+                raise RuntimeError("Failed to stop line indexer! -> " + str(threading.current_thread()))
+        with self._lock:
+            if self._reader != None:
+                self._reader.close()
+                self._reader = None
+
+    def line_count(self) -> int:
+        """Returns the number of lines indexed so far."""
+        return self._count
+
+    def get_lines(self, first:int, count:int) -> List[str]:
+        """Reads the lines from the file.(without the line endings, undecodable bytes are replaced)
+
+        Args:
+            first (int): Index of the first line.
+            count (int): Number of lines to read.(limited to the lines indexed so far)
+
+        Returns:
+            (List[str]): Lines.
+        """
+        last = min(first + count, self._count)
+        if first >= last:
+            return []
+        start, end = self._offsets[first], self._offsets[last]
+        with self._lock:
+            if self._reader == None:
+                self._reader = open(self._file, 'rb')
+            self._reader.seek(start)
+            data = self._reader.read(end - start)
+        return [line.rstrip('\r') for line in data.decode(errors="replace").split('\n')[:last-first]]
+
+    def is_finished(self) -> bool:
+        """Returns "True" if the whole file is indexed(or failed)."""
+        return self._e_finished.is_set()
+
+    def get_error(self) -> Union[Exception, None]:
+        """Returns the exception if the indexing failed."""
+        return self._error
+
+    def _indexer_function(self) -> None:
+        """Thread function."""
+        try:
+            with open(self._file, 'rb') as f:
+                offset = 0
+                for line in f:
+                    if self._e_stop.is_set() == True:
+                        return
+                    offset += len(line)
+                    self._offsets.append(offset)
+                    self._count += 1
+        except OSError as err:
+            self._error = err
+        finally:
+            self._e_finished.set()
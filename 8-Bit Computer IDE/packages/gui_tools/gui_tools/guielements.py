@@ -3,6 +3,8 @@ import tkinter as tk
 
 import interface as inter
 from . import customwidgets
+from . import liveassembler
+from . import buildjob
 from . import guifunctions as gf
 
 
@@ -25,6 +27,8 @@ def init(root, externals_path: str):
     
     menu_file.add_command(label="New..."             , command=gf.menu_file_new)
     menu_file.add_command(label="Open..."            , command=gf.menu_file_open)
+    menu_file.add_command(label="Open read-only..."  , command=gf.menu_file_open_read_only)
+    menu_file.add_command(label="Memory view..."     , command=gf.menu_file_memory_view)
     menu_file.add_cascade(label="Recent files       ", menu=menu_recent_files)
     menu_file.add_command(label="Close"              , command=gf.menu_file_close)
     menu_file.add_command(label="Close all"          , command=gf.menu_file_close_all)
@@ -72,12 +76,45 @@ def init(root, externals_path: str):
     pwindow.add(editor1, minsize=200, stretch="always")
     
     # Terminal
-    interface = inter.Interface()
-    terminal = customwidgets.Terminal(pwindow, func=interface.command)
+    interface = inter.Interface(quit_enable=False)
+    terminal = customwidgets.Terminal(pwindow, func=interface.submit)
     pwindow.add(terminal, height=200, minsize=150, stretch="never")
     interface.set_output(terminal)
-    interface.ping_thread_start()
+    interface.executor_start()
     
     # -------------------------------------------------Status-------------------------------------------------
     label_status = tk.Label(root, text="Starting...", justify="right", anchor="e")
-    label_status.grid(row=2, column=0, sticky="swe", padx=10)
\ No newline at end of file
+    label_status.grid(row=2, column=0, sticky="swe", padx=10)
+    
+    # Live assembly of the editor(results are shown on the status)
+    live_assembler = None
+    if liveassembler.is_available() == True:
+        live_assembler = liveassembler.LiveAssembler(editor1, status=lambda text: label_status.config(text=text))
+    
+    # Assembler buttons' builds(progress is shown on the status)
+    build_pipeline = None
+    if buildjob.is_available() == True:
+        build_pipeline = buildjob.BuildPipeline(root, status=lambda text: label_status.config(text=text))
+    gf.init(root_obj=root, editor_obj=editor1, live_assembler_obj=live_assembler, build_pipeline_obj=build_pipeline, status_func=lambda text: label_status.config(text=text))
+    
+    # Set for "start_services()"
+    global status_label
+    global interface_obj
+    status_label  = label_status
+    interface_obj = interface
+    
+    
+def start_services(startup_time:float=None):
+    """Starts the background services of the interface, should be called after the window is shown.
+    - Port enumeration imports pyserial and the ping thread is only needed once connected(created on the first connect),
+      so neither is part of the startup time.
+
+    Args:
+        startup_time (float, optional): Time to the first frame in seconds, shown on the status. Defaults to None.
+    """
+    interface_obj.ping_thread_start(defer=True)
+    interface_obj.port_registry_start()
+    if startup_time == None:
+        status_label.config(text="Ready")
+    else:
+        status_label.config(text="Ready (started in {:.2f}s)".format(startup_time))
\ No newline at end of file
@@ -1,7 +1,58 @@
-
-
-
-
+"""
+Functions of the gui elements(menus, buttons, etc...)
+- "init()" method should be called by "guielements" to set the objects used by the functions.
+"""
+import os
+import hashlib
+import tempfile
+import tkinter as tk
+from tkinter import filedialog
+
+from . import customwidgets
+from . import memoryviewer
+from . import buildjob
+
+
+# Variables to be initialized by "init()"
+root           = None
+editor         = None
+live_assembler = None
+build_pipeline = None
+status         = None
+
+# File loaded into the editor
+current_file = None
+
+# Copies of the editor's contents built by the assembler buttons -> {path: sha1 of the written text}
+_buffer_dir    = None
+_buffer_hashes = {}
+
+
+def init(*, root_obj, editor_obj, live_assembler_obj, build_pipeline_obj, status_func) -> None:
+    """Sets the objects used by the functions.
+
+    Args:
+        root_obj (tk.Tk): Main window.
+        editor_obj (customwidgets.TextEditor): Main text editor.
+        live_assembler_obj (liveassembler.LiveAssembler): Live assembler of the editor("None" if not available).
+        build_pipeline_obj (buildjob.BuildPipeline): Build pipeline of the assembler buttons("None" if not available).
+        status_func (Callable): Called with the text to show on the status bar.
+    """
+    global root
+    global editor
+    global live_assembler
+    global build_pipeline
+    global status
+    root           = root_obj
+    editor         = editor_obj
+    live_assembler = live_assembler_obj
+    build_pipeline = build_pipeline_obj
+    status         = status_func
+
+
+# Types shown by the file dialogs
+FILE_TYPES     = [("Assembly files", "*.asm *.txt"), ("All files", "*.*")]
+HEX_FILE_TYPES = [("Hex files", "*.hex"), ("All files", "*.*")]
 
 
 # -----------------------------------------------APP MENU-----------------------------------------------
@@ -9,7 +60,66 @@ def menu_file_new():
     pass
 
 def menu_file_open():
-    pass
+    file = filedialog.askopenfilename(parent=root, filetypes=FILE_TYPES)
+    if file == "" or file == ():
+        return
+
+    name = os.path.basename(file)
+    def _done(err):
+        global current_file
+        if err != None:
+            current_file = None
+            status(f"Failed to open [{name}]! ({err})")
+        else:
+            current_file = file
+            status(f"Opened [{name}]")
+            if live_assembler != None:
+                live_assembler.assemble_now()
+    editor.load(file, progress=lambda ratio: status(f"Loading [{name}]... {ratio:.0%}"), done=_done)
+
+def menu_file_open_read_only():
+    file = filedialog.askopenfilename(parent=root, filetypes=FILE_TYPES)
+    if file == "" or file == ():
+        return
+    _open_read_only(file)
+
+def _open_read_only(file):
+    name   = os.path.basename(file)
+    window = tk.Toplevel(root)
+    window.title(f"{name} (read-only)")
+    window.geometry("800x600")
+    window.rowconfigure   (0, weight=1)
+    window.columnconfigure(0, weight=1)
+
+    view = customwidgets.FileView(window)
+    view.grid(row=0, column=0, sticky="nwes")
+    window.protocol("WM_DELETE_WINDOW", lambda: (view.close(), window.destroy()))
+
+    def _done(err):
+        if err != None:
+            status(f"Failed to open [{name}]! ({err})")
+        else:
+            status(f"Opened [{name}] -> {view.line_count()} lines")
+    view.open(file, progress=lambda count: status(f"Indexing [{name}]... {count} lines"), done=_done)
+
+def menu_file_memory_view():
+    if memoryviewer.is_available() == False:
+        status("Memory view is not available! (assembler couldn't be imported)")
+        return
+    file = filedialog.askopenfilename(parent=root, filetypes=HEX_FILE_TYPES)
+    if file == "" or file == ():
+        return
+
+    window = tk.Toplevel(root)
+    window.title(f"{os.path.basename(file)} (memory)")
+    window.geometry("600x700")
+    window.rowconfigure   (0, weight=1)
+    window.columnconfigure(0, weight=1)
+
+    viewer = memoryviewer.MemoryViewer(window, status=status)
+    viewer.grid(row=0, column=0, sticky="nwes")
+    window.protocol("WM_DELETE_WINDOW", lambda: (viewer.close(), window.destroy()))
+    viewer.load_file(file)
 
 def menu_file_recent_files():
     pass
@@ -32,8 +142,61 @@ def menu_file_exit():
 
 
 # -------------------------------------------ASEMBLER BUTTONS-------------------------------------------
+# Builds run in a worker process(see "buildjob"), pressing a button during a build cancels it
 def button_assemble():
-    print("assembling...\nrigh\nnow")
+    if build_pipeline == None:
+        status("Assembler is not available! (assembler couldn't be imported)")
+        return
+    if build_pipeline.cancel() == True:
+        return
+    if editor.is_loading() == True:
+        status("Wait for the file to be loaded!")
+        return
+
+    if current_file != None:
+        destination = os.path.splitext(current_file)[0] + ".hex"
+    else:
+        destination = filedialog.asksaveasfilename(parent=root, filetypes=HEX_FILE_TYPES, defaultextension=".hex")
+        if destination == "" or destination == ():
+            return
+    if live_assembler != None:
+        live_assembler.assemble_now()
+
+    # Editor's contents are built, not the file on the disk(it may have unsaved edits)
+    name = os.path.basename(current_file) if current_file != None else "untitled.asm"
+    try:
+        file = _write_buffer(name)
+    except OSError as err:
+        status(f"Failed to write the editor's contents! ({err})")
+        return
+    build_pipeline.build("assemble", file, destination)
+
+def _write_buffer(name:str) -> str:
+    """Writes the editor's contents to "<temp dir>/<name>" and returns its path.
+    - File is only rewritten when the contents change, so the build pipeline's cache stays valid for the same text.
+    - Includes are relative to the working directory, so the copy builds the same as the original file.
+    """
+    global _buffer_dir
+    if _buffer_dir == None:
+        _buffer_dir = tempfile.TemporaryDirectory(prefix="8bit_ide_")
+    file = os.path.join(_buffer_dir.name, name)
+    text = editor.textbox.get("1.0", "end-1c")
+    digest = hashlib.sha1(text.encode()).hexdigest()
+    if _buffer_hashes.get(file) != digest or os.path.isfile(file) == False:
+        with open(file, 'w') as f:
+            f.write(text)
+        _buffer_hashes[file] = digest
+    return file
 
 def button_disassemble():
-    print("disassembling...")
\ No newline at end of file
+    if build_pipeline == None:
+        status("Assembler is not available! (assembler couldn't be imported)")
+        return
+    if build_pipeline.cancel() == True:
+        return
+
+    file = filedialog.askopenfilename(parent=root, filetypes=HEX_FILE_TYPES)
+    if file == "" or file == ():
+        return
+    destination = os.path.splitext(file)[0] + "_disassembly.asm"
+    build_pipeline.build("disassemble", file, destination, done=lambda _: _open_read_only(destination))
@@ -0,0 +1,177 @@
+"""
+Module used to highlight the assembly syntax of a "tk.Text" widget using the assembler's tokenizer.
+- Requires "assembler_tools"(packages/assembler) to be importable, "is_available()" returns "False" otherwise.
+- Only the edited lines and the visible lines are tokenized, in a single batch after the edits.(not on the keystroke)
+
+---
+
+    Available classes/functions:
+    - Highlighter
+    - is_available()
+    - line_spans()
+"""
+import tkinter as tk
+from typing import List, Tuple
+
+try:
+    from assembler_tools.mytokenizer import TOKEN_TYPE, tokenize
+    from assembler_tools.mycodegenerator import instructions
+except ImportError:
+    tokenize = None
+
+
+# Tags used for the highlighting -> {tag: options}
+TAGS = {
+    "hl_mnemonic" : {"foreground": "#0000C6"},
+    "hl_register" : {"foreground": "#7A00A8"},
+    "hl_id"       : {},
+    "hl_literal"  : {"foreground": "#A35200"},
+    "hl_seperator": {"foreground": "#5C5C5C"},
+    "hl_invalid"  : {"foreground": "#BF0000", "underline": True},
+    "hl_comment"  : {"foreground": "#2E7D32"},
+    "hl_label"    : {"foreground": "#8A2BE2"},
+    "hl_directive": {"foreground": "#00796B"},
+    "hl_symbol"   : {"foreground": "#A35200", "underline": True},
+}
+
+# Known mnemonics and register operands of the instruction set
+if tokenize != None:
+    mnemonics = {instruction.mnemonic for instruction in instructions}
+    registers = {operand for instruction in instructions for operand in instruction.operands if operand != "*"}
+    token_tags = {TOKEN_TYPE.LITERAL  : "hl_literal"  , TOKEN_TYPE.SEPERATOR: "hl_seperator", TOKEN_TYPE.INVALID: "hl_invalid",
+                  TOKEN_TYPE.LABEL    : "hl_label"    , TOKEN_TYPE.DIRECTIVE: "hl_directive", TOKEN_TYPE.SYMBOL : "hl_symbol"}
+
+
+def is_available() -> bool:
+    """Returns "True" if the assembler's tokenizer could be imported."""
+    return tokenize != None
+
+
+def line_spans(line:str) -> List[Tuple[str, int, int]]:
+    """Returns the highlight spans of an assembly line.
+
+    Args:
+        line (str): Assembly line.(without the newline)
+
+    Returns:
+        (List[Tuple[str, int, int]]): Spans -> [(tag, start column, end column)...](0 based, end exclusive)
+    """
+    spans = []
+    is_first = True  # First token after the labels
+    for type, value, _, column, _ in tokenize(line, 0):
+        if type == TOKEN_TYPE.ID:
+            if is_first == True and value in mnemonics:
+                tag = "hl_mnemonic"
+            elif value in registers:
+                tag = "hl_register"
+            else:
+                tag = "hl_id"
+        else:
+            tag = token_tags[type]
+        spans.append((tag, column-1, column-1+len(value)))
+        is_first = is_first == True and type == TOKEN_TYPE.LABEL
+
+    comment_start = line.find(";")
+    if comment_start != -1:
+        spans.append(("hl_comment", comment_start, len(line)))
+    return spans
+
+
+class Highlighter:
+    def __init__(self, text:tk.Text, delay:int=15) -> None:
+        """Class used to highlight a "tk.Text" widget's contents incrementally.
+        - Edits are reported with "mark_dirty()"(see "TextEditor.add_edit_listener()"), so the edited lines are known
+          without comparing the contents.
+        - Edits and view changes only mark the lines as dirty, tokenizing is done once ~"delay" ms after the last one.
+        - Visible lines are highlighted when the view changes, so the lines that were never visible are never tokenized.
+          (call "view_changed()" from the widget's "yscrollcommand")
+
+            Methods:
+            - mark_dirty()
+            - view_changed()
+            - refresh()
+
+        Args:
+            text (tk.Text): Widget to highlight.
+            delay (int, optional): Delay of the batches in ms. Defaults to 15.
+        """
+        self._text         = text
+        self._delay        = delay
+        self._dirty        = None
+        self._last_view    = None
+        self._is_scheduled = False
+
+        for tag, options in TAGS.items():
+            text.tag_configure(tag, **options)
+        text.tag_raise("sel")
+        text.bind("<Configure>", lambda _: self.view_changed(), add="+")
+
+    def mark_dirty(self, first:int, last:int, delta:int) -> None:
+        """Adds the edited lines to the dirty range.(shifts the range for the lines added/removed before it)
+
+        Args:
+            first (int): First edited line.
+            last (int): Last edited line.(after the edit)
+            delta (int): Change in the line count.
+        """
+        if self._dirty != None:
+            d_first, d_last = self._dirty
+            if d_first > first:
+                d_first = max(first, d_first + delta)
+            if d_last > first:
+                d_last = max(first, d_last + delta)
+            first, last = min(first, d_first), max(last, d_last)
+        self._dirty = (first, last)
+        self._schedule()
+
+    def view_changed(self, *_) -> None:
+        """Schedules the highlighting of the visible lines."""
+        self._schedule()
+
+    def refresh(self) -> None:
+        """Highlights the visible lines again, even if the view didn't change."""
+        self._last_view = None
+        self._schedule()
+
+    def _schedule(self) -> None:
+        """Schedules a batch if there isn't one already."""
+        if self._is_scheduled == False:
+            self._is_scheduled = True
+            self._text.after(self._delay, self._update)
+
+    def _update(self) -> None:
+        """Highlights the dirty lines and the visible lines if the view changed."""
+        self._is_scheduled = False
+        try:
+            top    = int(self._text.index("@0,0").split('.')[0])
+            bottom = int(self._text.index("@0,{}".format(self._text.winfo_height())).split('.')[0])
+        except tk.TclError:
+            return
+
+        # Dirty lines far from the view are left for when they become visible
+        ranges = []
+        if self._dirty != None:
+            first, last = self._dirty
+            if last - first > 4 * (bottom - top + 1):
+                first, last = max(first, top), min(last, bottom)
+            ranges.append((first, last))
+            self._dirty = None
+        if self._last_view != (top, bottom):
+            ranges.append((top, bottom))
+            self._last_view = (top, bottom)
+
+        done = set()
+        for first, last in ranges:
+            for row in range(first, last+1):
+                if row not in done:
+                    done.add(row)
+                    self._highlight_line(row)
+
+    def _highlight_line(self, row:int) -> None:
+        """Tokenizes a line and replaces its tags."""
+        start = f"{row}.0"
+        end   = f"{row}.end"
+        for tag in TAGS:
+            self._text.tag_remove(tag, start, end)
+        for tag, first, last in line_spans(self._text.get(start, end)):
+            self._text.tag_add(tag, f"{row}.{first}", f"{row}.{last}")
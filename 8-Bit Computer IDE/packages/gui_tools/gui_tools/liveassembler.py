@@ -0,0 +1,161 @@
+"""
+Module used to assemble the editor's contents in the background while the user is typing.
+- Requires "assembler"(packages/assembler) to be importable, "is_available()" returns "False" otherwise.
+- Assembly runs in a worker process, so the GUI thread never waits for it(even for the largest programs).
+
+---
+
+    Available classes/functions:
+    - LiveAssembler
+    - is_available()
+"""
+import time
+import multiprocessing
+import concurrent.futures
+from typing import Callable, List, Tuple
+
+try:
+    import assembler
+except ImportError:
+    assembler = None
+
+
+# Latest job's generation, shared with the worker process(set by "_init_worker()")
+_generation = None
+
+
+def is_available() -> bool:
+    """Returns "True" if the assembler could be imported."""
+    return assembler != None
+
+
+def _init_worker(generation) -> None:
+    """Worker process initializer, keeps the shared generation counter."""
+    global _generation
+    _generation = generation
+
+
+def _assemble_job(generation:int, source:str) -> Tuple[int, int, List[Tuple[int, int, str, str]], float]:
+    """Worker process job. Assembles the source unless a newer job is submitted in the meantime.
+
+    Returns:
+        (Tuple[int, int, List[Tuple[int, int, str, str]], float]): (generation, instruction count, errors -> [(row, column, description, value)...], seconds)
+                                                                    or "None" if cancelled.
+    """
+    start  = time.perf_counter()
+    result = assembler.assemble_source(source, is_cancelled=lambda: _generation.value != generation)
+    if result == None:
+        return None
+
+    # Errors are sent as tuples("AssembleError" can't be pickled)
+    instructions, errors = result
+    errors = [(err.row, err.column, err.description, err.value) for err in errors]
+    return (generation, len(instructions), errors, time.perf_counter() - start)
+
+
+class LiveAssembler:
+    def __init__(self, editor:object, status:Callable=None, delay:int=400, poll:int=30) -> None:
+        """Class used to assemble a "TextEditor"'s contents in a worker process after the user stops typing.
+        - Each edit restarts the ~"delay" ms idle timer, assembly starts when it runs out.
+        - Every job gets a new generation number, an ongoing job stops as soon as a newer one is submitted
+          and the results of the older jobs are ignored.
+        - Errors are shown with the "asm_error" tag on their tokens, and summarized with the "status" callback.
+        - Results are checked every ~"poll" ms with "after", the GUI thread never waits for the worker.
+
+            Methods:
+            - assemble_now()
+            - stop()
+            - get_result()
+
+        Args:
+            editor (object): "customwidgets.TextEditor" to assemble.
+            status (Callable, optional): Called with the summary text after each assembly. Defaults to None.
+            delay (int, optional): Idle time in ms before assembling. Defaults to 400.
+            poll (int, optional): Time in ms between the result checks. Defaults to 30.
+        """
+        self._editor     = editor
+        self._text       = editor.textbox
+        self._status     = status
+        self._delay      = delay
+        self._poll       = poll
+        self._timer      = None
+        self._future     = None
+        self._result     = None
+        self._is_polling = False
+
+        self._generation = multiprocessing.Value('i', 0, lock=False)
+        self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(self._generation,))
+
+        self._text.tag_configure("asm_error", underline=True, background="#FFD6D6")
+        editor.add_edit_listener(self._on_edit)
+
+    def assemble_now(self) -> None:
+        """Starts assembling the current contents right away.(stops the ongoing job)"""
+        if self._timer != None:
+            self._text.after_cancel(self._timer)
+            self._timer = None
+
+        # Newer generation stops the ongoing job at its next check
+        self._generation.value += 1
+        source = self._text.get("1.0", "end-1c")
+        try:
+            self._future = self._pool.submit(_assemble_job, self._generation.value, source)
+        except RuntimeError:
+            return
+        self._report("Assembling...")
+        if self._is_polling == False:
+            self._is_polling = True
+            self._text.after(self._poll, self._check)
+
+    def stop(self) -> None:
+        """Stops the ongoing job and the worker process."""
+        self._generation.value += 1
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def get_result(self) -> Tuple[int, List[Tuple[int, int, str, str]]]:
+        """Returns the last result -> (instruction count, errors -> [(row, column, description, value)...]), "None" if there is none yet."""
+        return self._result
+
+    def _on_edit(self, first:int, last:int, delta:int) -> None:
+        """Edit listener, restarts the idle timer."""
+        if self._timer != None:
+            self._text.after_cancel(self._timer)
+        self._timer = self._text.after(self._delay, self.assemble_now)
+
+    def _check(self) -> None:
+        """Checks the ongoing job, shows the result when it's done."""
+        future = self._future
+        if future.done() == False:
+            self._text.after(self._poll, self._check)
+            return
+        self._future     = None
+        self._is_polling = False
+
+        try:
+            result = future.result()
+        except Exception as err:
+            self._report(f"Assembly failed! ({type(err).__name__}: {err})")
+            return
+        if result == None or result[0] != self._generation.value:
+            return
+
+        _, count, errors, seconds = result
+        self._result = (count, errors)
+        self._mark_errors(errors)
+        if errors == []:
+            self._report("Assembled: {} instructions ({:.2f}s)".format(count, seconds))
+        else:
+            row, column, description, value = errors[0]
+            more = f" (+{len(errors)-1} more)" if len(errors) > 1 else ""
+            self._report(f"{len(errors)} error(s) -> line {row}, column {column}: {description} \"{value}\"{more}")
+
+    def _mark_errors(self, errors:List[Tuple[int, int, str, str]]) -> None:
+        """Replaces the error markers."""
+        self._text.tag_remove("asm_error", "1.0", "end")
+        for row, column, _, value in errors:
+            self._text.tag_add("asm_error", f"{row}.{column-1}", f"{row}.{column-1+max(len(value), 1)}")
+
+    def _report(self, text:str) -> None:
+        """Passes the summary to the status callback."""
+        if self._status != None:
+            self._status(text)
@@ -0,0 +1,295 @@
+"""
+Module used to view the memory images(assembled programs) in the GUI.
+- Requires "assembler"(packages/assembler) to be importable, "is_available()" returns "False" otherwise.
+- Only the visible rows are rendered from the decoded image, so scrolling through all the 65536 addresses stays smooth.
+
+---
+
+    Available classes/functions:
+    - MemoryViewer
+    - is_available()
+"""
+import os
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+from typing import Callable, Dict, Tuple, Union
+
+try:
+    import assembler
+    from assembler_tools import mycodegenerator
+    from assembler_tools.sourcemap import SourceMap
+except ImportError:
+    assembler = None
+
+
+# Number of addresses in an image
+ADDRESS_COUNT = 0x10000
+
+
+def is_available() -> bool:
+    """Returns "True" if the assembler could be imported."""
+    return assembler != None
+
+
+class MemoryViewer(tk.Frame):
+    def __init__(self, *args, status:Callable=None, watch_interval:int=1000, **kwargs):
+        """Subclass of "tk.Frame". Creates a memory view with address, opcode, literal and disassembly columns.
+        - Image is either loaded from a hex file(see "load_file()") or given directly(see "set_image()").
+        - Only the visible rows are rendered, disassembly of each opcode-literal pair is generated once and cached.
+        - Loaded file is checked every ~"watch_interval" ms and reloaded when it changes.(view position is kept)
+        - "Go to" entry accepts any python integer literal(ex: 4096, 0x1000, 0b1000000000000)
+        - If the hex file has a source map next to it(same name, ".map"), source lines of the addresses are shown too.
+          (map is read into memory once and read again when it changes, so the assembler can overwrite it)
+
+            Available methods:
+            - load_file()
+            - set_image()
+            - goto()
+            - refresh()
+            - close()
+
+        Args:
+            status (Callable, optional): Called with the status text(load results, errors). Defaults to None.
+            watch_interval (int, optional): Time between the file checks in ms. Defaults to 1000.
+        """
+        super().__init__(*args, **kwargs)
+
+        # Initialize view elements
+        self.config(bd=5, relief="sunken")
+        self.rowconfigure   (1, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        frame_goto = tk.Frame(self)
+        frame_goto.grid(row=0, column=0, columnspan=2, sticky="we")
+        tk.Label(frame_goto, text="Go to:").pack(side="left")
+        self.entry_goto = tk.Entry(frame_goto, width=12, font=("Courier", 12))
+        self.entry_goto.pack(side="left")
+        self.label_header = tk.Label(frame_goto, text="", font=("Courier", 12), anchor="w")
+        self.label_header.pack(side="left", fill="x", expand=True, padx=10)
+
+        self.textbox = tk.Text(self, wrap="none", font=("Courier", 12), bg="#F4F4F4", cursor="arrow")
+        self.yscroll = ttk.Scrollbar(self, command=self._on_yscroll)
+        self.textbox.grid(row=1, column=0, sticky="nwes")
+        self.yscroll.grid(row=1, column=1, sticky="ens")
+
+        self.textbox.tag_configure("mem_empty"  , foreground="#9A9A9A")
+        self.textbox.tag_configure("mem_address", foreground="#5C5C5C")
+        self.textbox.tag_configure("mem_current", background="#FFF2A8")
+        self.textbox.tag_configure("mem_source" , foreground="#2E7D32")
+
+        # Set binds
+        self.entry_goto.bind("<Return>"  , self._on_goto_enter)
+        self.textbox.bind("<Configure>"  , self._on_configure)
+        self.textbox.bind("<MouseWheel>" , self._on_mousewheel)
+        self.textbox.bind("<Button-4>"   , self._on_mousewheel)
+        self.textbox.bind("<Button-5>"   , self._on_mousewheel)
+        self.textbox.bind("<Prior>"      , lambda _: self._scroll(-self._visible_rows))
+        self.textbox.bind("<Next>"       , lambda _: self._scroll(self._visible_rows))
+        self.textbox.bind("<Up>"         , lambda _: self._scroll(-1))
+        self.textbox.bind("<Down>"       , lambda _: self._scroll(1))
+        self.textbox.bind("<Control-Home>", lambda _: self._scroll(-ADDRESS_COUNT))
+        self.textbox.bind("<Control-End>" , lambda _: self._scroll(ADDRESS_COUNT))
+
+        # View state
+        self._status         = status
+        self._watch_interval = watch_interval
+        self._image          = bytearray(2*ADDRESS_COUNT)
+        self._mask           = bytearray(ADDRESS_COUNT)
+        self._file           = None
+        self._file_stat      = None
+        self._map_file       = None
+        self._map_stat       = None
+        self._source_map     = None
+        self._watch_timer    = None
+        self._top            = 0
+        self._current        = None
+        self._visible_rows   = 1
+        self._row_height     = tkfont.Font(font=("Courier", 12)).metrics("linespace")
+        self._asm_cache      = {}  # type: Dict[Tuple[int, int], str]
+        self.textbox["state"] = "disabled"
+        self._render()
+
+    def load_file(self, file:str) -> bool:
+        """Loads a hex file and starts watching it for changes.
+
+        Args:
+            file (str): Path of the hex file.
+
+        Returns:
+            (bool): "False" if the file couldn't be loaded.(error is passed to the status)
+        """
+        self._stop_watch()
+        self._file = file
+        is_loaded = self._reload()
+        self._watch_timer = self.after(self._watch_interval, self._watch)
+        return is_loaded
+
+    def set_image(self, image:Union[bytes, bytearray], mask:Union[bytes, bytearray]=None) -> None:
+        """Shows an in-memory image.(stops watching the loaded file)
+
+        Args:
+            image (Union[bytes, bytearray]): Opcode-literal pairs -> image[2*address] = opcode, image[2*address + 1] = literal
+            mask (Union[bytes, bytearray], optional): Non-zero for the addresses in use. Defaults to the addresses covered by the image.
+        """
+        self._stop_watch()
+        self._file     = None
+        self._map_file = None
+        self._close_map()
+        self._image = bytearray(image[:2*ADDRESS_COUNT]).ljust(2*ADDRESS_COUNT, b"\x00")
+        if mask == None:
+            mask = b"\x01" * (len(image)//2)
+        self._mask = bytearray(mask[:ADDRESS_COUNT]).ljust(ADDRESS_COUNT, b"\x00")
+        self._render()
+
+    def goto(self, address:int) -> None:
+        """Marks the address and scrolls it to the top of the view."""
+        self._current = max(0, min(address, ADDRESS_COUNT-1))
+        self._top     = self._current
+        self._scroll(0)
+
+    def refresh(self) -> None:
+        """Reloads the file(if there is one) and renders the view again."""
+        if self._file != None:
+            self._reload()
+        else:
+            self._render()
+
+    def close(self) -> None:
+        """Stops watching the file and closes its source map."""
+        self._stop_watch()
+        self._file     = None
+        self._map_file = None
+        self._close_map()
+
+    def destroy(self) -> None:
+        """Closes the file(see "close()") and destroys the widget."""
+        self.close()
+        super().destroy()
+
+    def _reload(self) -> bool:
+        """Loads the image from the file, keeps the old image on failure."""
+        try:
+            self._file_stat = self._get_stat()
+            self._image, self._mask = assembler.load_image(self._file)
+            self._map_file = os.path.splitext(self._file)[0] + ".map"
+            self._load_map()
+        except (OSError, SyntaxError) as err:
+            self._report(f"Failed to load [{os.path.basename(self._file)}]! ({err})")
+            return False
+        finally:
+            self._render()
+        self._report(f"Loaded [{os.path.basename(self._file)}] -> {sum(self._mask)} addresses")
+        return True
+
+    def _load_map(self) -> None:
+        """Reads the source map of the file again, the view is shown without the source lines if it can't be read."""
+        self._close_map()
+        self._map_stat = self._get_stat(self._map_file)
+        if self._map_stat == None:
+            return
+        try:
+            self._source_map = SourceMap(self._map_file, in_memory=True)
+        except (OSError, ValueError):
+            pass
+
+    def _close_map(self) -> None:
+        """Closes the source map."""
+        if self._source_map != None:
+            self._source_map.close()
+            self._source_map = None
+        self._map_stat = None
+
+    def _get_stat(self, file:str=None) -> Tuple[int, int]:
+        """Returns the modification time and the size of the file(loaded file by default), "None" if it doesn't exist."""
+        try:
+            stat = os.stat(self._file if file == None else file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _watch(self) -> None:
+        """Reloads the file if it changed since the last load, or only its source map if that changed."""
+        if self._get_stat() != self._file_stat:
+            self._reload()
+        elif self._map_file != None and self._get_stat(self._map_file) != self._map_stat:
+            self._load_map()
+            self._render()
+        self._watch_timer = self.after(self._watch_interval, self._watch)
+
+    def _stop_watch(self) -> None:
+        """Cancels the file check."""
+        if self._watch_timer != None:
+            self.after_cancel(self._watch_timer)
+            self._watch_timer = None
+
+    def _disassemble(self, opcode:int, literal:int) -> str:
+        """Returns the cached disassembly of the pair."""
+        key = (opcode, literal)
+        asm = self._asm_cache.get(key)
+        if asm == None:
+            asm = mycodegenerator.generate_assembly(opcode, literal)
+            asm = self._asm_cache[key] = asm if asm != None else "???"
+        return asm
+
+    def _scroll(self, rows:int):
+        """Scrolls the view by the given number of rows."""
+        self._top = max(0, min(self._top + rows, ADDRESS_COUNT - self._visible_rows))
+        self._render()
+        return "break"
+
+    def _render(self) -> None:
+        """Renders only the visible rows, updates the scrollbar."""
+        last = min(self._top + self._visible_rows, ADDRESS_COUNT)
+        self.label_header.config(text="{:<9}{:<8}{:<9}{}".format("Address", "Opcode", "Literal", "Assembly"))
+
+        source_map = self._source_map
+        self.textbox["state"] = "normal"
+        self.textbox.delete("1.0", "end")
+        for row, address in enumerate(range(self._top, last)):
+            if row > 0:
+                self.textbox.insert("end", "\n")
+            self.textbox.insert("end", "0x{:04X}   ".format(address), "mem_address")
+            if self._mask[address] == 0:
+                self.textbox.insert("end", "--      --       ", "mem_empty")
+            else:
+                opcode, literal = self._image[2*address], self._image[2*address + 1]
+                self.textbox.insert("end", "0x{:02X}    0x{:02X}     {}".format(opcode, literal, self._disassemble(opcode, literal)))
+                source = source_map.lookup(address) if source_map != None else None
+                if source != None:
+                    self.textbox.insert("end", "  ;{}:{}".format(os.path.basename(source[0]), source[1]), "mem_source")
+            if address == self._current:
+                self.textbox.tag_add("mem_current", f"{row+1}.0", f"{row+1}.end+1c")
+        self.textbox["state"] = "disabled"
+
+        self.yscroll.set(self._top / ADDRESS_COUNT, last / ADDRESS_COUNT)
+
+    def _report(self, text:str) -> None:
+        """Passes the text to the status callback."""
+        if self._status != None:
+            self._status(text)
+
+    def _on_goto_enter(self, _) -> None:
+        """Handler for the "Go to" entry."""
+        try:
+            self.goto(int(self.entry_goto.get().strip(), 0))
+        except ValueError:
+            self._report(f"Invalid address! -> \"{self.entry_goto.get()}\"")
+
+    def _on_configure(self, event) -> None:
+        """Handler for the resize event, updates the number of visible rows."""
+        self._visible_rows = max(1, event.height // self._row_height)
+        self._scroll(0)
+
+    def _on_yscroll(self, *args) -> None:
+        """Handler for the vertical scrollbar."""
+        if args[0] == "moveto":
+            self._scroll(int(float(args[1]) * ADDRESS_COUNT) - self._top)
+        elif args[0] == "scroll":
+            self._scroll(int(args[1]) * (self._visible_rows if args[2] == "pages" else 1))
+
+    def _on_mousewheel(self, event):
+        """Handler for the mouse wheel.(3 rows per notch)"""
+        if event.num == 4 or event.delta > 0:
+            return self._scroll(-3)
+        return self._scroll(3)
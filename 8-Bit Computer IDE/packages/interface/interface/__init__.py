@@ -9,7 +9,8 @@ The package can be run directly to use the terminal as the interfacing tool by:
 ---
 
 To use the package in your project, create an "interface.Interface" instance and call
-the "command" method with the users input.
+the "command" method with the users input. For GUIs, call "executor_start" once and use
+the "submit" method instead, which runs the commands in the background without blocking.
 
 Example:
     i = interface.Interface()
@@ -26,6 +27,12 @@ to keep the connection alive.
 
 Customserial: custom serial class that implements a 4-byte package communication method.
 
+Filewatcher: custom thread class that watches the asm files(inotify or polling) for the "watch"
+command, which rebuilds and uploads them through the open connection on every save.
+
+Virtualdevice: virtual programmer on a pseudo-terminal(Linux only) for testing and benchmarking
+the link without the hardware. (run "python -m interface.virtualdevice -h" for more info)
+
 ---
 
 More commands can be added by going to the "commands.py" module and follow the instructions.
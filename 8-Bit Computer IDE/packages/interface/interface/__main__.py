@@ -1,12 +1,28 @@
+import sys
+import argparse
+
 from . import interface
 
 
 def main():
+    parser = argparse.ArgumentParser(prog="interface", description="Interface for the custom 8-bit computer programmer.")
+    parser.add_argument("--script", help="file of commands to run back to back(\"-\" for the standard input), results are printed as JSON lines")
+    args = parser.parse_args()
+    
+    # Run the script and exit with an error code if any command failed
+    if args.script != None:
+        i = interface.Interface()
+        succeeded, failed = i.run_script(sys.stdin if args.script == "-" else args.script)
+        sys.exit(1 if failed > 0 else 0)
+    
     # Execute the commands on loop using the standart input&output
+    # - Commands are submitted to the executor, so the connection commands(including the "watch" rebuilds) run one at a time
     i = interface.Interface()
     i.ping_thread_start()
+    i.port_registry_start()
+    i.executor_start()
     while(1):
-        i.command(input())
+        i.submit(input())
 
 
 if __name__ == "__main__":
@@ -1,18 +1,28 @@
+import os
 import sys
 import re
+import json
+import time
 from typing import Union
 
-from .const import INTERFACE, CONN
+from .const import INTERFACE, CONN, LOG
 from . import usercommand
 from . import helptext
+from . import programmer
+from . import filewatcher
+from .programimage import ProgramImage, disassemble
+
+
+# Time in seconds "list_ports" waits for the first port enumeration
+PORT_SCAN_TIMEOUT = 5.0
 
 
 # Command functions to be used by the "UserCommand" class
 # - Interface module automatically passes "self" to the function call.
 #   use the methods from that instance for your operations.(input, log, etc...)
 # - Returning nothing is assumed to be a success, if something goes wrong return
-#   something else from the "const.INTERFACE", and/or call the "_error" from
-#   the interface.
+#   something else from the "const.INTERFACE"("CMD_FAILED" if the command just
+#   logged its error), and/or call the "_error" from the interface.
 # - DON'T USE "print"! Use the "log" method of the interface.
 # - For direct programmer commands, use "PR_*command*" naming scheme.
 def _command_quit(interface:object) -> Union[int, None]:    
@@ -20,10 +30,23 @@ def _command_quit(interface:object) -> Union[int, None]:
         sys.exit()
     else:
         interface.log("Quit command has been disabled!")
+        return INTERFACE.CMD_FAILED
 
 def _command_list_ports(interface:object) -> Union[int, None]:
+    # Use the cached ports if the registry is running(and request a new enumeration for the next call)
+    # - Waits for the first enumeration, so the ports aren't listed empty right after the start
+    registry = interface._port_registry
+    if registry != None:
+        if registry.wait_ready(PORT_SCAN_TIMEOUT) == False:
+            interface.log("Scanning ports timed out!")
+            return INTERFACE.CMD_FAILED
+        ports = registry.ports()
+        registry.refresh()
+    else:
+        ports = interface._serial_conn.serial_ports_list()
+    
     interface.log("Available ports:")
-    for port in interface._serial_conn.serial_ports_list():
+    for port in ports:
         interface.log(" > " + port)
 
 def _command_help(interface:object) -> Union[int, None]:
@@ -31,7 +54,7 @@ def _command_help(interface:object) -> Union[int, None]:
     # If user gave more than 2 arguments
     if len(interface._input) > 2:
         interface.log("Invalid help command!")
-        return
+        return INTERFACE.CMD_FAILED
     
     # Is user typed "help" on its own
     if len(interface._input) == 1:
@@ -68,56 +91,71 @@ def _command_help(interface:object) -> Union[int, None]:
         return
     
     # If user gave 2 arguments(excluding "all")
-    for command in commands:
-        if command.check_command(interface._input[1]) == True:
-            interface.log(command.get_help())
-            return
+    command = command_index.get(interface._input[1])
+    if command != None:
+        interface.log(command.get_help())
+        return
         
     # Return command not found
     interface.log("Command not found!")
-    return 
+    return INTERFACE.CMD_FAILED
     
 def _command_connect(interface:object) -> Union[int, None]:
     # User needs to give exactly 3 inputs
     if len(interface._input) != 3:
         interface.log("No valid input!")
-        return
+        return INTERFACE.CMD_FAILED
     
     # Connect to the given port with the given baud and start pinging
     interface.log(f"Trying to connect to port [{interface._input[1]}] with baud [{interface._input[2]}]!")
     try:
         interface._serial_conn.serial_start(interface._input[1], interface._input[2])
-        if interface._ping_thread != None:
+        if interface._ping_thread_get() != None:
             interface._ping_thread.go()
+        info = interface._port_registry.port_info(interface._input[1]) if interface._port_registry != None else None
+        interface._last_connection = (interface._input[1], interface._input[2], info[1] if info != None else None)
         interface.log(f"Connection successful!")
     except Exception as err:
         interface.log(f"Connection failed! (Reason: {err})")
+        return INTERFACE.CMD_FAILED
     
 def _command_disconnect(interface:object) -> Union[int, None]:
     # Disconnect from the serial port if open
     status = interface._serial_conn.serial_status()
     if status[0] == False:
         interface.log("No connection to disconnect from!")
+        return INTERFACE.CMD_FAILED
     else:
         if interface._ping_thread != None:
             interface._ping_thread.halt()
         interface._serial_conn.serial_stop()
+        interface._last_connection = None
         interface.log(f"Disconnected from port [{status[1]}] with baud [{status[2]}]!")
     
 def _command_settings(interface:object) -> Union[int, None]:
     if len(interface._input) == 4:
         if interface._input[1] == "thread" and interface._input[2] == "verbose" and interface._input[3] == "1":
-            interface._ping_thread.config(verbose=True)
+            interface._ping_thread_get().config(verbose=True)
             interface.log("Thread configured as verbose!")
             
         elif interface._input[1] == "thread" and interface._input[2] == "verbose" and interface._input[3] == "0":
-            interface._ping_thread.config(verbose=False)
+            interface._ping_thread_get().config(verbose=False)
             interface.log("Thread configured as non-verbose!")
             
+        elif interface._input[1] == "port" and interface._input[2] == "reconnect" and interface._input[3] in ("0", "1"):
+            interface._auto_reconnect = (interface._input[3] == "1")
+            interface.log("Auto-reconnect " + ("enabled!" if interface._auto_reconnect == True else "disabled!"))
+            
+        elif interface._input[1] == "log" and interface._input[2] == "level" and interface._input[3] in LOG.NAMES:
+            interface.set_log_level(LOG.NAMES[interface._input[3]])
+            interface.log(f"Log level set to [{interface._input[3]}]!", level=LOG.ERROR)
+            
         else:
-            interface.log("Invalid setting command!")       
+            interface.log("Invalid setting command!")
+            return INTERFACE.CMD_FAILED
     else:
         interface.log("Invalid setting command!")
+        return INTERFACE.CMD_FAILED
 
 def _command_connection_status(interface:object) -> Union[int, None]:
     # Print the status of the serial connection
@@ -127,12 +165,66 @@ def _command_connection_status(interface:object) -> Union[int, None]:
     else:
         interface.log(f"Connected to port [{status[1]}] with baud [{status[2]}]...")
            
+def _command_stats(interface:object) -> Union[int, None]:
+    stats = interface._serial_conn.serial_stats()
+    
+    # Reset the statistics
+    if len(interface._input) == 2 and interface._input[1] == "reset":
+        stats.reset()
+        interface.log("Link statistics reset!")
+        return
+    
+    # Export as JSON to the terminal or to the given file(raw input used to keep the path's case)
+    if len(interface._input) in (2, 3) and interface._input[1] == "json":
+        if len(interface._input) == 2:
+            interface.log(stats.to_json())
+            return
+        try:
+            with open(interface._input_raw[2], 'w') as f:
+                f.write(stats.to_json())
+            interface.log(f"Link statistics exported to [{interface._input_raw[2]}]!")
+        except OSError as err:
+            interface.log(f"Export failed! (Reason: {err})")
+            return INTERFACE.CMD_FAILED
+        return
+    
+    if len(interface._input) != 1:
+        interface.log("Invalid stats command!")
+        return INTERFACE.CMD_FAILED
+    
+    # Print the counters and the latency summary/histogram for each command
+    snapshot = stats.snapshot()
+    interface.log("Link statistics (last {:.1f}s):".format(snapshot["seconds"]))
+    interface.log(" > Packets : {} sent, {} received".format(snapshot["packets_sent"], snapshot["packets_received"]))
+    interface.log(" > Bytes   : {} sent, {} received".format(snapshot["bytes_sent"], snapshot["bytes_received"]))
+    interface.log(" > Errors  : {} timeouts, {} NACKs, {} checksum failures, {} write failures, {} retries".format(
+        snapshot["timeouts"], snapshot["nacks"], snapshot["checksum_errors"], snapshot["write_errors"], snapshot["retries"]))
+    log = interface._log_sink.stats()
+    interface.log(" > Log     : {} written, {} dropped, {} filtered, {} queued".format(log["written"], log["dropped"], log["filtered"], log["backlog"]))
+    for name, command in snapshot["commands"].items():
+        interface.log(" > {}: {} packets, min/avg/max = {:.3f}/{:.3f}/{:.3f}ms".format(
+            name, command["count"], command["min_ms"], command["avg_ms"], command["max_ms"]))
+        for row in stats.histogram_rows(command["histogram"]):
+            interface.log("   " + row)
+
+def _command_cancel(interface:object) -> Union[int, None]:
+    if interface._executor == None:
+        interface.log("Nothing to cancel!")
+        return
+    is_busy = interface._executor.is_busy()
+    dropped = interface.cancel()
+    if is_busy == False and dropped == 0:
+        interface.log("Nothing to cancel!")
+    else:
+        interface.log(f"Cancel requested! ({dropped} waiting commands dropped)")
+
 def _command_PR_ping(interface:object) -> Union[int, None]:
     if interface._serial_conn.serial_status()[0] == False:
         interface.log("Not connected!")
-        return
+        return INTERFACE.CMD_FAILED
     
-    interface._ping_thread.timer_reset()    
+    if interface._ping_thread != None:
+        interface._ping_thread.timer_reset()
     try:
         response = interface._serial_conn.serial_send_packet(CONN.CMD_PING)
     except Exception:
@@ -142,27 +234,217 @@ def _command_PR_ping(interface:object) -> Union[int, None]:
         interface.log("Command successful!")    
     elif response == CONN.TIMEOUT:
         interface.log("Response timed out!")
+        return INTERFACE.CMD_FAILED
     elif response == CONN.ERROR:
         interface.log("Failed to send packet!")
+        return INTERFACE.CMD_FAILED
     else:
         interface.log("Invalid response!")
+        return INTERFACE.CMD_FAILED
         
 def _command_PR_reset(interface:object) -> Union[int, None]:
     pass
 
+def _command_PR_upload(interface:object) -> Union[int, None]:
+    # "upload *file* full" writes every page, otherwise only the changed pages are written
+    is_full = len(interface._input) == 3 and interface._input[2] == "full"
+    image = _load_image(interface, 3 if is_full == True else 2)
+    if image == None:
+        return INTERFACE.CMD_FAILED
+    
+    # Write the changed pages and verify the image
+    interface.log(f"Uploading [{interface._input_raw[1]}] ({len(image.get_pages())} pages)...")
+    start = time.perf_counter()
+    try:
+        written, mismatches = programmer.upload(interface, image, interface._flash_records, full=is_full)
+    except programmer.ProgrammerError as err:
+        interface.log(f"Upload failed! (Reason: {err.description})")
+        return INTERFACE.CMD_CONN_ERROR if err.response == CONN.TIMEOUT else INTERFACE.CMD_FAILED
+    
+    if mismatches == []:
+        interface.log("Upload successful! ({} of {} pages written in {:.2f}s)".format(written, len(image.get_pages()), time.perf_counter() - start))
+    else:
+        _log_mismatches(interface, mismatches)
+        return INTERFACE.CMD_FAILED
+    
+def _command_PR_verify(interface:object) -> Union[int, None]:
+    image = _load_image(interface)
+    if image == None:
+        return INTERFACE.CMD_FAILED
+    interface.log(f"Verifying [{interface._input_raw[1]}] ({len(image.get_pages())} pages)...")
+    return _verify_image(interface, image)
+
+def _command_PR_watch(interface:object) -> Union[int, None]:
+    # "watch" -> status, "watch stop" -> stop, "watch now" -> rebuild and upload(also used by the watcher on changes)
+    if len(interface._input) == 1:
+        if interface._file_watcher == None:
+            interface.log("Not watching!")
+        else:
+            interface.log(f"Watching {len(interface._watch[0])} file(s) with {interface._file_watcher.backend()} -> [{interface._watch[1]}]")
+        return
+    if len(interface._input) == 2 and interface._input[1] == "stop":
+        if interface._file_watcher == None:
+            interface.log("Not watching!")
+            return INTERFACE.CMD_FAILED
+        interface._file_watcher.stop()
+        interface._file_watcher = None
+        interface._watch        = None
+        interface.log("Watch stopped!")
+        return
+    if len(interface._input) == 2 and interface._input[1] == "now":
+        return _watch_rebuild(interface)
+    
+    # "watch *file* [*file* ...]" -> start watching the asm files(raw input used to keep the paths' case)
+    if interface._file_watcher != None:
+        interface.log("Already watching! (use \"watch stop\" first)")
+        return INTERFACE.CMD_FAILED
+    if interface._serial_conn.serial_status()[0] == False:
+        interface.log("Not connected!")
+        return INTERFACE.CMD_FAILED
+    if _import_assembler() == None:
+        interface.log("Assembler is not available! (assembler couldn't be imported)")
+        return INTERFACE.CMD_FAILED
+    if interface._executor == None:
+        interface.log("Command executor isn't running! (see \"Interface.executor_start()\")")
+        return INTERFACE.CMD_FAILED
+    files       = [os.path.abspath(file) for file in interface._input_raw[1:]]
+    destination = os.path.splitext(files[0])[0] + ".hex"
+    interface._watch        = (files, destination)
+    interface._file_watcher = filewatcher.FileWatcher(files=files, callback=lambda: _watch_changed(interface), daemon=True)
+    interface._file_watcher.start()
+    interface.log(f"Watching {len(files)} file(s) with {interface._file_watcher.backend()}! (use \"watch stop\" to stop)")
+    return _watch_rebuild(interface)
+
+
+# Helper functions for the commands
+def _load_image(interface:object, input_count:int=2) -> Union[ProgramImage, None]:
+    """Loads the hex file given as the first argument, logs and returns "None" on failure."""
+    if len(interface._input) != input_count:
+        interface.log("No valid input!")
+        return None
+    if interface._serial_conn.serial_status()[0] == False:
+        interface.log("Not connected!")
+        return None
+    try:
+        return ProgramImage.from_hex(interface._input_raw[1])
+    except (OSError, ValueError) as err:
+        interface.log(f"Failed to load the hex file! (Reason: {err})")
+        return None
+
+def _verify_image(interface:object, image:ProgramImage) -> Union[int, None]:
+    """Verifies the programmer memory against the image and logs the result."""
+    start = time.perf_counter()
+    try:
+        mismatches = programmer.verify(interface, image)
+    except programmer.ProgrammerError as err:
+        interface.log(f"Verify failed! (Reason: {err.description})")
+        return INTERFACE.CMD_CONN_ERROR if err.response == CONN.TIMEOUT else INTERFACE.CMD_FAILED
+    
+    if mismatches == []:
+        interface.log("Verify successful! ({:.2f}s)".format(time.perf_counter() - start))
+    else:
+        _log_mismatches(interface, mismatches)
+        return INTERFACE.CMD_FAILED
+
+def _import_assembler() -> Union[object, None]:
+    """Returns the "assembler" module(packages/assembler), "None" if it can't be imported."""
+    try:
+        import assembler
+        return assembler
+    except ImportError:
+        return None
+
+def _watch_changed(interface:object) -> None:
+    """File watcher callback, queues the rebuild to the serial lane so it doesn't race the other connection commands.
+    - Skipped if the executor is stopped, "submit()" would run the rebuild on the watcher thread.
+    """
+    if interface._executor == None:
+        interface.log("Change ignored, command executor isn't running!")
+        return
+    interface.submit("watch now")
+
+def _watch_rebuild(interface:object) -> Union[int, None]:
+    """Builds the watched files(only the changed ones are assembled again), uploads the changed pages and restarts the computer.
+    - Logs the time from the save to the restart.
+    - Watched files are updated to the files the build depends on(included files), even if the build fails.
+    """
+    watcher = interface._file_watcher
+    if watcher == None:
+        interface.log("Not watching!")
+        return INTERFACE.CMD_FAILED
+    changed, saved_at = watcher.take_changes()
+    files, destination = interface._watch
+    if interface._serial_conn.serial_status()[0] == False:
+        interface.log("Not connected! (use \"watch now\" after connecting)")
+        return INTERFACE.CMD_FAILED
+    
+    # Build, objects of the unchanged files are reused
+    assembler = _import_assembler()
+    start = time.perf_counter()
+    try:
+        assembled, reused = assembler.build(files=files, destination=destination)
+        image = ProgramImage.from_hex(destination)
+    except (SyntaxError, OSError, ValueError) as err:
+        interface.log(f"Build failed!\n{err}")
+        return INTERFACE.CMD_FAILED
+    finally:
+        watcher.set_files(assembler.dependencies(files=files, destination=destination))
+    built = time.perf_counter()
+    
+    # Upload the changed pages through the open connection and restart the program
+    try:
+        written, mismatches = programmer.upload(interface, image, interface._flash_records)
+    except programmer.ProgrammerError as err:
+        interface.log(f"Upload failed! (Reason: {err.description})")
+        return INTERFACE.CMD_CONN_ERROR if err.response == CONN.TIMEOUT else INTERFACE.CMD_FAILED
+    if mismatches != []:
+        _log_mismatches(interface, mismatches)
+        return INTERFACE.CMD_FAILED
+    response = interface._serial_conn.serial_send_packet(CONN.CMD_RESET, retries=programmer.RETRIES)
+    if response != CONN.STATUS_ACK:
+        interface.log("Uploaded but the reset failed, program isn't restarted!")
+        return INTERFACE.CMD_CONN_ERROR if response == CONN.TIMEOUT else INTERFACE.CMD_FAILED
+    done = time.perf_counter()
+    
+    names = ", ".join(os.path.basename(file) for file in changed) if changed != [] else "initial build"
+    interface.log("Running [{}] ({} assembled, {} reused, {} of {} pages written) build: {:.0f}ms, upload: {:.0f}ms".format(
+        names, assembled, reused, written, len(image.get_pages()), (built - start)*1000, (done - built)*1000))
+    if saved_at != None:
+        interface.log("Save-to-running: {:.0f}ms".format((time.time() - saved_at)*1000))
+
+def _log_mismatches(interface:object, mismatches:list, max_lines:int=20) -> None:
+    """Logs the mismatched addresses with their disassembly."""
+    interface.log(f"Verify failed! ({len(mismatches)} mismatched addresses)")
+    for address, expected, found in mismatches[:max_lines]:
+        interface.log(" > 0x{0:04X}: expected \"{1}\", found \"{2}\"".format(address, disassemble(*expected), disassemble(*found)))
+    if len(mismatches) > max_lines:
+        interface.log(f" > ...and {len(mismatches) - max_lines} more")
+
 
 # List of commands available for the interface module
 # - To add a command: create a function above and a help text in the helptext module
 #   link them below using "UserCommand" class along with available inputs for the command.
 # - If inputs overlap with another, only the command above will be executed.
 commands = (
-    usercommand.UserCommand(inputs=["q", "quit"]                 , func=_command_quit             , help=helptext.command_quit             ),
-    usercommand.UserCommand(inputs=["lp", "list_ports"]          , func=_command_list_ports       , help=helptext.command_list_ports       ),
-    usercommand.UserCommand(inputs=["h", "help"]                 , func=_command_help             , help=helptext.command_help             ),
-    usercommand.UserCommand(inputs=["c", "connect"]              , func=_command_connect          , help=helptext.command_connect          ),
-    usercommand.UserCommand(inputs=["d", "disconnect"]           , func=_command_disconnect       , help=helptext.command_disconnect       ),
-    usercommand.UserCommand(inputs=["set", "setting", "settings"], func=_command_settings         , help=helptext.command_settings         ),
-    usercommand.UserCommand(inputs=["s", "status"]               , func=_command_connection_status, help=helptext.command_connection_status),
-    usercommand.UserCommand(inputs=["p", "ping"]                 , func=_command_PR_ping          , help=helptext.command_programmer_ping  ),
-    usercommand.UserCommand(inputs=["r", "reset"]                , func=_command_PR_reset         , help=helptext.command_programmer_reset ),
-)
\ No newline at end of file
+    usercommand.UserCommand(inputs=["q", "quit"]                 , func=_command_quit             , help=helptext.command_quit             , lane="immediate"),
+    usercommand.UserCommand(inputs=["lp", "list_ports"]          , func=_command_list_ports       , help=helptext.command_list_ports       , lane="local"    ),
+    usercommand.UserCommand(inputs=["h", "help"]                 , func=_command_help             , help=helptext.command_help             , lane="local"    ),
+    usercommand.UserCommand(inputs=["c", "connect"]              , func=_command_connect          , help=helptext.command_connect          , lane="serial"   ),
+    usercommand.UserCommand(inputs=["d", "disconnect"]           , func=_command_disconnect       , help=helptext.command_disconnect       , lane="serial"   ),
+    usercommand.UserCommand(inputs=["set", "setting", "settings"], func=_command_settings         , help=helptext.command_settings         , lane="local"    ),
+    usercommand.UserCommand(inputs=["s", "status"]               , func=_command_connection_status, help=helptext.command_connection_status, lane="local"    ),
+    usercommand.UserCommand(inputs=["stats", "statistics"]       , func=_command_stats            , help=helptext.command_stats            , lane="local"    ),
+    usercommand.UserCommand(inputs=["cancel"]                    , func=_command_cancel           , help=helptext.command_cancel           , lane="immediate"),
+    usercommand.UserCommand(inputs=["p", "ping"]                 , func=_command_PR_ping          , help=helptext.command_programmer_ping  , lane="serial"   ),
+    usercommand.UserCommand(inputs=["r", "reset"]                , func=_command_PR_reset         , help=helptext.command_programmer_reset , lane="serial"   ),
+    usercommand.UserCommand(inputs=["u", "upload"]               , func=_command_PR_upload        , help=helptext.command_programmer_upload, lane="serial"   ),
+    usercommand.UserCommand(inputs=["v", "verify"]               , func=_command_PR_verify        , help=helptext.command_programmer_verify, lane="serial"   ),
+    usercommand.UserCommand(inputs=["w", "watch"]                , func=_command_PR_watch         , help=helptext.command_programmer_watch , lane="serial"   ),
+)
+
+
+# Dictionary of inputs to their commands for the lookups(built from the list above, so it doesn't need changing)
+command_index = {}
+for command in commands:
+    for input in command.get_inputs_list():
+        command_index.setdefault(input, command)
@@ -10,6 +10,17 @@ class INTERFACE:
     CMD_SUCCESS    = 2
     CMD_NOTFOUND   = 3
     CMD_CONN_ERROR = 4
+    CMD_FAILED     = 5
+    
+    
+class LOG:
+    """Log levels of the interface output.(messages below the sink's level are filtered)"""
+    DEBUG   = 0
+    INFO    = 1
+    WARNING = 2
+    ERROR   = 3
+    
+    NAMES = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
     
     
 class CONN:
@@ -29,6 +40,32 @@ class CONN:
     CMD_CLOCK_FALL   = 0x0D
     CMD_PC_ENABLE    = 0x0E
     CMD_PC_DISABLE   = 0x0F
+    
+    # Program memory commands(only accepted in the program mode, except for the reads)
+    # - CMD_ADDRESS     -> data: 16-bit word address for the next write
+    # - CMD_WRITE       -> data: opcode-literal pair, written to the address which then increments
+    # - CMD_READ_PAGES  -> data_h: first page, data_l: page count(0 -> 256) | bulk response of the page contents
+    # - CMD_PAGE_HASHES -> data_h: first page, data_l: page count(0 -> 256) | bulk response of 32-bit CRCs(big endian)
+    # Bulk responses -> [STATUS_ACK, payload..., CRC16_high, CRC16_low](CRC-16/CCITT of the payload, initial 0xFFFF)
+    CMD_ADDRESS      = 0x10
+    CMD_WRITE        = 0x11
+    CMD_READ_PAGES   = 0x12
+    CMD_PAGE_HASHES  = 0x13
+    
+    # Capability negotiation and compressed writes
+    # - CMD_CAPABILITIES -> response is a bitmask of the "CAP_*" values(programmers that don't know the command NACK -> 0)
+    # - CMD_WRITE_LZ     -> data: length of the stream in bytes, followed by the stream and its CRC16(big endian).
+    #                       Stream is decoded(see "transfercodec") to the write address which then increments.
+    CMD_CAPABILITIES = 0x14
+    CMD_WRITE_LZ     = 0x15
+    CAP_WRITE_LZ     = 0x01
+    
+    # Program memory layout(each word is an opcode-literal pair)
+    MEMORY_WORDS = 0x10000
+    PAGE_WORDS   = 0x100
+    PAGE_BYTES   = PAGE_WORDS * 2
+    PAGE_COUNT   = MEMORY_WORDS // PAGE_WORDS
+    STREAM_PAGES = 16
 
     TIMEOUT             = -2
     ERROR               = -1
@@ -3,9 +3,11 @@ import serial.tools.list_ports
 import threading
 import time
 import atexit
+import binascii
 from typing import List, Union
 
 from .const import CONN
+from .linkstats import LinkStats
 
 
 class CustomSerial(serial.Serial):
@@ -20,13 +22,18 @@ class CustomSerial(serial.Serial):
             - serial_stop()
             - serial_ports_list()
             - serial_send_packet()
+            - serial_read_bulk()
+            - serial_send_stream()
             - serial_status()
+            - serial_stats()
             
         Args:
             *args, **kwargs: Other arguments for the "serial.Serial" superclass.
         """
         super().__init__(*args, **kwargs)
         self._serial_lock = threading.Lock()
+        self._status_lock = threading.Lock()
+        self._stats       = LinkStats()
         atexit.register(self._termination_handler)
 
     def serial_start(self, port:str, baud:str) -> None:
@@ -37,7 +44,7 @@ class CustomSerial(serial.Serial):
             port (str): Port to connect to.
             baud (str): Baud rate of the connection.
         """
-        with self._serial_lock:
+        with self._serial_lock, self._status_lock:
             self.port     = port
             self.baudrate = baud
             self.open()
@@ -46,25 +53,29 @@ class CustomSerial(serial.Serial):
         """Closes the current connection.
         - Never raises exception.
         """
-        with self._serial_lock:
+        with self._serial_lock, self._status_lock:
             self.close()
     
     def serial_ports_list(self) -> List[str]:
-        """Returns a list of all available COM ports."""
-        with self._serial_lock:
-            port_list = [str(port) for port in serial.tools.list_ports.comports()]
-        return port_list
+        """Returns a list of all available COM ports.
+        - Doesn't take the serial lock, so it won't stall an ongoing packet exchange.
+        - Enumeration can be slow, use "portregistry.PortRegistry" for a cached list.
+        """
+        return [str(port) for port in serial.tools.list_ports.comports()]
 
-    def serial_send_packet(self, cmd:int, data_h:int=0, data_l:int=0) -> int:
+    def serial_send_packet(self, cmd:int, data_h:int=0, data_l:int=0, retries:int=0, retry_nack:bool=True) -> int:
         """Sends a 4-byte package with [command, data_high, data_low, checksum] format and returns the response.
         - Checksum is automatically calculated.
         - Response times out after ~10ms.
+        - If retries are given, the package is sent again on timeout or NACK(only on timeout if "retry_nack" is "False").
         - Can raise exceptions if the write operation can't be performed.
 
         Args:
             cmd (int): Command to be sent.
             data_h (int, optional): High 8-bits of the data to be sent. Defaults to 0.
             data_l (int, optional): Low 8-bits of the data to be sent. Defaults to 0.
+            retries (int, optional): Maximum number of times to resend the package. Defaults to 0.
+            retry_nack (bool, optional): If False, NACK is returned without resending. Defaults to True.
 
         Returns:
             (int): Returns the response, "const.CONN.TIMEOUT" if times out.
@@ -75,31 +86,153 @@ class CustomSerial(serial.Serial):
         CKS = ~CKS & 0xFF
         packet = bytearray([cmd, data_h, data_l, CKS])
         
-        # Thread protected write
-        with self._serial_lock:
-            self.reset_output_buffer()
-            self.reset_input_buffer()
-            self.write(packet)
+        for attempt in range(retries+1):
+            response = self._send_packet(packet, retry=(attempt > 0))
+            if response != CONN.TIMEOUT and (response != CONN.STATUS_NACK or retry_nack == False):
+                break
+        return response
 
-            # Wait for a response
-            for _ in range(10):
-                if self.inWaiting() > 0:
-                    return self.read()[0]
-                time.sleep(0.001)
+    def serial_read_bulk(self, cmd:int, data_h:int, data_l:int, length:int, retries:int=0) -> Union[bytes, int]:
+        """Sends a 4-byte package and reads a bulk response of the given length.
+        - Bulk response format -> [STATUS_ACK, payload..., CRC16_high, CRC16_low]
+        - Payload is validated with its CRC-16, failures count as checksum errors.
+        - Timeout is calculated from the length and the baud rate.
+        - If retries are given, the package is sent again on failure.
+        - Can raise exceptions if the write operation can't be performed.
+
+        Args:
+            cmd (int): Command to be sent.
+            data_h (int): High 8-bits of the data to be sent.
+            data_l (int): Low 8-bits of the data to be sent.
+            length (int): Length of the expected payload in bytes.
+            retries (int, optional): Maximum number of times to resend the package. Defaults to 0.
+
+        Returns:
+            (Union[bytes, int]): Payload on success, otherwise the response("const.CONN.TIMEOUT" if times out, "const.CONN.ERROR" on checksum error).
+        """
+        CKS = cmd + data_h + data_l
+        CKS = (CKS >> 8) + (CKS & 0xFF)
+        CKS = ~CKS & 0xFF
+        packet = bytearray([cmd, data_h, data_l, CKS])
         
-        # Timeout
-        return CONN.TIMEOUT
+        for attempt in range(retries+1):
+            response = self._read_bulk(packet, length, retry=(attempt > 0))
+            if isinstance(response, bytes):
+                break
+        return response
+
+    def serial_send_stream(self, cmd:int, stream:bytes, retries:int=0) -> int:
+        """Sends a 4-byte package with the stream's length as data, followed by the stream and its CRC-16, and returns the response.
+        - Timeout is calculated from the length and the baud rate.
+        - If retries are given, everything is sent again on timeout or NACK.
+        - Can raise exceptions if the write operation can't be performed.
+
+        Args:
+            cmd (int): Command to be sent.
+            stream (bytes): Stream to be sent.(max 65535 bytes)
+            retries (int, optional): Maximum number of times to resend. Defaults to 0.
+
+        Returns:
+            (int): Returns the response, "const.CONN.TIMEOUT" if times out.
+        """
+        data_h, data_l = len(stream) >> 8, len(stream) & 0xFF
+        CKS = cmd + data_h + data_l
+        CKS = (CKS >> 8) + (CKS & 0xFF)
+        CKS = ~CKS & 0xFF
+        packet = bytearray([cmd, data_h, data_l, CKS]) + stream + binascii.crc_hqx(stream, 0xFFFF).to_bytes(2, "big")
+        
+        for attempt in range(retries+1):
+            response = self._send_packet(packet, retry=(attempt > 0))
+            if response != CONN.TIMEOUT and response != CONN.STATUS_NACK:
+                break
+        return response
 
     def serial_status(self) -> List[Union[bool, str, int]]:
         """Returns the status of the serial port along with the current port name and baudrate.
+        - Doesn't wait for an ongoing packet exchange.
 
         Returns:
             (list(bool, str, int)): [Port status, port name, baudrate]
         """
-        with self._serial_lock:
+        with self._status_lock:
             status = [self.is_open, self.port, self.baudrate]
         return status
     
+    def serial_stats(self) -> LinkStats:
+        """Returns the link statistics of the connection.(see the "linkstats.LinkStats" class)"""
+        return self._stats
+    
+    def _send_packet(self, packet:bytearray, retry:bool) -> int:
+        """Sends a constructed package once and returns the response while recording the statistics."""
+        # Thread protected write
+        with self._serial_lock:
+            start = time.perf_counter()
+            try:
+                self.reset_output_buffer()
+                self.reset_input_buffer()
+                self.write(packet)
+            except Exception:
+                self._stats.record_error("write_errors")
+                raise
+
+            # Wait for a response(~10ms, streams get twice their transfer time on top)
+            deadline = start + 0.01
+            if len(packet) > 4:
+                deadline += len(packet) * 10 / self.baudrate * 2
+            while(1):
+                if self.inWaiting() > 0:
+                    response = self.read()[0]
+                    self._stats.record_packet(packet[0], response, time.perf_counter() - start, sent=len(packet), retry=retry)
+                    return response
+                if time.perf_counter() > deadline:
+                    break
+                time.sleep(0.001)
+        
+        # Timeout
+        self._stats.record_packet(packet[0], CONN.TIMEOUT, time.perf_counter() - start, sent=len(packet), retry=retry)
+        return CONN.TIMEOUT
+    
+    def _read_bulk(self, packet:bytearray, length:int, retry:bool) -> Union[bytes, int]:
+        """Sends a constructed package once and reads its bulk response while recording the statistics."""
+        with self._serial_lock:
+            start = time.perf_counter()
+            try:
+                self.reset_output_buffer()
+                self.reset_input_buffer()
+                self.write(packet)
+            except Exception:
+                self._stats.record_error("write_errors")
+                raise
+            
+            # Wait for the status, then the payload and its CRC(~10ms + twice the transfer time)
+            timeout  = 0.01 + (length + 3) * 10 / self.baudrate * 2
+            deadline = start + timeout
+            received = bytearray()
+            expected = 1
+            while len(received) < expected:
+                waiting = self.in_waiting
+                if waiting > 0:
+                    received += self.read(min(waiting, expected - len(received)))
+                    if len(received) == 1 and received[0] == CONN.STATUS_ACK:
+                        expected = length + 3
+                elif time.perf_counter() > deadline:
+                    self._stats.record_packet(packet[0], CONN.TIMEOUT, time.perf_counter() - start, retry=retry)
+                    return CONN.TIMEOUT
+                else:
+                    time.sleep(0.0005)
+        
+        latency = time.perf_counter() - start
+        self._stats.record_packet(packet[0], received[0], latency, received=len(received), retry=retry)
+        if received[0] != CONN.STATUS_ACK:
+            return received[0]
+        
+        # Validate the payload
+        payload = bytes(received[1:-2])
+        if binascii.crc_hqx(payload, 0xFFFF) != (received[-2] << 8 | received[-1]):
+            self._stats.record_error("checksum_errors")
+            return CONN.ERROR
+        return payload
+    
     def _termination_handler(self) -> None:
         """Exit handler to gracefully close the connection."""
         self.serial_stop()
\ No newline at end of file
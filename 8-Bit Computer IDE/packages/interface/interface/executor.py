@@ -0,0 +1,178 @@
+import threading
+import queue
+import atexit
+from typing import Callable
+
+
+class CommandWorker(threading.Thread):
+    def __init__(self, *args, func:Callable, on_error:Callable=None, max_queue:int=64, **kwargs) -> None:
+        """Subclass of "threading.Thread" made for the interface package. Executes the submitted inputs one by one in order.
+        - Inputs are queued up to "max_queue", "submit()" returns "False" instead of blocking when the queue is full.
+        - "clear()" drops the inputs that haven't started yet.
+        - Exceptions raised by "func" are passed to "on_error" and don't stop the worker.
+        - Optional arguments can be given to pass onto the "threading.Thread" superclass.
+
+            Custom methods:
+            - stop()
+            - submit()
+            - clear()
+            - is_busy()
+            - pending()
+
+        Args:
+            func (Callable): Function to be called with each input.
+            on_error (Callable, optional): Function to be called with the exceptions of "func". Defaults to None.
+            max_queue (int, optional): Maximum number of queued inputs. Defaults to 64.
+            *args, **kwargs: Other arguments for the "threading.Thread" superclass.
+        """
+        super().__init__(*args, target=self._worker_function, **kwargs)
+
+        self._func     = func
+        self._on_error = on_error
+        self._queue    = queue.Queue(maxsize=max_queue)
+        self._e_stop   = threading.Event()
+        self._e_busy   = threading.Event()
+
+        atexit.register(self._termination_handler)
+
+    def stop(self, timeout:int=3) -> None:
+        """Drops the queued inputs, sets the stop flag and waits for the ongoing input to finish.
+
+        Args:
+            timeout (int, optional): Wait timeout in seconds. Defaults to 3.
+
+        Raises:
+            RuntimeError: Raised on timeout.
+        """
+        self._e_stop.set()
+        self.clear()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        if self.is_alive() == True:
+            self.join(timeout=float(timeout))
+            if self.is_alive() == True:
+                raise RuntimeError("Failed to stop command worker! -> " + str(threading.current_thread()))
+
+    def submit(self, input:str) -> bool:
+        """Queues an input, returns "False" if the queue is full or the worker is stopped."""
+        if self._e_stop.is_set() == True:
+            return False
+        try:
+            self._queue.put_nowait(input)
+            return True
+        except queue.Full:
+            return False
+
+    def clear(self) -> int:
+        """Drops the queued inputs and returns their count."""
+        count = 0
+        while True:
+            try:
+                self._queue.get_nowait()
+                count += 1
+            except queue.Empty:
+                return count
+
+    def is_busy(self) -> bool:
+        """Returns "True" while an input is being executed."""
+        return self._e_busy.is_set()
+
+    def pending(self) -> int:
+        """Returns the number of queued inputs."""
+        return self._queue.qsize()
+
+    def _termination_handler(self) -> None:
+        """Exit handler to gracefully stop the thread."""
+        self._on_error = None
+        self.stop()
+
+    def _worker_function(self) -> None:
+        """Thread function."""
+        while(self._e_stop.is_set() == False):
+            input = self._queue.get()
+            if input == None:
+                continue
+            self._e_busy.set()
+            try:
+                self._func(input)
+            except Exception as err:
+                if self._on_error != None:
+                    self._on_error(err)
+            finally:
+                self._e_busy.clear()
+
+
+class CommandExecutor:
+    def __init__(self, interface:object, max_queue:int=64) -> None:
+        """Class used to execute the interface commands in the background without racing on the serial connection.
+        - Commands are routed by their lane(see "UserCommand"):
+         >"serial"    -> executed in order on a single worker, so only one command uses the connection at a time\n
+         >"local"     -> executed in order on a second worker, so they can run during a long serial command\n
+         >"immediate" -> executed right away on the caller's thread(ex: "cancel")\n
+        - Each lane queues up to "max_queue" inputs, "submit()" rejects inputs beyond that instead of blocking.
+        - "cancel()" drops the queued serial commands and asks the ongoing one to stop.(see "Interface.is_cancelled()")
+
+            Methods:
+            - start()
+            - stop()
+            - submit()
+            - cancel()
+            - is_busy()
+
+        Args:
+            interface (object): Interface class object whos commands will be executed.
+            max_queue (int, optional): Maximum number of queued inputs for each lane. Defaults to 64.
+        """
+        self._interface = interface
+        self._workers   = {
+            "serial": CommandWorker(func=self._execute_serial, on_error=self._on_error, max_queue=max_queue, daemon=True),
+            "local" : CommandWorker(func=interface.command, on_error=self._on_error, max_queue=max_queue, daemon=True),
+        }
+
+    def start(self) -> None:
+        """Starts the workers."""
+        for worker in self._workers.values():
+            worker.start()
+
+    def stop(self, timeout:int=3) -> None:
+        """Cancels the ongoing command and stops the workers.(see "CommandWorker.stop()")"""
+        self._interface._e_cancel.set()
+        for worker in self._workers.values():
+            worker.stop(timeout)
+
+    def submit(self, input:str, lane:str) -> bool:
+        """Queues the input to the given lane, or executes it right away if the lane is "immediate".
+
+        Args:
+            input (str): User input as a string.
+            lane (str): Lane of the input's command.
+
+        Returns:
+            (bool): "False" if the lane's queue is full.
+        """
+        if lane == "immediate":
+            self._interface.command(input)
+            return True
+        return self._workers[lane].submit(input)
+
+    def cancel(self) -> int:
+        """Drops the queued serial commands, requests the ongoing one to stop and returns the number of dropped commands."""
+        count = self._workers["serial"].clear()
+        if self._workers["serial"].is_busy() == True:
+            self._interface._e_cancel.set()
+        return count
+
+    def is_busy(self) -> bool:
+        """Returns "True" if a command is being executed or waiting in a queue."""
+        return any(worker.is_busy() == True or worker.pending() > 0 for worker in self._workers.values())
+
+    def _execute_serial(self, input:str) -> None:
+        """Executes a serial command, the cancel request of the previous command is cleared first."""
+        self._interface._e_cancel.clear()
+        self._interface.command(input)
+
+    def _on_error(self, err:Exception) -> None:
+        """Logs the exceptions raised by the commands."""
+        self._interface.log(f"Command failed! ({type(err).__name__}: {err})")
@@ -0,0 +1,246 @@
+import os
+import time
+import select
+import struct
+import threading
+import atexit
+from typing import Callable, Iterable, List, Tuple, Union
+
+
+# inotify constants(see "man inotify")
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO    = 0x00000080
+IN_CREATE      = 0x00000100
+IN_Q_OVERFLOW  = 0x00004000
+IN_IGNORED     = 0x00008000
+
+# Directory events that mean a watched file is saved(editors either rewrite the file or replace it with a new one)
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# Header of each inotify event -> (watch descriptor, mask, cookie, name length)
+_EVENT = struct.Struct("iIII")
+
+
+def _load_inotify() -> Union[object, None]:
+    """Returns the C library if it has inotify(Linux), "None" otherwise."""
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if hasattr(libc, "inotify_init1") == False:
+            return None
+        return libc
+    except (ImportError, OSError):
+        return None
+
+
+class FileWatcher(threading.Thread):
+    def __init__(self, *args, files:Iterable[str], callback:Callable, debounce:float=0.1, interval:float=0.25, use_inotify:bool=True, **kwargs) -> None:
+        """Subclass of "threading.Thread" made for the interface package. Watches files and reports their changes.
+        - Uses inotify(Linux, through "ctypes") on the directories of the files, so the thread sleeps until a file is saved.
+          Falls back to checking the modification time and size of the files every ~"interval" seconds.
+        - Changes are debounced, "callback()" is called from the thread once no change is seen for "debounce" seconds,
+          so an editor saving in several steps(or saving many files at once) triggers a single call.
+        - Changed files are collected until "take_changes()" is called, the callback doesn't receive them.
+        - Optional arguments can be given to pass onto the "threading.Thread" superclass.
+
+            Custom methods:
+            - stop()
+            - set_files()
+            - take_changes()
+            - backend()
+
+        Args:
+            files (Iterable[str]): Files to watch.
+            callback (Callable): Called with no arguments after the changes settle.
+            debounce (float, optional): Quiet time in seconds before the callback. Defaults to 0.1.
+            interval (float, optional): Time between the checks in seconds when polling. Defaults to 0.25.
+            use_inotify (bool, optional): If False, always polls. Defaults to True.
+            *args, **kwargs: Other arguments for the "threading.Thread" superclass.
+        """
+        super().__init__(*args, target=self._watcher_function, **kwargs)
+
+        self._callback = callback
+        self._debounce = debounce
+        self._interval = interval
+        self._lock     = threading.Lock()
+        self._files    = {}  # {path: (modification time, size) or "None" if missing}
+        self._changes  = {}  # {path: modification time(seconds since epoch) or "None" if missing}
+
+        self._e_stop  = threading.Event()
+        self._e_wake  = threading.Event()
+
+        # inotify state("None" -> polling)
+        self._libc    = _load_inotify() if use_inotify == True else None
+        self._fd      = None
+        self._wake_r  = None
+        self._wake_w  = None
+        self._watches = {}  # {watch descriptor: directory}
+        if self._libc != None:
+            fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                self._libc = None
+            else:
+                self._fd = fd
+                self._wake_r, self._wake_w = os.pipe()
+
+        self.set_files(files)
+        atexit.register(self._termination_handler)
+
+    def stop(self, timeout:int=3) -> None:
+        """Sets the stop flag and waits for the thread to exit.
+
+        Args:
+            timeout (int, optional): Wait timeout in seconds. Defaults to 3.
+
+        Raises:
+            RuntimeError: Raised on timeout.
+        """
+        self._e_stop.set()
+        self._wake()
+        if self.is_alive() == True:
+            self.join(timeout=float(timeout))
+            if self.is_alive() == True:
+                raise RuntimeError("Failed to stop file watcher! -> " + str(threading.current_thread()))
+        self._close()
+
+    def set_files(self, files:Iterable[str]) -> None:
+        """Replaces the watched files.(ex: after the included files of a source change)"""
+        paths = [os.path.abspath(file) for file in files]
+        with self._lock:
+            self._files = {path: self._files[path] if path in self._files else _stat(path) for path in paths}
+            directories = {os.path.dirname(path) for path in paths}
+
+        # Watch the new directories, remove the others
+        if self._fd != None:
+            for wd, directory in list(self._watches.items()):
+                if directory not in directories:
+                    self._libc.inotify_rm_watch(self._fd, wd)
+                    del self._watches[wd]
+            for directory in directories - set(self._watches.values()):
+                wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+                if wd >= 0:
+                    self._watches[wd] = directory
+        self._wake()
+
+    def take_changes(self) -> Tuple[List[str], Union[float, None]]:
+        """Returns the files changed since the last call and clears them.
+
+        Returns:
+            (Tuple[List[str], Union[float, None]]): (changed files, latest modification time of them as "time.time()"
+                                                    -> time of the save, "None" if there are no changes)
+        """
+        with self._lock:
+            changes, self._changes = self._changes, {}
+        times = [modified for modified in changes.values() if modified != None]
+        return (sorted(changes), max(times) if times != [] else (time.time() if changes != {} else None))
+
+    def backend(self) -> str:
+        """Returns the method used to detect the changes.("inotify" or "polling")"""
+        return "inotify" if self._fd != None else "polling"
+
+    def _wake(self) -> None:
+        """Wakes the thread up.(to stop, or to use the new files)"""
+        self._e_wake.set()
+        if self._wake_w != None:
+            try:
+                os.write(self._wake_w, b"\x00")
+            except OSError:
+                pass
+
+    def _close(self) -> None:
+        """Closes the inotify descriptors."""
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            if fd != None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._fd, self._wake_r, self._wake_w = None, None, None
+
+    def _record(self, paths:Iterable[str]) -> bool:
+        """Records the changes of the watched files, returns "True" if any of them really changed."""
+        is_changed = False
+        with self._lock:
+            for path in paths:
+                if path not in self._files:
+                    continue
+                current = _stat(path)
+                if current == self._files[path]:
+                    continue
+                self._files[path]   = current
+                self._changes[path] = current[0] / 1e9 if current != None else None
+                is_changed = True
+        return is_changed
+
+    def _wait_inotify(self, timeout:Union[float, None]) -> List[str]:
+        """Waits for the inotify events, returns the paths of the events."""
+        readable, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+        if self._wake_r in readable:
+            os.read(self._wake_r, 4096)
+        if self._fd not in readable:
+            return []
+
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return []
+        paths  = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name    = data[offset+_EVENT.size:offset+_EVENT.size+length].split(b"\x00")[0]
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, check every file
+                with self._lock:
+                    paths += list(self._files)
+            elif mask & IN_IGNORED == 0 and name != b"":
+                directory = self._watches.get(wd)
+                if directory != None:
+                    paths.append(os.path.join(directory, os.fsdecode(name)))
+        return paths
+
+    def _wait_polling(self, timeout:Union[float, None]) -> List[str]:
+        """Waits for the next check, returns the watched files."""
+        self._e_wake.wait(self._interval if timeout == None else min(self._interval, timeout))
+        self._e_wake.clear()
+        with self._lock:
+            return list(self._files)
+
+    def _termination_handler(self) -> None:
+        """Exit handler to gracefully stop the thread."""
+        self._callback = None
+        self.stop()
+
+    def _watcher_function(self) -> None:
+        """Thread function."""
+        deadline = None
+        while(self._e_stop.is_set() == False):
+            timeout = None if deadline == None else max(0.0, deadline - time.monotonic())
+            if self._fd != None:
+                paths = self._wait_inotify(timeout)
+            else:
+                paths = self._wait_polling(timeout)
+            if self._e_stop.is_set() == True:
+                break
+
+            if self._record(paths) == True:
+                deadline = time.monotonic() + self._debounce
+            elif deadline != None and time.monotonic() >= deadline:
+                deadline = None
+                callback = self._callback
+                if callback != None:
+                    try:
+                        callback()
+                    except Exception:
+                        pass
+
+
+def _stat(path:str) -> Union[Tuple[int, int], None]:
+    """Returns the (modification time in ns, size) of a file, "None" if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
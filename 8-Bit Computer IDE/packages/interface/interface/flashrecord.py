@@ -0,0 +1,66 @@
+import os
+import json
+import threading
+from typing import Dict, Union
+
+
+# Default file for the records(in the user's home directory)
+default_file = os.path.join(os.path.expanduser("~"), ".interface", "flash_records.json")
+
+
+class FlashRecords:
+    def __init__(self, file:str=default_file) -> None:
+        """Class used to remember the last image programmed through each port as page hashes.
+        - Records are saved as JSON -> {port: {page: hash, ...}, ...}
+        - A missing or unreadable file is treated as having no records.
+        - All methods are thread safe.
+
+            Methods:
+            - get()
+            - update()
+            - forget()
+
+        Args:
+            file (str, optional): Path of the records file. Defaults to "~/.interface/flash_records.json".
+        """
+        self._file    = file
+        self._lock    = threading.Lock()
+        self._records = None
+
+    def get(self, port:str) -> Union[Dict[int, int], None]:
+        """Returns the page hashes of the port's last programmed image, "None" if the board's state is unknown."""
+        with self._lock:
+            record = self._load().get(port)
+            return dict(record) if record != None else None
+
+    def update(self, port:str, hashes:Dict[int, int]) -> None:
+        """Updates the port's record with the given page hashes(other pages remain unchanged) and saves it."""
+        with self._lock:
+            records = self._load()
+            records.setdefault(port, {}).update(hashes)
+            self._save()
+
+    def forget(self, port:str) -> None:
+        """Removes the port's record, so the board's state is read back on the next upload."""
+        with self._lock:
+            if self._load().pop(port, None) != None:
+                self._save()
+
+    def _load(self) -> Dict[str, Dict[int, int]]:
+        """Loads the records from the file once and returns them."""
+        if self._records == None:
+            try:
+                with open(self._file, 'r') as f:
+                    self._records = {port: {int(page): h for page, h in record.items()} for port, record in json.load(f).items()}
+            except (OSError, ValueError, AttributeError):
+                self._records = {}
+        return self._records
+
+    def _save(self) -> None:
+        """Saves the records to the file.(failing to save only loses the records)"""
+        try:
+            os.makedirs(os.path.dirname(self._file), exist_ok=True)
+            with open(self._file, 'w') as f:
+                json.dump(self._records, f)
+        except OSError:
+            pass
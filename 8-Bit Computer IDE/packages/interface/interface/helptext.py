@@ -13,10 +13,36 @@ command_quit              = ("- Stands for: Quit\n"+
 command_list_ports        = ("- Stands for: List ports\n"+
                                   "- Description: Lists all available ports.")
 
+command_stats             = ("- Stands for: Statistics\n"+
+                                  "- Description: Shows the serial link statistics and latency histograms.\n"+
+                                  "- Usage: \"stats\" -> show, \"stats reset\" -> reset, \"stats json *file*\" -> export as JSON\n"+
+                                  "  (\"stats json\" without a file prints the JSON to the terminal)")
+
+command_cancel            = ("- Stands for: Cancel\n"+
+                                  "- Description: Stops the ongoing programmer command and drops the waiting ones.\n"+
+                                  "- Usage: \"cancel\" (long operations like \"upload\" stop at their next page)")
+
 command_help              = "No information is available yet!"
 command_connect           = "No information is available yet!"
 command_disconnect        = "No information is available yet!"
 command_settings          = "No information is available yet!"
 command_connection_status = "No information is available yet!"
 command_programmer_ping   = "No information is available yet!"
-command_programmer_reset  = "No information is available yet!"
\ No newline at end of file
+command_programmer_reset  = "No information is available yet!"
+
+command_programmer_upload = ("- Stands for: Upload\n"+
+                                  "- Description: Writes a hex file into the program memory and verifies it.\n"+
+                                  "- Usage: \"upload *file*\" -> only writes the pages that changed since the last upload\n"+
+                                  "         \"upload *file* full\" -> writes every page")
+
+command_programmer_verify = ("- Stands for: Verify\n"+
+                                  "- Description: Compares the program memory with a hex file using page hashes.\n"+
+                                  "- Usage: \"verify *file*\" (only the differing pages are read back, mismatches are\n"+
+                                  "  shown with their disassembly)")
+
+command_programmer_watch  = ("- Stands for: Watch\n"+
+                                  "- Description: Rebuilds and uploads the asm files on every save, then restarts the computer.\n"+
+                                  "- Usage: \"watch *file* [*file* ...]\" -> start(hex file is written next to the first file)\n"+
+                                  "         \"watch stop\" -> stop, \"watch now\" -> rebuild right away, \"watch\" -> status\n"+
+                                  "  (needs an open connection and the command executor, only the changed files are assembled and the\n"+
+                                  "   changed pages written)")
@@ -1,10 +1,14 @@
 import sys
 import threading
+import json
+import time
+from typing import Iterable, Tuple, Union
 
-from .const import INTERFACE, CONN
+from .const import INTERFACE, CONN, LOG
 from .      import commands
-from .      import pingthread
-from .      import customserial
+from .      import flashrecord
+from .      import logsink
+from .      import executor
 
 
 class Interface:
@@ -13,25 +17,59 @@ class Interface:
         - Will use the same command set, but multiple instances will work seperately as well.
         - Output set to "sys.stdout"(default) will use the main terminal for interfacing.
         - Implements "pingthread" which will ping the programmer when there hasn't been an active communication for a while.
+        - Serial connection(and pyserial) is only loaded when it's first used, the ping thread can be deferred until the
+          first connection too(see "ping_thread_start()"), so creating an interface is cheap.
+        - Output is written in batches by a "logsink" thread, so logging doesn't block the callers.
+        - "submit()" executes the commands in the background using "executor.CommandExecutor"(see "executor_start()"),
+          inputs are kept per thread so commands running at the same time don't overwrite each other's.
         
             Methods:
             - command()
+            - submit()
+            - cancel()
+            - is_cancelled()
+            - run_script()
             - log()
+            - flush_log()
+            - set_log_level()
             - set_output()
             - ping_start()
             - ping_thread_start()
             - ping_thread_stop()
+            - port_registry_start()
+            - port_registry_stop()
+            - executor_start()
+            - executor_stop()
 
         Args:
             output (object, optional): Output object whos "write" method will be called when printing. Defaults to sys.stdout.
             quit_enable (bool, optional): Enables or disables the "quit" command.(wouldnt' want interface to quit when using a gui or etc...) Defaults to True.
         """
-        self._output      = output
+        self._local       = threading.local()
         self._input       = ""
+        self._input_raw   = ""
         self._quit_enable = quit_enable
         self._ping_thread = None
-        self._serial_conn = customserial.CustomSerial()        
-        self._lock        = threading.Lock()
+        self._ping_deferred   = False
+        self._port_registry   = None
+        self._auto_reconnect  = False
+        self._last_connection = None
+        self._flash_records   = flashrecord.FlashRecords()
+        self._file_watcher    = None
+        self._watch           = None
+        self._serial          = None
+        self._executor    = None
+        self._e_cancel    = threading.Event()
+        self._log_sink    = logsink.LogSink(output=output, daemon=True)
+        self._log_sink.start()
+        
+    @property
+    def _serial_conn(self) -> object:
+        """Serial connection("customserial.CustomSerial"), created on the first use."""
+        if self._serial == None:
+            from . import customserial
+            self._serial = customserial.CustomSerial()
+        return self._serial
         
     def command(self, input:str) -> None:
         """Takes a user input and finds a matching command, if found executes its function.
@@ -40,61 +78,278 @@ class Interface:
             input (str): User input as a string.
         """
         # Skip if user only pressed enter
-        if len(input) == 0:
+        if len(input.split()) == 0:
             return
-        else:
-            self._input = input.lower().split()
+        
+        self._execute(input)
+        
+        # Log another newline before exiting
+        self.log("")
+        
+    @property
+    def _input(self) -> list:
+        """Split and lowercased input of the command running on the current thread."""
+        return getattr(self._local, "input", "")
+    
+    @_input.setter
+    def _input(self, value:list) -> None:
+        self._local.input = value
+        
+    @property
+    def _input_raw(self) -> list:
+        """Split input of the command running on the current thread.(case preserved)"""
+        return getattr(self._local, "input_raw", "")
+    
+    @_input_raw.setter
+    def _input_raw(self, value:list) -> None:
+        self._local.input_raw = value
+        
+    @property
+    def _capture(self) -> Union[list, None]:
+        """Output captured by "run_script()" on the current thread, "None" if not capturing.(other threads log normally)"""
+        return getattr(self._local, "capture", None)
     
-        # Check for each command
-        result = INTERFACE.CMD_NOTFOUND
-        for command in commands.commands:
-            if command.check_command(self._input[0]) == True:
-                result = command.execute(self)
+    @_capture.setter
+    def _capture(self, value:Union[list, None]) -> None:
+        self._local.capture = value
+        
+    def submit(self, input:str) -> bool:
+        """Queues a user input to be executed in the background, never blocks.
+        - Commands that use the connection run one at a time in order, others can run alongside them.(see "UserCommand")
+        - Executes the input right away if the executor isn't running.
+
+        Args:
+            input (str): User input as a string.
+
+        Returns:
+            (bool): "False" if the input is dropped because too many commands are waiting.
+        """
+        words = input.lower().split()
+        if len(words) == 0:
+            return True
+        if self._executor == None:
+            self.command(input)
+            return True
+        
+        # Unknown commands go to the local lane to print the error message
+        command = commands.command_index.get(words[0])
+        lane    = command.get_lane() if command != None else "local"
+        if self._executor.submit(input, lane) == False:
+            self.log(f"Too many commands waiting, input dropped! ({input})", level=LOG.WARNING)
+            return False
+        return True
+        
+    def cancel(self) -> int:
+        """Drops the waiting connection commands and stops the ongoing one at its next step. Returns the number of dropped commands."""
+        if self._executor == None:
+            return 0
+        return self._executor.cancel()
+        
+    def is_cancelled(self) -> bool:
+        """Returns "True" if the ongoing command is requested to stop.(long operations should check it regularly)"""
+        return self._e_cancel.is_set()
+        
+    def run_script(self, script:Union[str, Iterable[str]]) -> Tuple[int, int]:
+        """Executes the commands of a script back to back and writes the results as JSON lines to the output.
+        - Empty lines and lines starting with '#' are skipped.
+        - Output of each command is collected and written once as -> {"line", "command", "result", "output", "ms"}
+          (only the output of the script's thread is collected, other threads' messages are logged as usual)
+          ("result" is one of "ok", "failed", "not_found", "conn_error" or "exception")
+        - Commands are not followed by the empty line of the "command()" method.
+
+        Args:
+            script (Union[str, Iterable[str]]): Path of the script file, or an iterable of command lines.
+
+        Returns:
+            (Tuple[int, int]): (number of successful commands, number of failed commands)
+        """
+        if isinstance(script, str):
+            with open(script, 'r') as f:
+                return self.run_script(f)
+        
+        results = {INTERFACE.CMD_SUCCESS: "ok", None: "ok", INTERFACE.CMD_FAILED: "failed",
+                   INTERFACE.CMD_NOTFOUND: "not_found", INTERFACE.CMD_CONN_ERROR: "conn_error"}
+        succeeded, failed = 0, 0
+        for i_line, line in enumerate(script):
+            line = line.strip()
+            if line == "" or line.startswith("#"):
+                continue
+            
+            # Execute the command while collecting its output
+            self._capture = []
+            start = time.perf_counter()
+            try:
+                result = results.get(self._execute(line), "failed")
+            except SystemExit:
+                self._capture = None
                 break
+            except Exception as err:
+                self._capture.append(f"{type(err).__name__}: {err}\n")
+                result = "exception"
+            elapsed = time.perf_counter() - start
+            output, self._capture = self._capture, None
+            
+            if result == "ok":
+                succeeded += 1
+            else:
+                failed += 1
+            self.log(json.dumps({"line": i_line+1, "command": line, "result": result,
+                                 "output": "".join(output).splitlines(), "ms": round(elapsed*1000, 3)}))
+        self.flush_log()
+        return (succeeded, failed)
+        
+    def _execute(self, input:str) -> Union[int, None]:
+        """Finds the matching command for the input, executes it, handles its result and returns it."""
+        self._input     = input.lower().split()
+        self._input_raw = input.split()
+    
+        # Look up the command
+        result  = INTERFACE.CMD_NOTFOUND
+        command = commands.command_index.get(self._input[0])
+        if command != None:
+            result = command.execute(self)
             
         # Check for responses
-        if result == INTERFACE.CMD_SUCCESS or result == None:
+        if result == INTERFACE.CMD_SUCCESS or result == INTERFACE.CMD_FAILED or result == None:
             pass
         elif result == INTERFACE.CMD_NOTFOUND:
             self.log("Invalid command! (Type \"help all\" to see the available commands.)")
         elif result == INTERFACE.CMD_CONN_ERROR:
-            self._ping_thread.halt()
+            if self._ping_thread != None:
+                self._ping_thread.halt()
             self._serial_conn.serial_stop()
-            self.log("Connection terminated!")
-        
-        # Log another newline before exiting
-        self.log("")
+            self.log("Connection terminated!", level=LOG.ERROR)
+        return result
         
-    def log(self, msg:str, end:str='\n') -> None:
+    def log(self, msg:str, end:str='\n', level:int=LOG.INFO) -> None:
         """Mimics the built in "print" function but uses the interface output instead.
-        - Thread safe.
+        - Thread safe and doesn't block, message is queued to the log sink.(see "flush_log()")
 
         Args:
             msg (str): Message to print.
             end (str, optional): String to printed after the message. Defaults to '\n'.
+            level (int, optional): "const.LOG" value of the message. Defaults to "LOG.INFO".
         """
-        with self._lock:
-            self._output.write(msg)
-            self._output.write(end)
+        capture = self._capture
+        if capture != None:
+            capture.append(msg + end)
+            return
+        self._log_sink.put(msg + end, level)
+        
+    def flush_log(self, timeout:float=1.0) -> bool:
+        """Waits until the logged messages are written to the output. Returns "False" on timeout."""
+        return self._log_sink.flush(timeout)
+        
+    def set_log_level(self, level:int) -> None:
+        """Sets the minimum level("const.LOG" value) of the messages to print."""
+        self._log_sink.set_level(level)
         
     def set_output(self, output) -> None:
         """Changes the output.(The object whos "write()" method will be called for printing.)"""
-        self._output = output
+        self._log_sink.set_output(output)
         
-    def ping_thread_start(self):
-        """Starts a new pingthread. Raises exceptions if one is already running."""
-        if self._ping_thread != None:
+    def ping_thread_start(self, defer:bool=False):
+        """Starts a new pingthread. Raises exceptions if one is already running.
+
+        Args:
+            defer (bool, optional): If "True", the thread is only created when it's first needed(on the first connection). Defaults to False.
+        """
+        if self._ping_thread != None or self._ping_deferred == True:
             raise RuntimeError("Pingthread is already running!")
-        self._ping_thread = pingthread.PingThread(interface=self, daemon=True)
-        self._ping_thread.start()
+        if defer == True:
+            self._ping_deferred = True
+        else:
+            self._ping_thread_create()
                 
     def ping_thread_stop(self):
         """Stops the ongoing pingthread. Raises exceptions the thread isn't running."""
-        if self._ping_thread == None:
-            raise RuntimeError("No running pingthread!")            
-        self._ping_thread.stop()
-        self._ping_thread = None
+        if self._ping_thread == None and self._ping_deferred == False:
+            raise RuntimeError("No running pingthread!")
+        self._ping_deferred = False
+        if self._ping_thread != None:
+            self._ping_thread.stop()
+            self._ping_thread = None
+        
+    def _ping_thread_create(self):
+        """Creates and starts the pingthread.(starts halted)"""
+        from . import pingthread
+        self._ping_deferred = False
+        self._ping_thread = pingthread.PingThread(interface=self, daemon=True)
+        self._ping_thread.start()
+        
+    def _ping_thread_get(self):
+        """Returns the pingthread, creates the deferred one first if needed. "None" if no pingthread is started."""
+        if self._ping_thread == None and self._ping_deferred == True:
+            self._ping_thread_create()
+        return self._ping_thread
+        
+    def port_registry_start(self, interval:float=1.0, **kwargs):
+        """Starts a new port registry that enumerates the ports in the background. Raises exceptions if one is already running.
+        - "list_ports" command uses the cached ports of the registry when it's running.
+        - Port changes are logged, and are used to reconnect automatically if enabled.(see "settings" command)
+
+        Args:
+            interval (float, optional): Time between enumerations in seconds. Defaults to 1.0.
+            **kwargs: Other arguments for the "portregistry.PortRegistry" class.
+        """
+        if self._port_registry != None:
+            raise RuntimeError("Port registry is already running!")
+        from . import portregistry
+        self._port_registry = portregistry.PortRegistry(interval=interval, daemon=True, **kwargs)
+        self._port_registry.subscribe(self._on_ports_changed)
+        self._port_registry.start()
+
+    def port_registry_stop(self):
+        """Stops the ongoing port registry. Raises exceptions the registry isn't running."""
+        if self._port_registry == None:
+            raise RuntimeError("No running port registry!")
+        self._port_registry.stop()
+        self._port_registry = None
+
+    def executor_start(self, max_queue:int=64):
+        """Starts the command executor used by "submit()". Raises exceptions if one is already running.
+
+        Args:
+            max_queue (int, optional): Maximum number of waiting commands for each lane. Defaults to 64.
+        """
+        if self._executor != None:
+            raise RuntimeError("Executor is already running!")
+        self._executor = executor.CommandExecutor(self, max_queue=max_queue)
+        self._executor.start()
+
+    def executor_stop(self):
+        """Stops the command executor. Raises exceptions the executor isn't running."""
+        if self._executor == None:
+            raise RuntimeError("No running executor!")
+        self._executor.stop()
+        self._executor = None
+
+    def _on_ports_changed(self, added:list, removed:list) -> None:
+        """Port registry callback. Logs the changes and reconnects to the last programmer if enabled."""
+        for device in removed:
+            self.log(f"Port removed: [{device}]")
+        for device in added:
+            self.log(f"Port added: [{device}]")
         
+        # Reconnect if the last port(or a port with the same hardware id) comes back while not connected
+        if self._auto_reconnect == False or self._last_connection == None or added == []:
+            return
+        if self._serial_conn.serial_status()[0] == True:
+            return
+        port, baud, hwid = self._last_connection
+        for device in added:
+            info = self._port_registry.port_info(device)
+            if device == port or (info != None and hwid not in (None, "", "n/a") and info[1] == hwid):
+                try:
+                    self._serial_conn.serial_start(device, baud)
+                    if self._ping_thread_get() != None:
+                        self._ping_thread.go()
+                    self._last_connection = (device, baud, hwid)
+                    self.log(f"Reconnected to port [{device}] with baud [{baud}]!")
+                except Exception as err:
+                    self.log(f"Reconnect failed! (Reason: {err})")
+                return
+
     def _error(self, error:int) -> None:
         """Handles the general error conditions.
         - Thread safe.
@@ -105,4 +360,4 @@ class Interface:
         self._serial_conn.serial_stop()
             
         if error == INTERFACE.RESPONSE_TIMEOUT or error == INTERFACE.RESPONSE_INVALID:
-            self.log("Programmer disconnected!")
\ No newline at end of file
+            self.log("Programmer disconnected!", level=LOG.ERROR)
\ No newline at end of file
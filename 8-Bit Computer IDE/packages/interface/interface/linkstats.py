@@ -0,0 +1,130 @@
+import threading
+import time
+import json
+from typing import Dict, List
+
+from .const import CONN
+
+
+# Names of the commands for the statistics output(ex: 0x01 -> "PING")
+command_names = {value: name[4:] for name, value in vars(CONN).items() if name.startswith("CMD_")}
+
+
+class LinkStats:
+    # Latency histogram buckets are powers of 2 in microseconds:
+    # bucket n -> [2^(n-1), 2^n) us, bucket 0 -> <1us, last bucket -> everything above
+    BUCKETS = 24
+
+    def __init__(self) -> None:
+        """Class used to collect the serial link statistics for the interface package.
+        - All methods are thread safe.
+        - Recording only takes a lock and updates a few integers, so it can be called per packet.
+
+            Methods:
+            - record_packet()
+            - record_bytes()
+            - record_error()
+            - reset()
+            - snapshot()
+            - to_json()
+            - histogram_rows()
+        """
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record_packet(self, cmd:int, response:int, latency:float, sent:int=4, received:int=1, retry:bool=False) -> None:
+        """Records a single packet exchange.
+
+        Args:
+            cmd (int): Command that was sent.
+            response (int): Response of the exchange("const.CONN.TIMEOUT" if timed out).
+            latency (float): Round trip time in seconds.
+            sent (int, optional): Number of bytes sent. Defaults to 4.
+            received (int, optional): Number of bytes received(ignored on timeout). Defaults to 1.
+            retry (bool, optional): "True" if the exchange was a retry of a failed one. Defaults to False.
+        """
+        with self._lock:
+            self._counters["packets_sent"] += 1
+            self._counters["bytes_sent"]   += sent
+            if retry == True:
+                self._counters["retries"] += 1
+            if response == CONN.TIMEOUT:
+                self._counters["timeouts"] += 1
+                return
+            self._counters["packets_received"] += 1
+            self._counters["bytes_received"]   += received
+            if response == CONN.STATUS_NACK:
+                self._counters["nacks"] += 1
+
+            # Update the latency histogram of the command
+            command = self._commands.get(cmd)
+            if command == None:
+                command = self._commands[cmd] = {"count": 0, "total": 0.0, "min": latency, "max": latency, "histogram": [0]*self.BUCKETS}
+            command["count"] += 1
+            command["total"] += latency
+            if latency < command["min"]: command["min"] = latency
+            if latency > command["max"]: command["max"] = latency
+            command["histogram"][min(int(latency * 1e6).bit_length(), self.BUCKETS-1)] += 1
+
+    def record_bytes(self, sent:int=0, received:int=0) -> None:
+        """Records bytes that were transferred outside of the packet exchanges.(bulk transfers etc...)"""
+        with self._lock:
+            self._counters["bytes_sent"]     += sent
+            self._counters["bytes_received"] += received
+
+    def record_error(self, name:str) -> None:
+        """Increments one of the error counters. -> ("checksum_errors", "write_errors")"""
+        with self._lock:
+            self._counters[name] += 1
+
+    def reset(self) -> None:
+        """Resets all statistics."""
+        with self._lock:
+            self._since    = time.time()
+            self._commands = {}
+            self._counters = {
+                "packets_sent"    : 0,
+                "packets_received": 0,
+                "bytes_sent"      : 0,
+                "bytes_received"  : 0,
+                "timeouts"        : 0,
+                "nacks"           : 0,
+                "checksum_errors" : 0,
+                "write_errors"    : 0,
+                "retries"         : 0,
+            }
+
+    def snapshot(self) -> Dict:
+        """Returns a copy of the statistics as a dictionary.(latencies are in milliseconds)"""
+        with self._lock:
+            commands = {}
+            for cmd, command in sorted(self._commands.items()):
+                commands[command_names.get(cmd, "0x{0:02X}".format(cmd))] = {
+                    "count"    : command["count"],
+                    "min_ms"   : command["min"] * 1000,
+                    "avg_ms"   : command["total"] / command["count"] * 1000,
+                    "max_ms"   : command["max"] * 1000,
+                    "histogram": list(command["histogram"]),
+                }
+            return {
+                "seconds" : time.time() - self._since,
+                **self._counters,
+                "commands": commands,
+            }
+
+    def to_json(self, indent:int=4) -> str:
+        """Returns the statistics as a JSON string. (Histogram bucket "n" -> [2^(n-1), 2^n) microseconds)"""
+        return json.dumps(self.snapshot(), indent=indent)
+
+    @classmethod
+    def histogram_rows(cls, histogram:List[int], width:int=40) -> List[str]:
+        """Returns the non-empty buckets of a histogram as printable rows with bars."""
+        rows = []
+        peak = max(histogram) if max(histogram) > 0 else 1
+        for i, count in enumerate(histogram):
+            if count == 0:
+                continue
+            low  = 0 if i == 0 else 2**(i-1)
+            high = "inf" if i == cls.BUCKETS-1 else 2**i
+            rows.append("{:>16}: {:<{}} {}".format(f"{low}-{high}us", "#" * max(1, round(count/peak*width)), width, count))
+        return rows
@@ -0,0 +1,163 @@
+import threading
+import atexit
+from collections import deque
+from typing import Dict
+
+from .const import LOG
+
+
+class LogSink(threading.Thread):
+    def __init__(self, *args, output:object, interval:float=0.005, max_backlog:int=10000, level:int=LOG.DEBUG, **kwargs) -> None:
+        """Subclass of "threading.Thread" made for the interface package. Buffers the log messages and writes them in batches.
+        - "put()" never blocks or takes a lock, messages are appended to a deque(atomic) and the caller returns right away.
+        - The thread joins the queued messages and calls the output's "write" method once every ~"interval" seconds,
+          so a GUI output gets a single update per batch instead of one per message.
+        - When the backlog is full, new messages are dropped and counted. Number of the dropped messages
+          is written with the next batch.
+        - Messages below the level("const.LOG" value) are filtered.
+        - Optional arguments can be given to pass onto the "threading.Thread" superclass.
+
+            Custom methods:
+            - stop()
+            - put()
+            - flush()
+            - set_output()
+            - set_level()
+            - get_level()
+            - stats()
+
+        Args:
+            output (object): Output object whos "write" method will be called with each batch.
+            interval (float, optional): Time between the batches in seconds. Defaults to 0.005.
+            max_backlog (int, optional): Maximum number of queued messages. Defaults to 10000.
+            level (int, optional): Minimum level of the messages to write. Defaults to "LOG.DEBUG".
+            *args, **kwargs: Other arguments for the "threading.Thread" superclass.
+        """
+        super().__init__(*args, target=self._sink_function, **kwargs)
+
+        self._output      = output
+        self._interval    = interval
+        self._max_backlog = max_backlog
+        self._level       = level
+        self._queue       = deque()
+
+        # Counters are only approximate under heavy contention, as "put()" doesn't lock
+        self._written  = 0
+        self._dropped  = 0
+        self._filtered = 0
+        self._reported = 0
+
+        self._cycles      = 0
+        self._cycle_cond  = threading.Condition()
+        self._write_lock  = threading.Lock()
+        self._e_stop      = threading.Event()
+        self._e_wake      = threading.Event()
+
+        atexit.register(self._termination_handler)
+
+    def stop(self, timeout:int=3) -> None:
+        """Sets the stop flag and waits for the thread to write the remaining messages and exit.
+
+        Args:
+            timeout (int, optional): Wait timeout in seconds. Defaults to 3.
+
+        Raises:
+            RuntimeError: Raised on timeout.
+        """
+        self._e_stop.set()
+        self._e_wake.set()
+        if self.is_alive() == True:
+            self.join(timeout=float(timeout))
+            if self.is_alive() == True:
+                raise RuntimeError("Failed to stop log sink! -> " + str(threading.current_thread()))
+        self._write_pending()
+
+    def put(self, msg:str, level:int=LOG.INFO) -> None:
+        """Queues a message to be written with the next batch.(never blocks)
+
+        Args:
+            msg (str): Message to write, including its line ending.
+            level (int, optional): "const.LOG" value of the message. Defaults to "LOG.INFO".
+        """
+        if level < self._level:
+            self._filtered += 1
+        elif len(self._queue) >= self._max_backlog:
+            self._dropped += 1
+        else:
+            self._queue.append(msg)
+
+    def flush(self, timeout:float=1.0) -> bool:
+        """Waits until the messages queued before the call are written.
+        - Writes them from the caller's thread if the sink isn't running.
+
+        Args:
+            timeout (float, optional): Wait timeout in seconds. Defaults to 1.0.
+
+        Returns:
+            (bool): "True" if the messages are written, "False" on timeout.
+        """
+        if self.is_alive() == False:
+            self._write_pending()
+            return True
+
+        # Wait for 2 cycles, the ongoing one may have already emptied the queue before the call
+        with self._cycle_cond:
+            target = self._cycles + 2
+            self._e_wake.set()
+            return self._cycle_cond.wait_for(lambda: self._cycles >= target or self.is_alive() == False, timeout)
+
+    def set_output(self, output:object) -> None:
+        """Changes the output after writing the queued messages to the old one."""
+        with self._write_lock:
+            self._write_pending()
+            self._output = output
+
+    def set_level(self, level:int) -> None:
+        """Sets the minimum level("const.LOG" value) of the messages to write."""
+        self._level = level
+
+    def get_level(self) -> int:
+        """Returns the minimum level("const.LOG" value) of the messages to write."""
+        return self._level
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the counters -> {"written", "dropped", "filtered", "backlog"}"""
+        return {"written": self._written, "dropped": self._dropped, "filtered": self._filtered, "backlog": len(self._queue)}
+
+    def _write_pending(self) -> None:
+        """Writes the queued messages as a single batch.(failed writes are counted as dropped)"""
+        messages = []
+        try:
+            while True:
+                messages.append(self._queue.popleft())
+        except IndexError:
+            pass
+
+        dropped = self._dropped - self._reported
+        if dropped > 0:
+            self._reported += dropped
+            messages.append(f"*** {dropped} log message(s) dropped! ***\n")
+        if messages == []:
+            return
+
+        try:
+            self._output.write("".join(messages))
+            self._written += len(messages)
+        except Exception:
+            self._dropped += len(messages)
+            self._reported += len(messages)
+
+    def _termination_handler(self) -> None:
+        """Exit handler to write the remaining messages and stop the thread."""
+        self.stop()
+
+    def _sink_function(self) -> None:
+        """Thread function."""
+        while(self._e_stop.is_set() == False):
+            self._e_wake.wait(self._interval)
+            self._e_wake.clear()
+            with self._write_lock:
+                self._write_pending()
+            with self._cycle_cond:
+                self._cycles += 1
+                self._cycle_cond.notify_all()
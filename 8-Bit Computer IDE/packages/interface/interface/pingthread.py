@@ -2,7 +2,7 @@ import threading
 import time
 import atexit
 
-from .const import INTERFACE, CONN
+from .const import INTERFACE, CONN, LOG
 
 
 class PingThread(threading.Thread):
@@ -133,9 +133,9 @@ class PingThread(threading.Thread):
         """
         if self._e_verbose.is_set() == True:
             if self._thread_name == "":
-                self._interface.log(f"***Pingthread: {msg}")
+                self._interface.log(f"***Pingthread: {msg}", level=LOG.DEBUG)
             else:
-                self._interface.log(f"***Pingthread-{self._thread_name}: {msg}")
+                self._interface.log(f"***Pingthread-{self._thread_name}: {msg}", level=LOG.DEBUG)
                 
     def _termination_handler(self) -> None:
         """Exit handler to gracefully stop the thread."""
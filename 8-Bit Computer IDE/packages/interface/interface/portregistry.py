@@ -0,0 +1,151 @@
+import threading
+import atexit
+from typing import Callable, List, Tuple
+
+
+def comports() -> List[Tuple[str, str, str]]:
+    """Enumerates the available ports using "serial.tools.list_ports".
+
+    Returns:
+        (List[Tuple[str, str, str]]): List of ports -> [(device, description, hwid)...]
+    """
+    import serial.tools.list_ports
+    return [(port.device, str(port), port.hwid) for port in serial.tools.list_ports.comports()]
+
+
+class PortRegistry(threading.Thread):
+    def __init__(self, *args, interval:float=1.0, enumerate_func:Callable=comports, **kwargs) -> None:
+        """Subclass of "threading.Thread" made for the interface package. Enumerates the ports in the background and caches them.
+        - Ports are enumerated every ~"interval" seconds, or right away when "refresh()" is called.
+        - "ports()" never blocks on the enumeration and returns the cached result.
+        - Subscribers are called from the thread with the added and removed devices whenever the port list changes.
+          (callback(added:List[str], removed:List[str]))
+        - Optional arguments can be given to pass onto the "threading.Thread" superclass.
+
+            Custom methods:
+            - stop()
+            - refresh()
+            - ports()
+            - port_info()
+            - is_ready()
+            - wait_ready()
+            - subscribe()
+            - unsubscribe()
+
+        Args:
+            interval (float, optional): Time between enumerations in seconds. Defaults to 1.0.
+            enumerate_func (Callable, optional): Function that returns the ports as [(device, description, hwid)...]. Defaults to "comports".
+            *args, **kwargs: Other arguments for the "threading.Thread" superclass.
+        """
+        super().__init__(*args, target=self._registry_function, **kwargs)
+
+        self._interval       = interval
+        self._enumerate_func = enumerate_func
+        self._lock           = threading.Lock()
+        self._ports          = {}
+        self._subscribers    = []
+        self._is_enumerated  = False
+
+        self._e_stop    = threading.Event()
+        self._e_refresh = threading.Event()
+        self._e_ready   = threading.Event()
+        self._e_first   = threading.Event()
+
+        atexit.register(self._termination_handler)
+
+    def stop(self, timeout:int=3) -> None:
+        """Sets the stop flag and waits for the thread to exit.
+
+        Args:
+            timeout (int, optional): Wait timeout in seconds. Defaults to 3.
+
+        Raises:
+            RuntimeError: Raised on timeout.
+        """
+        self._e_stop.set()
+        self._e_refresh.set()
+        if self.is_alive() == True:
+            self.join(timeout=float(timeout))
+            if self.is_alive() == True:
+                raise RuntimeError("Failed to stop port registry! -> " + str(threading.current_thread()))
+
+    def refresh(self, timeout:float=None) -> bool:
+        """Requests an enumeration right away.
+        - Doesn't block if no timeout is given.
+
+        Args:
+            timeout (float, optional): Time in seconds to wait for the enumeration to finish. Defaults to None.
+
+        Returns:
+            (bool): "True" if the enumeration finished(always "False" if no timeout is given).
+        """
+        if timeout == None:
+            self._e_refresh.set()
+            return False
+        self._e_ready.clear()
+        self._e_refresh.set()
+        return self._e_ready.wait(timeout)
+
+    def ports(self) -> List[str]:
+        """Returns the cached list of ports as "device - description" strings."""
+        with self._lock:
+            return [description for description, _ in self._ports.values()]
+
+    def port_info(self, device:str) -> Tuple[str, str]:
+        """Returns the cached (description, hwid) of a device, "None" if the device isn't available."""
+        with self._lock:
+            return self._ports.get(device)
+
+    def is_ready(self) -> bool:
+        """Returns "True" if at least one enumeration has been completed."""
+        return self._is_enumerated
+
+    def wait_ready(self, timeout:float=None) -> bool:
+        """Waits for the first enumeration to complete, returns "True" if it has been completed."""
+        return self._e_first.wait(timeout)
+
+    def subscribe(self, callback:Callable) -> None:
+        """Adds a callback to be called with (added, removed) lists of devices on changes."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback:Callable) -> None:
+        """Removes a callback added with "subscribe()"."""
+        with self._lock:
+            self._subscribers.remove(callback)
+
+    def _enumerate(self) -> None:
+        """Enumerates the ports, updates the cache and notifies the subscribers of the changes."""
+        try:
+            ports = {device: (description, hwid) for device, description, hwid in self._enumerate_func()}
+        except Exception:
+            return
+        with self._lock:
+            added       = [device for device in ports if device not in self._ports]
+            removed     = [device for device in self._ports if device not in ports]
+            self._ports = ports
+            subscribers = list(self._subscribers)
+        is_first = (self._is_enumerated == False)
+        self._is_enumerated = True
+        self._e_ready.set()
+        self._e_first.set()
+
+        # The first enumeration is the initial state, not a change
+        if is_first == False and (added != [] or removed != []):
+            for callback in subscribers:
+                try:
+                    callback(added, removed)
+                except Exception:
+                    pass
+
+    def _termination_handler(self) -> None:
+        """Exit handler to gracefully stop the thread."""
+        self._subscribers = []
+        self.stop()
+
+    def _registry_function(self) -> None:
+        """Thread function."""
+        while(self._e_stop.is_set() == False):
+            self._e_refresh.clear()
+            self._enumerate()
+            self._e_refresh.wait(self._interval)
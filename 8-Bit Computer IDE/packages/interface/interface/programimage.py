@@ -0,0 +1,131 @@
+import zlib
+from typing import Dict, Iterable, List, Tuple
+
+from .const import CONN
+
+
+class ProgramImage:
+    def __init__(self, data:bytearray=None, pages:Iterable[int]=None) -> None:
+        """Class used to hold a program image for the programmer memory.
+        - Memory is stored as opcode-literal pairs -> data[address*2] = opcode, data[address*2+1] = literal
+        - Only the populated pages are programmed and verified, the rest of the memory is ignored.
+        - Use "ProgramImage.from_hex()" to load an Intel HEX file created by the assembler.
+
+            Methods:
+            - from_hex()
+            - get_pages()
+            - page()
+            - page_hash()
+            - page_hashes()
+            - word()
+
+        Args:
+            data (bytearray, optional): Memory contents(padded to the full memory). Defaults to empty memory.
+            pages (Iterable[int], optional): Populated page indexes. Defaults to every page that isn't empty.
+        """
+        self.data = bytearray(CONN.MEMORY_WORDS * 2)
+        if data != None:
+            self.data[:len(data)] = data
+        if pages == None:
+            empty = bytes(CONN.PAGE_BYTES)
+            pages = [p for p in range(CONN.PAGE_COUNT) if self.page(p) != empty]
+        self._pages = sorted(set(pages))
+
+    @classmethod
+    def from_hex(cls, file:str) -> "ProgramImage":
+        """Loads an Intel HEX file.(only data, EOF and extended linear address records are supported)
+
+        Raises:
+            ValueError: Raised with the line number if a record is invalid.
+
+        Args:
+            file (str): Path of the hex file.
+        """
+        image = cls(pages=[])
+        pages = set()
+        base  = 0
+        with open(file, 'r') as f:
+            for i_line, line in enumerate(f):
+                line = line.strip()
+                if line == "":
+                    continue
+                try:
+                    record = bytes.fromhex(line[1:])
+                except ValueError:
+                    record = b""
+                if line[0] != ':' or len(record) < 5 or len(record) != record[0] + 5 or sum(record) & 0xFF != 0:
+                    raise ValueError(f"Invalid record! (line: {i_line+1})")
+
+                byte_count, record_type, data = record[0], record[3], record[4:-1]
+                if record_type == 0x00:
+                    address = base + (record[1] << 8 | record[2])
+                    if address + byte_count > len(image.data):
+                        raise ValueError(f"Record exceeds the program memory! (line: {i_line+1})")
+                    image.data[address:address+byte_count] = data
+                    if byte_count > 0:
+                        pages.update(range(address // CONN.PAGE_BYTES, (address + byte_count - 1) // CONN.PAGE_BYTES + 1))
+                elif record_type == 0x01:
+                    break
+                elif record_type == 0x04:
+                    base = (data[0] << 8 | data[1]) << 16
+                else:
+                    raise ValueError(f"Unsupported record type! (line: {i_line+1})")
+        image._pages = sorted(pages)
+        return image
+
+    def get_pages(self) -> List[int]:
+        """Returns the sorted list of populated page indexes."""
+        return self._pages
+
+    def page(self, index:int) -> bytes:
+        """Returns the contents of a page."""
+        return bytes(self.data[index*CONN.PAGE_BYTES:(index+1)*CONN.PAGE_BYTES])
+
+    def page_hash(self, index:int) -> int:
+        """Returns the 32-bit CRC of a page.(same as the programmer's "CMD_PAGE_HASHES")"""
+        return page_hash(memoryview(self.data)[index*CONN.PAGE_BYTES:(index+1)*CONN.PAGE_BYTES])
+
+    def page_hashes(self) -> Dict[int, int]:
+        """Returns the hashes of the populated pages. -> {page: hash}"""
+        return {p: self.page_hash(p) for p in self._pages}
+
+    def word(self, address:int) -> Tuple[int, int]:
+        """Returns the opcode-literal pair at the given word address."""
+        return (self.data[address*2], self.data[address*2+1])
+
+
+def page_hash(data:bytes) -> int:
+    """Returns the 32-bit CRC of the given page contents."""
+    return zlib.crc32(data) & 0xFFFFFFFF
+
+
+def page_runs(pages:Iterable[int], max_count:int=CONN.PAGE_COUNT) -> List[Tuple[int, int]]:
+    """Groups sorted page indexes into contiguous runs. -> [(first_page, count)...]"""
+    runs = []
+    for p in pages:
+        if runs != [] and runs[-1][0] + runs[-1][1] == p and runs[-1][1] < max_count:
+            runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+        else:
+            runs.append((p, 1))
+    return runs
+
+
+# Disassembler from the assembler package if available("None" -> not checked yet, "False" -> not available)
+_generate_assembly = None
+
+def disassemble(opcode:int, literal:int) -> str:
+    """Returns the assembly of an opcode-literal pair.
+    - Uses "assembler_tools.mycodegenerator" if it can be imported, otherwise returns the pair in hex format.
+    """
+    global _generate_assembly
+    if _generate_assembly == None:
+        try:
+            from assembler_tools.mycodegenerator import generate_assembly
+            _generate_assembly = generate_assembly
+        except ImportError:
+            _generate_assembly = False
+
+    asm = _generate_assembly(opcode, literal) if _generate_assembly != False else None
+    if asm == None:
+        return "Opcode: 0x{0:02X}, Literal: 0x{1:02X}".format(opcode, literal)
+    return asm
@@ -0,0 +1,253 @@
+"""
+Module used to program and verify the program memory through an "Interface" instance.
+- Functions raise "ProgrammerError" when the programmer doesn't respond as expected.
+- Interface's serial connection must be open before calling the functions.
+- Long operations stop with "ProgrammerError" between pages if the interface's command is cancelled.
+
+---
+
+    Available functions:
+    - upload()
+    - program()
+    - capabilities()
+    - verify()
+    - read_page_hashes()
+    - read_pages()
+"""
+from typing import Callable, Dict, List, Tuple
+
+from .const import CONN
+from .programimage import ProgramImage, page_runs
+from .flashrecord import FlashRecords
+from . import transfercodec
+
+
+# Number of times a failed packet is resent before giving up
+RETRIES = 2
+
+
+class ProgrammerError(Exception):
+    """Subclass of "Exception". Custom exception for the programmer operations.
+    - Arguments explanation:\n
+     >Description -> Description of the error\n
+     >Response -> Last response from the programmer("const.CONN" value)\n
+
+    Args:
+        Exception(str, int): (description, response, *args)
+    """
+    def __init__(self, description:str, response:int, *args):
+        super().__init__(description, *args)
+        self.description = description
+        self.response    = response
+
+
+def upload(interface:object, image:ProgramImage, records:FlashRecords=None, full:bool=False, progress:Callable=None) -> Tuple[int, List]:
+    """Programs only the pages that differ from the last image programmed through the port, then verifies them.
+    - Port's record is used to find the changed pages. If there is no record(board's state is unknown),
+      page hashes are read back from the programmer instead.
+    - If the verify finds mismatches(record was stale), the mismatching pages are programmed and verified once more.
+    - Record is updated on success, and removed on failure.
+
+    Raises:
+        ProgrammerError: Raised if the programmer rejects or doesn't respond to a packet.
+
+    Args:
+        interface (object): Interface class object with an open connection.
+        image (ProgramImage): Image to write.
+        records (FlashRecords, optional): Records of the programmed images. Defaults to None(always reads back).
+        full (bool, optional): If True, every populated page is programmed regardless of the records. Defaults to False.
+        progress (Callable, optional): Called with (words_written, words_total) after each page. Defaults to None.
+
+    Returns:
+        (Tuple[int, List]): (number of pages written, mismatches from the final verify -> see "verify()")
+    """
+    port   = interface._serial_conn.serial_status()[1]
+    hashes = image.page_hashes()
+    pages  = image.get_pages()
+    
+    # Find the changed pages
+    if full == False:
+        known = records.get(port) if records != None else None
+        if known == None:
+            known = read_page_hashes(interface, pages)
+        pages = [p for p in pages if known.get(p) != hashes[p]]
+    
+    try:
+        if pages != []:
+            program(interface, image, pages, progress)
+        written    = len(pages)
+        mismatches = verify(interface, image)
+        if mismatches != []:
+            pages = sorted({address // CONN.PAGE_WORDS for address, _, _ in mismatches})
+            program(interface, image, pages, progress)
+            written   += len(pages)
+            mismatches = verify(interface, image, pages)
+    except ProgrammerError:
+        if records != None:
+            records.forget(port)
+        raise
+    
+    if records != None:
+        if mismatches == []:
+            records.update(port, hashes)
+        else:
+            records.forget(port)
+    return (written, mismatches)
+
+
+def program(interface:object, image:ProgramImage, pages:List[int]=None, progress:Callable=None, compress:bool=None) -> int:
+    """Writes the populated pages of the image into the program memory.
+    - Switches the programmer to the program mode first.
+    - If the programmer supports it, pages are sent as compressed streams(see "transfercodec"), otherwise word by word.
+    - Address is sent again before retrying a write, so a lost ACK can't shift the memory.
+
+    Raises:
+        ProgrammerError: Raised if the programmer rejects or doesn't respond to a packet.
+
+    Args:
+        interface (object): Interface class object with an open connection.
+        image (ProgramImage): Image to write.
+        pages (List[int], optional): Pages to write. Defaults to the populated pages of the image.
+        progress (Callable, optional): Called with (words_written, words_total) after each page(or stream). Defaults to None.
+        compress (bool, optional): "True"/"False" to force the compressed/plain writes. Defaults to None(negotiated).
+
+    Returns:
+        (int): Number of words written.
+    """
+    conn  = interface._serial_conn
+    pages = image.get_pages() if pages == None else sorted(pages)
+    total = len(pages) * CONN.PAGE_WORDS
+
+    response = conn.serial_send_packet(CONN.CMD_MODE_PROGRAM, retries=RETRIES)
+    if response != CONN.STATUS_ACK:
+        raise ProgrammerError("Failed to enter the program mode!", response)
+    if compress == None:
+        compress = (capabilities(interface) & CONN.CAP_WRITE_LZ) != 0
+
+    written = 0
+    for first_page, count in page_runs(pages, CONN.STREAM_PAGES if compress == True else CONN.PAGE_COUNT):
+        address = first_page * CONN.PAGE_WORDS
+        if compress == True and _write_stream(conn, image, address, count*CONN.PAGE_WORDS) == True:
+            written += count*CONN.PAGE_WORDS
+            _report(interface, progress, written, total)
+            continue
+        
+        # Plain writes(also the fallback for a failed stream)
+        _send_address(conn, address)
+        for address in range(address, address + count*CONN.PAGE_WORDS):
+            opcode, literal = image.word(address)
+            for attempt in range(RETRIES+1):
+                if attempt > 0:
+                    _send_address(conn, address)
+                response = conn.serial_send_packet(CONN.CMD_WRITE, opcode, literal)
+                if response == CONN.STATUS_ACK:
+                    break
+            else:
+                raise ProgrammerError("Write failed! (Address: 0x{0:04X})".format(address), response)
+
+            written += 1
+            if written % CONN.PAGE_WORDS == 0:
+                _report(interface, progress, written, total)
+    return written
+
+
+def capabilities(interface:object) -> int:
+    """Returns the capabilities of the programmer as a bitmask of the "CONN.CAP_*" values.(0 if not supported)
+    - Only timeouts are retried, NACK means the firmware doesn't know the command.
+    """
+    response = interface._serial_conn.serial_send_packet(CONN.CMD_CAPABILITIES, retries=RETRIES, retry_nack=False)
+    if response == CONN.TIMEOUT or response == CONN.STATUS_NACK or response == CONN.STATUS_ACK:
+        return 0
+    return response
+
+
+def verify(interface:object, image:ProgramImage, pages:List[int]=None) -> List[Tuple[int, Tuple[int, int], Tuple[int, int]]]:
+    """Compares the program memory with the image.
+    - Page hashes are read in bulk first, only the contents of the mismatching pages are read back.
+
+    Raises:
+        ProgrammerError: Raised if a bulk read fails.
+
+    Args:
+        interface (object): Interface class object with an open connection.
+        image (ProgramImage): Image to compare with.
+        pages (List[int], optional): Pages to compare. Defaults to the populated pages of the image.
+
+    Returns:
+        (List[Tuple[int, Tuple[int, int], Tuple[int, int]]]): Mismatches -> [(address, (expected opcode, literal), (found opcode, literal))...]
+    """
+    pages  = image.get_pages() if pages == None else sorted(pages)
+    hashes = read_page_hashes(interface, pages)
+    differing = [p for p in pages if hashes[p] != image.page_hash(p)]
+
+    mismatches = []
+    for p, contents in read_pages(interface, differing).items():
+        for i in range(CONN.PAGE_WORDS):
+            address  = p*CONN.PAGE_WORDS + i
+            expected = image.word(address)
+            found    = (contents[i*2], contents[i*2+1])
+            if expected != found:
+                mismatches.append((address, expected, found))
+    return mismatches
+
+
+def read_page_hashes(interface:object, pages:List[int]) -> Dict[int, int]:
+    """Reads the 32-bit CRCs of the given pages from the programmer. -> {page: hash}"""
+    hashes = {}
+    for first_page, count in page_runs(sorted(pages)):
+        payload = _read_bulk(interface, CONN.CMD_PAGE_HASHES, first_page, count, count*4)
+        for i in range(count):
+            hashes[first_page + i] = int.from_bytes(payload[i*4:i*4+4], "big")
+    return hashes
+
+
+def read_pages(interface:object, pages:List[int]) -> Dict[int, bytes]:
+    """Reads the contents of the given pages from the programmer. -> {page: contents}"""
+    contents = {}
+    for first_page, count in page_runs(sorted(pages)):
+        payload = _read_bulk(interface, CONN.CMD_READ_PAGES, first_page, count, count*CONN.PAGE_BYTES)
+        for i in range(count):
+            contents[first_page + i] = payload[i*CONN.PAGE_BYTES:(i+1)*CONN.PAGE_BYTES]
+    return contents
+
+
+def _write_stream(conn:object, image:ProgramImage, address:int, count:int) -> bool:
+    """Writes the words with a compressed stream, returns "False" if the programmer doesn't accept it."""
+    stream = transfercodec.encode(image.data[address*2:(address+count)*2])
+    _send_address(conn, address)
+    response = conn.serial_send_stream(CONN.CMD_WRITE_LZ, stream)
+    for _ in range(RETRIES):
+        if response == CONN.STATUS_ACK:
+            break
+        _send_address(conn, address)
+        response = conn.serial_send_stream(CONN.CMD_WRITE_LZ, stream, retries=0)
+    return response == CONN.STATUS_ACK
+
+
+def _report(interface:object, progress:Callable, written:int, total:int) -> None:
+    """Keeps the pingthread quiet, reports the progress and stops if the command is cancelled."""
+    if interface.is_cancelled() == True:
+        raise ProgrammerError("Cancelled!", CONN.ERROR)
+    if interface._ping_thread != None:
+        interface._ping_thread.timer_reset()
+    if progress != None:
+        progress(written, total)
+
+
+def _send_address(conn:object, address:int) -> None:
+    """Sets the write address of the programmer."""
+    response = conn.serial_send_packet(CONN.CMD_ADDRESS, address >> 8, address & 0xFF, retries=RETRIES)
+    if response != CONN.STATUS_ACK:
+        raise ProgrammerError("Failed to set the address! (Address: 0x{0:04X})".format(address), response)
+
+
+def _read_bulk(interface:object, cmd:int, first_page:int, count:int, length:int) -> bytes:
+    """Sends a bulk read for a run of pages(page count of 256 is sent as 0) and returns the payload."""
+    if interface.is_cancelled() == True:
+        raise ProgrammerError("Cancelled!", CONN.ERROR)
+    if interface._ping_thread != None:
+        interface._ping_thread.timer_reset()
+    payload = interface._serial_conn.serial_read_bulk(cmd, first_page, count & 0xFF, length, retries=RETRIES)
+    if isinstance(payload, bytes) == False:
+        raise ProgrammerError("Bulk read failed! (Page: {0})".format(first_page), payload)
+    return payload
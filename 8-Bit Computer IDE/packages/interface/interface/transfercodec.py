@@ -0,0 +1,193 @@
+"""
+Codec used to compress the program memory for the "CONN.CMD_WRITE_LZ" transfers.
+- Works on 16-bit words(opcode-literal pairs), so runs of "nop"s and repeated instruction patterns compress well.
+- Decoding only needs the already written memory, so the programmer doesn't need extra buffers.
+
+---
+
+Stream format(sequence of tokens):
+- Header 0x00-0x7F -> literal run: (header+1) words follow as [opcode, literal] pairs.
+- Header 0x80-0xFF -> back reference: copy ((header&0x7F)+2) words starting "distance" words back,
+                      followed by the distance as 2 bytes(big endian, 1-65535). Copies can overlap
+                      the output(distance 1 repeats the last word).
+
+---
+
+The module can be run directly to benchmark the codec on hex files and synthetic images:
+    python -m interface.transfercodec file1.hex file2.hex
+    python -m interface.transfercodec --flash --baud 115200
+"""
+from typing import List
+
+
+MAX_LITERAL    = 0x80
+MIN_MATCH      = 2
+MAX_MATCH      = 0x7F + MIN_MATCH
+MAX_DISTANCE   = 0xFFFF
+MAX_CANDIDATES = 16
+
+
+def encode(data:bytes) -> bytes:
+    """Encodes the memory contents into the stream format.
+
+    Args:
+        data (bytes): Memory contents as opcode-literal pairs(length must be even).
+
+    Returns:
+        (bytes): Encoded stream.
+    """
+    data  = bytes(data)
+    words = [data[i:i+2] for i in range(0, len(data), 2)]
+    count = len(words)
+    out      = bytearray()
+    literals = []
+    chains   = {}
+
+    def flush_literals():
+        for i in range(0, len(literals), MAX_LITERAL):
+            chunk = literals[i:i+MAX_LITERAL]
+            out.append(len(chunk) - 1)
+            out.extend(b"".join(chunk))
+        literals.clear()
+
+    def insert(position):
+        if position + 1 < count:
+            chains.setdefault(words[position] + words[position+1], []).append(position)
+
+    i = 0
+    while i < count:
+        # Find the longest match among the latest positions with the same 2-word prefix
+        best_length, best_distance = 0, 0
+        if i + 1 < count:
+            for candidate in reversed(chains.get(words[i] + words[i+1], [])[-MAX_CANDIDATES:]):
+                if i - candidate > MAX_DISTANCE:
+                    break
+                length = MIN_MATCH
+                while length < MAX_MATCH and i + length < count and words[candidate + length] == words[i + length]:
+                    length += 1
+                if length > best_length:
+                    best_length, best_distance = length, i - candidate
+                    if length == MAX_MATCH:
+                        break
+
+        # Back references cost 3 bytes, while even the shortest match costs 4 bytes as literals
+        if best_length >= MIN_MATCH:
+            flush_literals()
+            out.append(0x80 | (best_length - MIN_MATCH))
+            out.extend(best_distance.to_bytes(2, "big"))
+            for position in range(i, i + best_length):
+                insert(position)
+            i += best_length
+        else:
+            literals.append(words[i])
+            insert(i)
+            i += 1
+    flush_literals()
+    return bytes(out)
+
+
+def decode(stream:bytes, history:bytes=b"") -> bytes:
+    """Decodes a stream back into the memory contents.(same as the programmer)
+
+    Raises:
+        ValueError: Raised if the stream is invalid.
+
+    Args:
+        stream (bytes): Encoded stream.
+        history (bytes, optional): Memory contents right before the stream's start, for back references. Defaults to b"".
+
+    Returns:
+        (bytes): Decoded memory contents.
+    """
+    out = bytearray(history)
+    start = len(out)
+    i = 0
+    while i < len(stream):
+        header = stream[i]
+        if header < 0x80:
+            length = (header + 1) * 2
+            if i + 1 + length > len(stream):
+                raise ValueError("Literal run exceeds the stream!")
+            out += stream[i+1:i+1+length]
+            i += 1 + length
+        else:
+            if i + 3 > len(stream):
+                raise ValueError("Back reference exceeds the stream!")
+            length   = (header & 0x7F) + MIN_MATCH
+            distance = stream[i+1] << 8 | stream[i+2]
+            if distance == 0 or distance*2 > len(out):
+                raise ValueError("Invalid back reference distance!")
+            position = len(out) - distance*2
+            for j in range(length*2):
+                out.append(out[position + j])
+            i += 3
+    return bytes(out[start:])
+
+
+def _synthetic_images() -> List:
+    """Returns synthetic images as [(name, data)...] for the benchmark."""
+    import random
+    rng = random.Random(0)
+    pattern = bytes([0x02, 0x01, 0x03, 0x01, 0x08, 0x00, 0x08, 0x00, 0x08, 0x00])
+    return [
+        ("nop padding(64K words)"      , bytes(0x20000)),
+        ("repeated pattern(64K words)" , (pattern * (0x20000 // len(pattern) + 1))[:0x20000]),
+        ("code + nop padding(4K words)", bytes(rng.randrange(2, 9) if k % 2 == 0 else rng.randrange(4) for k in range(0x1000)) + bytes(0x1000)),
+        ("random(4K words)"            , bytes(rng.randrange(256) for _ in range(0x2000))),
+    ]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from .const import CONN
+    from .programimage import ProgramImage
+
+    parser = argparse.ArgumentParser(description="Benchmarks the transfer codec.")
+    parser.add_argument("files", nargs="*", help="hex files to benchmark")
+    parser.add_argument("--flash", action="store_true", help="also program the images into a virtual programmer(plain vs compressed)")
+    parser.add_argument("--baud" , type=int, default=115200, help="emulated baud rate for the flash benchmark")
+    args = parser.parse_args()
+
+    images = []
+    for file in args.files:
+        image = ProgramImage.from_hex(file)
+        pages = image.get_pages()
+        data  = b"".join(image.page(p) for p in pages)
+        images.append((file, data))
+    images += _synthetic_images()
+
+    print("{:<32}{:>10}{:>10}{:>8}{:>12}{:>12}".format("image", "bytes", "encoded", "ratio", "enc MB/s", "dec MB/s"))
+    for name, data in images:
+        start   = time.perf_counter()
+        stream  = encode(data)
+        t_enc   = time.perf_counter() - start
+        start   = time.perf_counter()
+        decoded = decode(stream)
+        t_dec   = time.perf_counter() - start
+        assert decoded == data, f"Round trip failed for \"{name}\"!"
+        print("{:<32}{:>10}{:>10}{:>8.3f}{:>12.2f}{:>12.2f}".format(
+            name[-32:], len(data), len(stream), len(stream)/len(data), len(data)/t_enc/1e6, len(data)/t_dec/1e6))
+
+    if args.flash == True:
+        from . import interface, programmer, virtualdevice
+
+        print(f"\nFlash benchmark(emulated baud: {args.baud}):")
+        print("{:<32}{:>12}{:>12}{:>12}{:>12}".format("image", "plain s", "plain B", "lz s", "lz B"))
+        for name, data in images:
+            results = []
+            for compress in (False, True):
+                device = virtualdevice.VirtualProgrammer(baud=args.baud)
+                device.start()
+                i = interface.Interface()
+                i._serial_conn.serial_start(device.get_port(), str(args.baud))
+                image = ProgramImage(data, pages=range(len(data) // CONN.PAGE_BYTES))
+                start = time.perf_counter()
+                programmer.program(i, image, compress=compress)
+                elapsed = time.perf_counter() - start
+                assert device.get_memory()[:len(data)] == data, f"Flash failed for \"{name}\"!"
+                results += [elapsed, i._serial_conn.serial_stats().snapshot()["bytes_sent"]]
+                i._serial_conn.serial_stop()
+                device.stop()
+            print("{:<32}{:>12.2f}{:>12}{:>12.2f}{:>12}".format(name[-32:], *results))
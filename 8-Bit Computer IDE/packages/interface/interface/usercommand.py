@@ -2,23 +2,30 @@ from typing import List, Callable
 
 
 class UserCommand:
-    def __init__(self, inputs:List[str], func:Callable, help:str) -> None:
+    def __init__(self, inputs:List[str], func:Callable, help:str, lane:str="serial") -> None:
         """Class used to define commands for the interface package.
+        - Lane decides how the command is executed by "Interface.submit()":
+         >"serial"    -> waits for the other serial commands(use for anything that touches the connection)\n
+         >"local"     -> can run while a serial command is ongoing\n
+         >"immediate" -> runs right away on the caller's thread(should be quick)\n
         
             Methods:
             - check_comman()
             - execute()
             - get_help()
             - get_inputs_list()
+            - get_lane()
 
         Args:
             inputs (List[str]): List of inputs for the command.
             func (Callable): Function to be called by the "execute" method.
             help (str): Help text for the command.
+            lane (str, optional): "serial", "local" or "immediate". Defaults to "serial".
         """
         self._inputs = inputs
         self._func   = func
         self._help   = help
+        self._lane   = lane
     
     def check_command(self, input:str) -> bool:
         """Returns "True" if the command matches, "False" otherwise."""
@@ -37,4 +44,8 @@ class UserCommand:
     
     def get_inputs_list(self) -> List[str]:
         """Returns the inputs list for the command."""
-        return self._inputs
\ No newline at end of file
+        return self._inputs
+    
+    def get_lane(self) -> str:
+        """Returns the lane of the command."""
+        return self._lane
\ No newline at end of file
@@ -0,0 +1,398 @@
+"""
+Virtual programmer that emulates the custom 8-bit computer programmer over a pseudo-terminal.
+- Only available on Linux(or other posix systems with "pty" support).
+- Implements the 4-byte packet protocol with the commands from the "const.CONN" class.
+- Latency, jitter and error injection can be configured to measure the link reproducibly.
+- Emulates the program memory, so uploads and verifies can be tested as well.
+
+---
+
+The port name of the virtual programmer can be given to "CustomSerial.serial_start()"(or the
+"connect" command) just like a real port.
+
+Example:
+    v = virtualdevice.VirtualProgrammer(latency=0.001)
+    v.start()
+    i = interface.Interface()
+    i.command(f"connect {v.get_port()} 115200")
+
+---
+
+The module can also be run directly to start a virtual programmer or to benchmark the link:
+    python -m interface.virtualdevice --serve
+    python -m interface.virtualdevice --count 5000 --latency 0.0005
+"""
+import os
+import threading
+import select
+import random
+import time
+import atexit
+import binascii
+import zlib
+from typing import Union
+
+from .const import CONN
+from . import transfercodec
+
+
+class VirtualProgrammer(threading.Thread):
+    def __init__(self, *args, latency:float=0.0, jitter:float=0.0, drop_rate:float=0.0, nack_rate:float=0.0,
+                 corrupt_rate:float=0.0, baud:int=None, compression:bool=True, seed:int=None, **kwargs) -> None:
+        """Subclass of "threading.Thread" made for the interface package. Emulates the programmer on a pseudo-terminal.
+        - Port is opened on initialization, so the port name is available before the thread starts.
+        - Every valid packet is answered with a single status byte(same as the real programmer).
+        - Packets with invalid checksums or unknown commands are answered with "const.CONN.STATUS_NACK".
+        - Bulk reads are answered with [STATUS_ACK, payload..., CRC16_high, CRC16_low].(see "const.CONN")
+        - If a baud rate is given, the transfer time of the bytes is added to the latency to emulate a real link.
+        - Partial packets are discarded after ~50ms of silence to resynchronize.
+        - Error injection is applied per packet with the given probabilities.(0.0 -> never, 1.0 -> always)
+        - Optional arguments can be given to pass onto the "threading.Thread" superclass.(daemon by default)
+
+            Custom methods:
+            - stop()
+            - get_port()
+            - get_state()
+            - get_memory()
+            - configure()
+
+        Args:
+            latency (float, optional): Delay in seconds before each response. Defaults to 0.0.
+            jitter (float, optional): Maximum random deviation in seconds added to the latency. Defaults to 0.0.
+            drop_rate (float, optional): Probability of not responding at all(host times out). Defaults to 0.0.
+            nack_rate (float, optional): Probability of responding with NACK without executing. Defaults to 0.0.
+            corrupt_rate (float, optional): Probability of responding with a random invalid byte. Defaults to 0.0.
+            baud (int, optional): Emulated baud rate of the link(10 bits per byte), "None" for no limit. Defaults to None.
+            compression (bool, optional): "False" to emulate a programmer without the compressed writes. Defaults to True.
+            seed (int, optional): Seed for the random generator to make the injected errors reproducible. Defaults to None.
+            *args, **kwargs: Other arguments for the "threading.Thread" superclass.
+        """
+        import pty
+        import tty
+
+        kwargs.setdefault("daemon", True)
+        super().__init__(*args, target=self._device_function, **kwargs)
+
+        # Open the pseudo-terminal(slave end is kept open so the port survives host disconnects)
+        self._master_fd, self._slave_fd = pty.openpty()
+        tty.setraw(self._master_fd)
+        tty.setraw(self._slave_fd)
+        self._port = os.ttyname(self._slave_fd)
+
+        self._random   = random.Random(seed)
+        self._e_stop   = threading.Event()
+        self._lock     = threading.Lock()
+        self._latency      = latency
+        self._jitter       = jitter
+        self._drop_rate    = drop_rate
+        self._nack_rate    = nack_rate
+        self._corrupt_rate = corrupt_rate
+        self._baud         = baud
+        self._compression  = compression
+        self._memory       = bytearray(CONN.MEMORY_WORDS * 2)
+
+        self._reset_state()
+        atexit.register(self._termination_handler)
+
+    def stop(self, timeout:int=3) -> None:
+        """Sets the stop flag, waits for the thread to exit and closes the pseudo-terminal.
+
+        Args:
+            timeout (int, optional): Wait timeout in seconds. Defaults to 3.
+
+        Raises:
+            RuntimeError: Raised on timeout.
+        """
+        self._e_stop.set()
+        if self.is_alive() == True:
+            self.join(timeout=float(timeout))
+            if self.is_alive() == True:
+                raise RuntimeError("Failed to stop virtual programmer! -> " + str(threading.current_thread()))
+        with self._lock:
+            for fd in (self._master_fd, self._slave_fd):
+                if fd != None:
+                    os.close(fd)
+            self._master_fd = None
+            self._slave_fd  = None
+
+    def get_port(self) -> str:
+        """Returns the port name to connect to.(ex: "/dev/pts/3")"""
+        return self._port
+
+    def get_state(self) -> dict:
+        """Returns a copy of the emulated programmer state."""
+        with self._lock:
+            return dict(self._state)
+
+    def get_memory(self) -> bytearray:
+        """Returns the emulated program memory.(opcode-literal pairs, can be modified directly)"""
+        return self._memory
+
+    def configure(self, latency:float=None, jitter:float=None, drop_rate:float=None, nack_rate:float=None, corrupt_rate:float=None, baud:int=None) -> None:
+        """Configures the virtual programmer.(options left empty(None) will remain unchanged)
+        - Arguments are the same as the constructor arguments.
+        """
+        with self._lock:
+            if latency      != None: self._latency      = latency
+            if jitter       != None: self._jitter       = jitter
+            if drop_rate    != None: self._drop_rate    = drop_rate
+            if nack_rate    != None: self._nack_rate    = nack_rate
+            if corrupt_rate != None: self._corrupt_rate = corrupt_rate
+            if baud         != None: self._baud         = baud
+
+    def _reset_state(self) -> None:
+        """Resets the emulated programmer to its power-up state."""
+        self._state = {
+            "mode"       : CONN.STATUS_MODE_STANDBY,
+            "reset_hold" : False,
+            "halted"     : False,
+            "clock_level": 0,
+            "clock_count": 0,
+            "pc_enabled" : True,
+            "address"    : 0,
+            "packets"    : 0,
+        }
+
+    def _execute(self, cmd:int, data_h:int, data_l:int, stream:bytes=b"") -> Union[int, bytes]:
+        """Executes a single command and returns the response byte(or the whole response for bulk reads)."""
+        state = self._state
+        if cmd == CONN.CMD_PING:
+            pass
+        elif cmd == CONN.CMD_RESTART:
+            packets = state["packets"]
+            self._reset_state()
+            self._state["packets"] = packets
+        elif cmd == CONN.CMD_MODE_24:
+            state["mode"] = CONN.STATUS_MODE_24
+        elif cmd == CONN.CMD_MODE_40:
+            state["mode"] = CONN.STATUS_MODE_40
+        elif cmd == CONN.CMD_MODE_PROGRAM:
+            state["mode"] = CONN.STATUS_MODE_PROGRAM
+        elif cmd == CONN.CMD_MODE:
+            return state["mode"]
+        elif cmd == CONN.CMD_RESET:
+            state["clock_count"] = 0
+        elif cmd == CONN.CMD_RESET_HOLD:
+            state["reset_hold"] = True
+        elif cmd == CONN.CMD_HALT:
+            state["halted"] = True
+        elif cmd == CONN.CMD_RELEASE:
+            state["reset_hold"] = False
+            state["halted"]     = False
+        elif cmd == CONN.CMD_CLOCK:
+            if state["halted"] == False and state["reset_hold"] == False:
+                state["clock_count"] += 1
+        elif cmd == CONN.CMD_CLOCK_RAISE:
+            if state["clock_level"] == 0 and state["halted"] == False and state["reset_hold"] == False:
+                state["clock_count"] += 1
+            state["clock_level"] = 1
+        elif cmd == CONN.CMD_CLOCK_FALL:
+            state["clock_level"] = 0
+        elif cmd == CONN.CMD_PC_ENABLE:
+            state["pc_enabled"] = True
+        elif cmd == CONN.CMD_PC_DISABLE:
+            state["pc_enabled"] = False
+        elif cmd == CONN.CMD_ADDRESS:
+            if state["mode"] != CONN.STATUS_MODE_PROGRAM:
+                return CONN.STATUS_NACK
+            state["address"] = data_h << 8 | data_l
+        elif cmd == CONN.CMD_WRITE:
+            if state["mode"] != CONN.STATUS_MODE_PROGRAM:
+                return CONN.STATUS_NACK
+            self._memory[state["address"]*2]   = data_h
+            self._memory[state["address"]*2+1] = data_l
+            state["address"] = (state["address"] + 1) % CONN.MEMORY_WORDS
+        elif cmd == CONN.CMD_CAPABILITIES and self._compression == True:
+            return CONN.CAP_WRITE_LZ
+        elif cmd == CONN.CMD_WRITE_LZ and self._compression == True:
+            if state["mode"] != CONN.STATUS_MODE_PROGRAM or binascii.crc_hqx(stream[:-2], 0xFFFF) != int.from_bytes(stream[-2:], "big"):
+                return CONN.STATUS_NACK
+            start = state["address"] * 2
+            try:
+                words = transfercodec.decode(stream[:-2], self._memory[:start])
+            except ValueError:
+                return CONN.STATUS_NACK
+            if start + len(words) > len(self._memory):
+                return CONN.STATUS_NACK
+            self._memory[start:start+len(words)] = words
+            state["address"] = (state["address"] + len(words) // 2) % CONN.MEMORY_WORDS
+        elif cmd == CONN.CMD_READ_PAGES or cmd == CONN.CMD_PAGE_HASHES:
+            count = CONN.PAGE_COUNT if data_l == 0 else data_l
+            if data_h + count > CONN.PAGE_COUNT:
+                return CONN.STATUS_NACK
+            pages = memoryview(self._memory)[data_h*CONN.PAGE_BYTES:(data_h+count)*CONN.PAGE_BYTES]
+            if cmd == CONN.CMD_READ_PAGES:
+                payload = bytes(pages)
+            else:
+                payload = b"".join((zlib.crc32(pages[i*CONN.PAGE_BYTES:(i+1)*CONN.PAGE_BYTES]) & 0xFFFFFFFF).to_bytes(4, "big") for i in range(count))
+            return bytes([CONN.STATUS_ACK]) + payload + binascii.crc_hqx(payload, 0xFFFF).to_bytes(2, "big")
+        else:
+            return CONN.STATUS_NACK
+        return CONN.STATUS_ACK
+
+    def _packet_length(self, packet:bytes) -> int:
+        """Returns the full length of a packet, including the stream and its CRC for the stream commands."""
+        cmd, data_h, data_l, cks = packet[:4]
+        if cmd == CONN.CMD_WRITE_LZ and self._compression == True and _checksum(cmd, data_h, data_l) == cks:
+            return 4 + (data_h << 8 | data_l) + 2
+        return 4
+
+    def _handle_packet(self, packet:bytes) -> None:
+        """Validates a packet, applies the error injection and writes the response."""
+        cmd, data_h, data_l, cks = packet[:4]
+        with self._lock:
+            self._state["packets"] += 1
+            latency = self._latency + self._random.uniform(-self._jitter, self._jitter)
+            roll    = self._random.random()
+
+            # Error injection(drop -> nack -> corrupt)
+            if roll < self._drop_rate:
+                return
+            roll -= self._drop_rate
+            if roll < self._nack_rate:
+                response = CONN.STATUS_NACK
+            elif _checksum(cmd, data_h, data_l) != cks:
+                response = CONN.STATUS_NACK
+            else:
+                response = self._execute(cmd, data_h, data_l, packet[4:])
+                if roll - self._nack_rate < self._corrupt_rate:
+                    response = self._corrupt(response)
+            if isinstance(response, int):
+                response = bytes([response])
+            if self._baud != None:
+                latency += (len(packet) + len(response)) * 10 / self._baud
+
+        if latency > 0:
+            time.sleep(latency)
+        while len(response) > 0:
+            response = response[os.write(self._master_fd, response):]
+
+    def _corrupt(self, response:Union[int, bytes]) -> Union[int, bytes]:
+        """Returns the response with a random byte changed."""
+        if isinstance(response, int):
+            return self._random.choice([b for b in range(256) if b != response])
+        response = bytearray(response)
+        i = self._random.randrange(len(response))
+        response[i] ^= self._random.randrange(1, 256)
+        return bytes(response)
+
+    def _termination_handler(self) -> None:
+        """Exit handler to gracefully stop the thread."""
+        self.stop()
+
+    def _device_function(self) -> None:
+        """Thread function."""
+        buffer = b""
+        last_byte_time = time.monotonic()
+        while(self._e_stop.is_set() == False):
+            readable, _, _ = select.select([self._master_fd], [], [], 0.01)
+
+            # Discard partial packets after a while to resynchronize
+            if readable == []:
+                if buffer != b"" and time.monotonic() - last_byte_time > 0.05:
+                    buffer = b""
+                continue
+
+            try:
+                buffer += os.read(self._master_fd, 4096)
+            except OSError:
+                continue
+            last_byte_time = time.monotonic()
+
+            # Handle each complete packet
+            while len(buffer) >= 4:
+                length = self._packet_length(buffer)
+                if len(buffer) < length:
+                    break
+                self._handle_packet(buffer[:length])
+                buffer = buffer[length:]
+
+
+def _checksum(cmd:int, data_h:int, data_l:int) -> int:
+    """Calculates the packet checksum the same way as "CustomSerial.serial_send_packet()"."""
+    CKS = cmd + data_h + data_l
+    CKS = (CKS >> 8) + (CKS & 0xFF)
+    return ~CKS & 0xFF
+
+
+def benchmark(count:int=1000, baud:str="115200", emulate:bool=False, **kwargs) -> dict:
+    """Measures the ping throughput and round trip latency against a new virtual programmer.
+
+    Args:
+        count (int, optional): Number of ping packets to send. Defaults to 1000.
+        baud (str, optional): Baud rate of the connection. Defaults to "115200".
+        emulate (bool, optional): If True, the virtual programmer emulates the transfer time of the baud rate. Defaults to False.
+        **kwargs: Arguments for the "VirtualProgrammer" class.(latency, jitter, etc...)
+
+    Returns:
+        (dict): Results -> (packets, seconds, packets_per_second, acks, timeouts, other, latency_min/avg/p99/max_ms)
+    """
+    from . import customserial
+
+    device = VirtualProgrammer(baud=int(baud) if emulate == True else None, **kwargs)
+    device.start()
+    conn = customserial.CustomSerial()
+    conn.serial_start(device.get_port(), baud)
+
+    latencies = []
+    responses = {"acks": 0, "timeouts": 0, "other": 0}
+    try:
+        start = time.perf_counter()
+        for _ in range(count):
+            t = time.perf_counter()
+            response = conn.serial_send_packet(CONN.CMD_PING)
+            latencies.append(time.perf_counter() - t)
+            if response == CONN.STATUS_ACK:
+                responses["acks"] += 1
+            elif response == CONN.TIMEOUT:
+                responses["timeouts"] += 1
+            else:
+                responses["other"] += 1
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.serial_stop()
+        device.stop()
+
+    latencies.sort()
+    return {
+        "packets"           : count,
+        "seconds"           : elapsed,
+        "packets_per_second": count / elapsed,
+        **responses,
+        "latency_min_ms"    : latencies[0] * 1000,
+        "latency_avg_ms"    : sum(latencies) / count * 1000,
+        "latency_p99_ms"    : latencies[min(count-1, int(count*0.99))] * 1000,
+        "latency_max_ms"    : latencies[-1] * 1000,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Virtual custom 8-bit computer programmer.")
+    parser.add_argument("--serve"       , action="store_true", help="run until interrupted and print the port name")
+    parser.add_argument("--count"       , type=int  , default=1000, help="number of pings for the benchmark")
+    parser.add_argument("--baud"        , type=str  , default="115200")
+    parser.add_argument("--emulate"     , action="store_true", help="emulate the transfer time of the baud rate")
+    parser.add_argument("--latency"     , type=float, default=0.0)
+    parser.add_argument("--jitter"      , type=float, default=0.0)
+    parser.add_argument("--drop-rate"   , type=float, default=0.0)
+    parser.add_argument("--nack-rate"   , type=float, default=0.0)
+    parser.add_argument("--corrupt-rate", type=float, default=0.0)
+    parser.add_argument("--seed"        , type=int  , default=None)
+    args = parser.parse_args()
+
+    device_args = dict(latency=args.latency, jitter=args.jitter, drop_rate=args.drop_rate,
+                       nack_rate=args.nack_rate, corrupt_rate=args.corrupt_rate, seed=args.seed)
+    if args.serve == True:
+        device = VirtualProgrammer(baud=int(args.baud) if args.emulate == True else None, **device_args)
+        device.start()
+        print(f"Virtual programmer running on port [{device.get_port()}]! (Ctrl+C to stop)")
+        try:
+            while(1):
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    else:
+        for key, value in benchmark(args.count, args.baud, args.emulate, **device_args).items():
+            print("{:<20}: {}".format(key, round(value, 3) if isinstance(value, float) else value))
@@ -0,0 +1,104 @@
+"""
+Measures the IDE's time to the first frame and fails if it regresses.
+- Launches the app(main.py, or the built executable with "--exe") with "--startup-time", which makes it
+  write its startup times as json after the first frame and exit.
+- Median of the runs is compared with the budget, and with the saved baseline(externals/startup_baseline.json)
+  if there is one -> fails if it is over "baseline * (1 + tolerance)", 25% by default.
+- "--imports-only" launches the app with "--import-time" instead, which exits before creating the window, so the
+  import part of the startup is checked without a display(ex: on CI). Its budget and baseline are separate.
+- Baselines depend on the machine, save them again with "--save-baseline" on the machine that runs the checks.
+  (saving one of the times keeps the other one in the file)
+- Exits with 1 on regression, so it can be used in scripts.
+
+Usage:
+    python startup_benchmark.py                       -> compare with the budget(and the baseline if saved)
+    python startup_benchmark.py --imports-only        -> same for the imports only, no display needed
+    python startup_benchmark.py --save-baseline       -> save the median as the new baseline
+    python startup_benchmark.py --exe "executable/dist/Custom 8-Bit Computer IDE/Custom 8-Bit Computer IDE.exe"
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+import tempfile
+
+
+application_path = os.path.dirname(os.path.realpath(__file__))
+baseline_file    = os.path.join(application_path, "externals", "startup_baseline.json")
+
+
+def measure(command:list, timeout:float, imports_only:bool=False) -> dict:
+    """Launches the app once and returns its startup times -> {"startup", "imports"}(only "imports" if "imports_only") in seconds."""
+    fd, report_file = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        subprocess.run(command + ["--import-time" if imports_only == True else "--startup-time", report_file], timeout=timeout, check=True)
+        with open(report_file, 'r') as f:
+            return json.load(f)
+    finally:
+        os.remove(report_file)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measures the IDE's time to the first frame.")
+    parser.add_argument("--runs"         , type=int  , default=5   , help="number of launches(median is used)")
+    parser.add_argument("--budget"       , type=float, default=2.0 , help="maximum startup time in seconds")
+    parser.add_argument("--import-budget", type=float, default=1.0 , help="maximum import time in seconds(\"--imports-only\")")
+    parser.add_argument("--imports-only" , action="store_true"     , help="measure only the imports, no display needed")
+    parser.add_argument("--tolerance"    , type=float, default=0.25, help="allowed slowdown over the baseline(0.25 -> 25%%)")
+    parser.add_argument("--timeout"      , type=float, default=60.0, help="timeout of a single launch in seconds")
+    parser.add_argument("--exe"          , type=str  , default=None, help="built executable to measure instead of main.py")
+    parser.add_argument("--save-baseline", action="store_true"     , help="save the median as the new baseline")
+    args = parser.parse_args()
+
+    command = [args.exe] if args.exe != None else [sys.executable, os.path.join(application_path, "main.py")]
+    results = []
+    for i in range(args.runs):
+        try:
+            result = measure(command, args.timeout, args.imports_only)
+        except (subprocess.SubprocessError, OSError, ValueError) as err:
+            print(f"FAIL: launch failed! ({err})")
+            return 1
+        results.append(result)
+        if args.imports_only == True:
+            print("Run {}: imports {:.3f}s".format(i+1, result["imports"]))
+        else:
+            print("Run {}: startup {:.3f}s (imports {:.3f}s)".format(i+1, result["startup"], result["imports"]))
+
+    # Measured times -> {name: median}, only the imports are checked with "--imports-only"
+    names   = ["imports"] if args.imports_only == True else ["startup", "imports"]
+    medians = {name: statistics.median(result[name] for result in results) for name in names}
+    budget  = args.import_budget if args.imports_only == True else args.budget
+    checked = names[0]
+    print("Median: " + ", ".join("{} {:.3f}s".format(name, median) for name, median in medians.items()) + ", budget {:.3f}s".format(budget))
+
+    baseline = {}
+    if os.path.isfile(baseline_file) == True:
+        with open(baseline_file, 'r') as f:
+            baseline = json.load(f)
+    if args.save_baseline == True:
+        baseline.update(medians)
+        with open(baseline_file, 'w') as f:
+            json.dump(baseline, f, indent=4)
+        print(f"Baseline saved -> \"{baseline_file}\"")
+        return 0
+
+    is_failed = False
+    if medians[checked] > budget:
+        print(f"FAIL: {checked} time is over the budget!")
+        is_failed = True
+    if checked in baseline:
+        limit = baseline[checked] * (1 + args.tolerance)
+        print("Baseline: {} {:.3f}s, limit {:.3f}s".format(checked, baseline[checked], limit))
+        if medians[checked] > limit:
+            print(f"FAIL: {checked} time regressed over the baseline!")
+            is_failed = True
+    else:
+        print(f"No {checked} baseline saved, only the budget is checked! (see \"--save-baseline\")")
+    return 1 if is_failed == True else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())